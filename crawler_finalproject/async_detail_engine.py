@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+异步详情抓取引擎
+基于asyncio并发请求问题页，用令牌桶控制请求速率，失败时按max_retry重试；
+传入RetryPolicy时与其他后端共用主机熔断器和失败计数
+"""
+
+import time
+import random
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+
+from http_fetcher import (parse_question_page, resolve_url, load_pickled_cookies,
+                          ZHIHU_BASE_URL, DEFAULT_USER_AGENT)
+from resilience import RetryPolicy
+
+
+# 值得重试的HTTP状态码
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """异步令牌桶：rate为每秒补充的令牌数，capacity为最大突发请求数"""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = max(rate, 1e-6)
+        self.capacity = max(1, int(capacity))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_request_delay(cls, request_delay: Sequence[float], capacity: int = 1):
+        """由 basic.request_delay 推导速率：整个引擎平均每 mean(request_delay) 秒发出一个请求（与并发数无关）"""
+        low, high = (request_delay[0], request_delay[-1]) if request_delay else (1, 3)
+        mean_delay = max((low + high) / 2.0, 0.01)
+        return cls(rate=1.0 / mean_delay, capacity=capacity)
+
+    async def acquire(self):
+        """获取一个令牌，不足时等待补充"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncDetailEngine:
+    """并发抓取问题详情页的异步引擎"""
+
+    def __init__(self, cookie_file: str, base_url: str = ZHIHU_BASE_URL,
+                 user_agent: str = DEFAULT_USER_AGENT, request_delay: Sequence[float] = (1, 3),
+                 max_retry: int = 3, concurrency: int = 8, burst: int = 1, timeout: float = 10,
+                 retry_policy: Optional[RetryPolicy] = None, allow_fetch: Optional[Callable[[], bool]] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.cookie_file = cookie_file
+        self.base_url = base_url
+        self.user_agent = user_agent
+        # 统一成 (low, high)，与 TokenBucket.from_request_delay 的解析一致（单个值时上下限相同）
+        self.request_delay = (request_delay[0], request_delay[-1]) if request_delay else (1, 3)
+        self.max_retry = max(1, int(max_retry))
+        self.concurrency = max(1, int(concurrency))
+        self.burst = burst
+        self.timeout = timeout
+        self.retry_policy = retry_policy
+        self.breaker = retry_policy.breaker if retry_policy else None
+        # 发请求前调用，返回False时跳过（如详情刷新规划的时间预算已用完）
+        self.allow_fetch = allow_fetch
+        self.logger = logger or logging.getLogger(__name__)
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0}
+
+    @staticmethod
+    def _failure_class(error: Exception) -> str:
+        """按resilience的失败类别归类aiohttp异常"""
+        if isinstance(error, aiohttp.ClientResponseError):
+            if error.status == 429:
+                return 'throttled'
+            return 'http_5xx' if error.status >= 500 else f'http_{error.status}'
+        if isinstance(error, asyncio.TimeoutError):
+            return 'timeout'
+        return 'connection'
+
+    def _record_failure(self, url: str, failure_class: str):
+        if self.retry_policy:
+            self.retry_policy.record_failure(url, failure_class, 'detail')
+
+    def _cookie_header(self) -> str:
+        """把已保存的Cookie拼成请求头"""
+        try:
+            cookies = load_pickled_cookies(self.cookie_file)
+        except Exception as e:
+            self.logger.warning(f"异步引擎加载Cookie失败: {e}")
+            return ""
+        return "; ".join(f"{cookie['name']}={cookie['value']}" for cookie in cookies)
+
+    async def _fetch_one(self, session, bucket: TokenBucket, semaphore: asyncio.Semaphore, url: str) -> Dict:
+        """抓取单个问题页，可重试错误最多尝试max_retry次"""
+        loop = asyncio.get_running_loop()
+        target = resolve_url(self.base_url, url)
+
+        for attempt in range(1, self.max_retry + 1):
+            if self.breaker and not self.breaker.allow(url):
+                # 主机已熔断：跳过请求，不占用令牌
+                self._record_failure(url, 'circuit_open')
+                break
+            if attempt > 1:
+                self.stats['retries'] += 1
+                if self.retry_policy:
+                    self.retry_policy.record_retry()
+            async with semaphore:
+                await bucket.acquire()
+                if self.allow_fetch and not self.allow_fetch():
+                    return {}
+                self.stats['requests'] += 1
+                try:
+                    async with session.get(target) as response:
+                        if response.status in RETRY_STATUS:
+                            raise aiohttp.ClientResponseError(response.request_info, response.history,
+                                                              status=response.status)
+                        response.raise_for_status()
+                        html = await response.text()
+                    if self.breaker:
+                        self.breaker.record(url, ok=True)
+                    # 解析放到线程池，避免阻塞事件循环
+                    return await loop.run_in_executor(None, parse_question_page, html)
+                except aiohttp.ClientResponseError as e:
+                    failure_class = self._failure_class(e)
+                    self._record_failure(url, failure_class)
+                    if e.status not in RETRY_STATUS:
+                        self.logger.error(f"提取详细信息失败 {url}: HTTP {e.status}")
+                        break
+                    error = f"HTTP {e.status}"
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    self._record_failure(url, self._failure_class(e))
+                    error = type(e).__name__
+
+            if attempt < self.max_retry:
+                backoff = random.uniform(*self.request_delay) * attempt
+                self.logger.warning(f"第 {attempt} 次请求失败 {url}: {error}，{backoff:.1f} 秒后重试")
+                await asyncio.sleep(backoff)
+            else:
+                self.logger.error(f"提取详细信息失败 {url}: 已重试 {self.max_retry} 次 ({error})")
+
+        self.stats['failures'] += 1
+        return {}
+
+    async def fetch_all(self, urls: List[str]) -> List[Dict]:
+        """并发抓取全部URL，结果与输入顺序一致"""
+        bucket = TokenBucket.from_request_delay(self.request_delay, self.burst)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        headers = {
+            'User-Agent': self.user_agent,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'zh-CN,zh;q=0.9',
+        }
+        cookie_header = self._cookie_header()
+        if cookie_header:
+            headers['Cookie'] = cookie_header
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(headers=headers, connector=connector, timeout=timeout) as session:
+            return await asyncio.gather(*[self._fetch_one(session, bucket, semaphore, url) for url in urls])
+
+    def run(self, items: List[Dict]) -> List[Tuple[Dict, Dict]]:
+        """为热榜项抓取详细信息，按排名顺序合并回各项（原地更新）
+        
+        返回按排名排序的 (热榜项, 详情) 列表，抓取失败的详情为空字典
+        """
+        items = sorted(items, key=lambda item: item.get('rank', 0))
+        start = time.perf_counter()
+        results = asyncio.run(self.fetch_all([item['url'] for item in items]))
+        for item, details in zip(items, results):
+            item.update(details)
+        self.logger.info(
+            f"异步引擎完成 {len(items)} 条详情抓取，耗时 {time.perf_counter() - start:.2f} 秒，"
+            f"请求 {self.stats['requests']} 次，重试 {self.stats['retries']} 次，失败 {self.stats['failures']} 条"
+        )
+        return list(zip(items, results))
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+可扩展布隆过滤器
+位数组按分片保存为文件并通过mmap加载，容量用尽时追加更大、误判率更低的分片，
+整体误判率不超过配置的目标值
+"""
+
+import os
+import math
+import json
+import mmap
+import hashlib
+import logging
+from typing import Dict, List, Optional
+
+
+class BloomSlice:
+    """单个定长布隆过滤器分片，位数组映射到文件"""
+
+    def __init__(self, path: str, capacity: int, error_rate: float, count: int = 0):
+        self.path = path
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.count = count
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+
+        num_bytes = (self.num_bits + 7) // 8
+        # 文件缺失或大小不符时新建空分片，由调用方判断是否需要重建
+        self.recreated = not os.path.exists(path) or os.path.getsize(path) != num_bytes
+        if self.recreated:
+            with open(path, 'wb') as f:
+                f.truncate(num_bytes)
+        self._file = open(path, 'r+b')
+        self._bits = mmap.mmap(self._file.fileno(), num_bytes)
+
+    def _positions(self, h1: int, h2: int):
+        """双重哈希得到k个位位置"""
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def __contains__(self, hashes) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(*hashes))
+
+    def add(self, hashes):
+        """置位"""
+        bits = self._bits
+        for pos in self._positions(*hashes):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    @property
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+    @property
+    def num_bytes(self) -> int:
+        return (self.num_bits + 7) // 8
+
+    def flush(self):
+        self._bits.flush()
+
+    def close(self):
+        self._bits.close()
+        self._file.close()
+
+
+class ScalableBloomFilter:
+    """可扩展布隆过滤器：分片i的容量为 initial_capacity*growth^i，误判率按 tightening 逐片收紧"""
+
+    def __init__(self, path: str, initial_capacity: int = 100000, error_rate: float = 0.001,
+                 growth: int = 2, tightening: float = 0.5, logger: Optional[logging.Logger] = None):
+        self.path = path
+        self.meta_file = f"{path}.json"
+        self.initial_capacity = max(1, int(initial_capacity))
+        self.error_rate = error_rate
+        self.growth = max(1, int(growth))
+        self.tightening = tightening
+        self.logger = logger or logging.getLogger(__name__)
+        self.slices: List[BloomSlice] = []
+        # 上次保存时精确存储中的哈希数（与当前不一致说明过滤器已过期）；分片文件缺失或大小不符时为False
+        self.source_count: Optional[int] = None
+        self.intact = True
+        self._load()
+
+    def _load(self):
+        """按元数据文件映射已有分片"""
+        if not os.path.exists(self.meta_file):
+            return
+        with open(self.meta_file, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.source_count = meta.get('source_count')
+        self.initial_capacity = meta.get('initial_capacity', self.initial_capacity)
+        self.error_rate = meta.get('error_rate', self.error_rate)
+        self.growth = meta.get('growth', self.growth)
+        self.tightening = meta.get('tightening', self.tightening)
+        for index, slice_meta in enumerate(meta.get('slices', [])):
+            bloom_slice = BloomSlice(f"{self.path}.{index}", slice_meta['capacity'],
+                                     slice_meta['error_rate'], slice_meta['count'])
+            if bloom_slice.recreated or slice_meta.get('bytes') != bloom_slice.num_bytes:
+                self.intact = False
+            self.slices.append(bloom_slice)
+
+    @property
+    def exists(self) -> bool:
+        """磁盘上是否已有过滤器"""
+        return bool(self.slices)
+
+    def clear(self):
+        """删除全部分片（重建前调用）"""
+        for index, bloom_slice in enumerate(self.slices):
+            bloom_slice.close()
+            os.remove(f"{self.path}.{index}")
+        self.slices = []
+        self.intact = True
+
+    @staticmethod
+    def _hashes(key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+    def _add_slice(self):
+        """追加新分片；首片误判率取 error_rate*(1-tightening)，使各片误判率之和不超过目标"""
+        index = len(self.slices)
+        capacity = self.initial_capacity * (self.growth ** index)
+        error_rate = self.error_rate * (1 - self.tightening) * (self.tightening ** index)
+        self.slices.append(BloomSlice(f"{self.path}.{index}", capacity, error_rate))
+        if index:
+            self.logger.info(f"布隆过滤器扩容: 第 {index + 1} 个分片，容量 {capacity}")
+
+    def __contains__(self, key: str) -> bool:
+        hashes = self._hashes(key)
+        return any(hashes in bloom_slice for bloom_slice in self.slices)
+
+    def add(self, key: str):
+        """加入键（已可能存在时不重复计数）"""
+        hashes = self._hashes(key)
+        if any(hashes in bloom_slice for bloom_slice in self.slices):
+            return
+        if not self.slices or self.slices[-1].is_full:
+            self._add_slice()
+        self.slices[-1].add(hashes)
+
+    def stats(self) -> Dict:
+        """分片数、已记录数和位数组大小"""
+        return {
+            'slices': len(self.slices),
+            'count': sum(bloom_slice.count for bloom_slice in self.slices),
+            'bytes': sum((bloom_slice.num_bits + 7) // 8 for bloom_slice in self.slices),
+        }
+
+    def flush(self, source_count: Optional[int] = None):
+        """把位数组和元数据写回磁盘，source_count为精确存储当前的哈希数"""
+        for bloom_slice in self.slices:
+            bloom_slice.flush()
+        if source_count is not None:
+            self.source_count = source_count
+        meta = {
+            'initial_capacity': self.initial_capacity,
+            'error_rate': self.error_rate,
+            'growth': self.growth,
+            'tightening': self.tightening,
+            'source_count': self.source_count,
+            'slices': [{'capacity': s.capacity, 'error_rate': s.error_rate, 'count': s.count, 'bytes': s.num_bytes}
+                       for s in self.slices],
+        }
+        tmp_file = f"{self.meta_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_file, self.meta_file)
+
+    def close(self, source_count: Optional[int] = None):
+        self.flush(source_count)
+        for bloom_slice in self.slices:
+            bloom_slice.close()
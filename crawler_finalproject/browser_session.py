@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+浏览器会话管理
+在定时任务之间保持一个已登录的Chrome驱动，按运行次数或内存占用回收
+"""
+
+import threading
+import logging
+from typing import Callable, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class BrowserSessionManager:
+    """长驻浏览器会话：健康检查、按次数/内存回收，同一时间只借给一个任务"""
+
+    def __init__(self, driver_factory: Callable, close_driver: Optional[Callable] = None, max_runs: int = 20,
+                 max_memory_mb: float = 1500, logger: Optional[logging.Logger] = None):
+        # driver_factory 返回已加载Cookie的驱动（如 EnhancedZhihuCrawler.create_driver，启用守护进程时借用预热实例），
+        # close_driver(driver, healthy) 负责关闭或归还驱动，未提供时直接quit
+        self.driver_factory = driver_factory
+        self.close_driver = close_driver
+        self.max_runs = max(1, int(max_runs))
+        self.max_memory_mb = max_memory_mb
+        self.logger = logger or logging.getLogger(__name__)
+        self.driver = None
+        self.runs = 0
+        self._healthy = True
+        self._lock = threading.Lock()
+
+    def _start(self):
+        """通过驱动工厂创建已登录的驱动"""
+        self.driver = self.driver_factory()
+        self.runs = 0
+        self._healthy = True
+        self.logger.info("浏览器会话已启动")
+
+    def _is_alive(self) -> bool:
+        """驱动是否仍可响应"""
+        try:
+            return self.driver.execute_script("return document.readyState") is not None
+        except WebDriverException:
+            return False
+
+    def memory_mb(self) -> Optional[float]:
+        """浏览器进程树的常驻内存（MB）；无psutil时退化为页面JS堆大小"""
+        try:
+            if psutil is not None:
+                process = psutil.Process(self.driver.service.process.pid)
+                processes = [process] + process.children(recursive=True)
+                return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+            heap = self.driver.execute_script(
+                "return performance.memory ? performance.memory.usedJSHeapSize : null")
+            return heap / (1024 * 1024) if heap else None
+        except Exception as e:
+            self.logger.debug(f"读取浏览器内存失败: {e}")
+            return None
+
+    def _recycle_reason(self) -> Optional[str]:
+        """返回需要回收会话的原因，无需回收时返回None"""
+        if not self._healthy:
+            return "上次任务失败"
+        if self.runs >= self.max_runs:
+            return f"已运行 {self.runs} 次"
+        memory = self.memory_mb()
+        if memory is not None and memory > self.max_memory_mb:
+            return f"内存 {memory:.0f}MB 超过阈值 {self.max_memory_mb}MB"
+        if not self._is_alive():
+            return "驱动无响应"
+        return None
+
+    def acquire(self):
+        """借出已登录的驱动，使用完必须调用release"""
+        self._lock.acquire()
+        try:
+            if self.driver is not None:
+                reason = self._recycle_reason()
+                if reason:
+                    self.logger.info(f"回收浏览器会话: {reason}")
+                    self.close(healthy=False)
+            if self.driver is None:
+                self._start()
+            return self.driver
+        except Exception:
+            self._lock.release()
+            raise
+
+    def release(self, ok: bool = True):
+        """归还驱动；ok为False时下次借出前重建会话"""
+        self.runs += 1
+        if not ok:
+            self._healthy = False
+        self._lock.release()
+
+    def close(self, healthy: bool = True):
+        """关闭当前驱动；healthy为False表示该实例不应再被复用（借自守护进程时由守护进程回收）"""
+        if self.driver is not None:
+            try:
+                if self.close_driver:
+                    self.close_driver(self.driver, healthy)
+                else:
+                    self.driver.quit()
+            except WebDriverException as e:
+                self.logger.warning(f"关闭浏览器会话失败: {e}")
+            self.driver = None
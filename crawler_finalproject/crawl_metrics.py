@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+爬取指标
+按阶段（驱动启动、Cookie加载、登录检查、热榜解析、单条详情抓取、保存）记录耗时直方图，
+并记录新增/去重跳过条数、重试次数、写入字节数等计数器；每次运行结束后导出
+Prometheus textfile（跨运行累计的直方图和计数器，以及最近一次运行的指标）和本次运行的JSON摘要
+"""
+
+import os
+import json
+import math
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+
+METRICS_DIR = "metrics"
+PROM_FILE = "zhihu_crawler.prom"
+CUMULATIVE_FILE = "cumulative.json"
+METRIC_PREFIX = "zhihu_crawl"
+
+# 阶段耗时直方图的桶上界（秒）
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _percentile(samples: List[float], ratio: float) -> float:
+    """最近秩法分位数"""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(ratio * len(ordered)) - 1)]
+
+
+def _label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    pairs = ','.join(f'{key}="{_label_value(value)}"' for key, value in labels.items())
+    return f'{{{pairs}}}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(round(value, 6)) if isinstance(value, float) else str(value)
+
+
+class CrawlMetrics:
+    """单次运行的分阶段耗时和计数器（可在抓取线程中记录）"""
+
+    def __init__(self, buckets: Optional[Iterable[float]] = None):
+        self.buckets = tuple(sorted(float(bound) for bound in (buckets or DEFAULT_BUCKETS)))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.samples: Dict[str, List[float]] = {}
+            self.counters: Dict[str, float] = {}
+
+    def observe(self, phase: str, seconds: float):
+        """记录一次阶段耗时"""
+        with self._lock:
+            self.samples.setdefault(phase, []).append(seconds)
+
+    @contextmanager
+    def phase(self, name: str):
+        """统计with块的耗时（异常时同样记录）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def inc(self, name: str, value: float = 1):
+        """计数器增加value"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> Dict:
+        """本次运行各阶段的次数/总耗时/均值/分位数和计数器"""
+        with self._lock:
+            phases = {}
+            for phase, samples in self.samples.items():
+                phases[phase] = {
+                    'count': len(samples),
+                    'sum': round(sum(samples), 4),
+                    'mean': round(sum(samples) / len(samples), 4),
+                    'p50': round(_percentile(samples, 0.5), 4),
+                    'p95': round(_percentile(samples, 0.95), 4),
+                    'max': round(max(samples), 4),
+                }
+            return {'phases': phases, 'counters': dict(self.counters)}
+
+    def snapshot(self):
+        """(各阶段耗时样本, 计数器) 的副本"""
+        with self._lock:
+            return {phase: list(values) for phase, values in self.samples.items()}, dict(self.counters)
+
+    def bucket_counts(self, samples: List[float]) -> List[int]:
+        """各桶上界内的累计样本数"""
+        return [sum(1 for sample in samples if sample <= bound) for bound in self.buckets]
+
+
+class MetricsExporter:
+    """把每次运行的指标写入 data/metrics/ 下的Prometheus textfile和JSON摘要"""
+
+    def __init__(self, data_dir: str = "data", textfile_dir: Optional[str] = None, keep_runs: int = 200,
+                 logger: Optional[logging.Logger] = None):
+        self.metrics_dir = os.path.join(data_dir, METRICS_DIR)
+        self.textfile_dir = textfile_dir or self.metrics_dir
+        self.keep_runs = keep_runs
+        self.logger = logger or logging.getLogger(__name__)
+        self.cumulative_file = os.path.join(self.metrics_dir, CUMULATIVE_FILE)
+
+    def _load_cumulative(self) -> Dict:
+        try:
+            with open(self.cumulative_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'histograms': {}, 'counters': {}}
+
+    @staticmethod
+    def _write_atomic(path: str, content: str):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+    def _accumulate(self, cumulative: Dict, metrics: CrawlMetrics) -> Dict:
+        """把本次运行合并进累计值（桶上界变化时该阶段重新累计）"""
+        histograms = cumulative.setdefault('histograms', {})
+        samples, counters = metrics.snapshot()
+        for phase, values in samples.items():
+            bucket_counts = metrics.bucket_counts(values)
+            previous = histograms.get(phase)
+            if not previous or previous.get('le') != list(metrics.buckets):
+                previous = {'le': list(metrics.buckets), 'buckets': [0] * len(metrics.buckets), 'count': 0, 'sum': 0.0}
+            previous['buckets'] = [old + new for old, new in zip(previous['buckets'], bucket_counts)]
+            previous['count'] += len(values)
+            previous['sum'] += sum(values)
+            histograms[phase] = previous
+        totals = cumulative.setdefault('counters', {})
+        for name, value in counters.items():
+            totals[name] = totals.get(name, 0) + value
+        cumulative['runs'] = cumulative.get('runs', 0) + 1
+        return cumulative
+
+    def _prometheus(self, cumulative: Dict, run: Dict) -> str:
+        lines = []
+        name = f"{METRIC_PREFIX}_phase_seconds"
+        lines += [f"# HELP {name} 各阶段耗时（秒，跨运行累计）", f"# TYPE {name} histogram"]
+        for phase, histogram in sorted(cumulative.get('histograms', {}).items()):
+            for bound, count in zip(histogram['le'], histogram['buckets']):
+                lines.append(f"{name}_bucket{_labels(phase=phase, le=_number(float(bound)))} {count}")
+            lines.append(f"{name}_bucket{_labels(phase=phase, le='+Inf')} {histogram['count']}")
+            lines.append(f"{name}_sum{_labels(phase=phase)} {_number(float(histogram['sum']))}")
+            lines.append(f"{name}_count{_labels(phase=phase)} {histogram['count']}")
+
+        # 计数器名中冒号后的部分作为kind标签（如 failures:detail:timeout -> kind="detail:timeout"）
+        grouped: Dict[str, List] = {}
+        for counter, value in sorted(cumulative.get('counters', {}).items()):
+            metric, _, label = counter.partition(':')
+            grouped.setdefault(metric, []).append((label, value))
+        for metric, values in grouped.items():
+            name = f"{METRIC_PREFIX}_{metric}_total"
+            lines += [f"# HELP {name} 跨运行累计", f"# TYPE {name} counter"]
+            for label, value in values:
+                lines.append(f"{name}{_labels(kind=label) if label else ''} {_number(float(value))}")
+
+        name = f"{METRIC_PREFIX}_runs_total"
+        lines += [f"# HELP {name} 已导出指标的运行次数", f"# TYPE {name} counter", f"{name} {cumulative.get('runs', 0)}"]
+
+        last_run = {
+            'duration_seconds': run.get('duration', 0),
+            'timestamp_seconds': run.get('finished_at_ts', 0),
+            'success': 1 if run.get('status') == 'ok' else 0,
+            'items': run.get('items', 0),
+        }
+        for key, value in last_run.items():
+            name = f"{METRIC_PREFIX}_last_run_{key}"
+            lines += [f"# HELP {name} 最近一次运行", f"# TYPE {name} gauge", f"{name} {_number(float(value))}"]
+        return '\n'.join(lines) + '\n'
+
+    def _prune(self):
+        """只保留最近keep_runs个运行摘要"""
+        if not self.keep_runs:
+            return
+        runs = sorted(filename for filename in os.listdir(self.metrics_dir)
+                      if filename.startswith('run_') and filename.endswith('.json'))
+        for filename in runs[:-self.keep_runs]:
+            os.remove(os.path.join(self.metrics_dir, filename))
+
+    def export(self, metrics: CrawlMetrics, crawl_id: str, run_info: Dict) -> Dict:
+        """写入本次运行的JSON摘要并更新Prometheus textfile，返回摘要"""
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        os.makedirs(self.textfile_dir, exist_ok=True)
+        run = dict(run_info, crawl_id=crawl_id, finished_at_ts=round(time.time(), 3), **metrics.summary())
+        self._write_atomic(os.path.join(self.metrics_dir, f"run_{crawl_id}.json"),
+                           json.dumps(run, ensure_ascii=False, indent=2))
+
+        cumulative = self._accumulate(self._load_cumulative(), metrics)
+        cumulative['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self._write_atomic(self.cumulative_file, json.dumps(cumulative, ensure_ascii=False))
+        self._write_atomic(os.path.join(self.textfile_dir, PROM_FILE), self._prometheus(cumulative, run))
+        self._prune()
+        return run
@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+爬取流水线
+热榜项、详情抓取、写入三个阶段通过有界队列衔接并行执行：热榜项一产出就交给详情工作线程，
+补全后的热榜项由写入线程逐条追加到本次运行的流水日志（pipeline/run_*.ndjson），
+进程中途退出时已完成的部分不会丢失，总耗时接近最慢的阶段而不是各阶段之和。
+同名的检查点文件记录运行阶段和列表阶段的结果，中断的运行可以只补抓未完成的详情
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+PIPELINE_DIR = "pipeline"
+JOURNAL_SUFFIX = ".ndjson"
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+LOCK_SUFFIX = ".lock"
+
+# 队列结束标记
+_DONE = object()
+
+
+class PipelineJournal:
+    """本次运行的逐条写入日志（NDJSON），正常保存后删除，残留的日志在下次运行时补存"""
+
+    def __init__(self, data_dir: str = "data", run_id: Optional[str] = None, fsync: bool = True):
+        journal_dir = os.path.join(data_dir, PIPELINE_DIR)
+        os.makedirs(journal_dir, exist_ok=True)
+        self.run_id = run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.path = os.path.join(journal_dir, f"run_{self.run_id}{JOURNAL_SUFFIX}")
+        self.fsync = fsync
+        self.count = 0
+        self._file = open(self.path, 'ab')
+
+    def append(self, item: Dict):
+        """追加一条热榜项并落盘"""
+        self._file.write((json.dumps(item, ensure_ascii=False, default=str) + '\n').encode('utf-8'))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.count += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def discard(self):
+        """数据已正常保存，删除日志"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def load_journal(path: str) -> List[Dict]:
+    """读取流水日志，跳过中断时未写完的最后一行"""
+    items = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                continue
+    return items
+
+
+class CrawlCheckpoint:
+    """一次运行的检查点
+
+    run_<crawl_id>.checkpoint.json 记录运行阶段（list/detail/save）、列表阶段得到的热榜项和需要抓取详情的问题，
+    详情阶段的进度就是同名流水日志中已写入的热榜项；运行正常保存后两个文件一起删除。
+    运行期间持有同名 .lock 文件的排他锁，其他进程据此跳过仍在进行中的运行
+    """
+
+    def __init__(self, data_dir: str = "data", crawl_id: Optional[str] = None):
+        self.crawl_id = crawl_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.checkpoint_dir = os.path.join(data_dir, PIPELINE_DIR)
+        self.path = os.path.join(self.checkpoint_dir, f"run_{self.crawl_id}{CHECKPOINT_SUFFIX}")
+        self.journal_path = os.path.join(self.checkpoint_dir, f"run_{self.crawl_id}{JOURNAL_SUFFIX}")
+        self.lock_path = os.path.join(self.checkpoint_dir, f"run_{self.crawl_id}{LOCK_SUFFIX}")
+        self._lock_file = None
+        self.state: Dict = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.state = json.load(f)
+            except (OSError, ValueError):
+                self.state = {}
+
+    def lock(self) -> bool:
+        """获取运行的排他锁（不等待），锁已被其他运行持有时返回False；进程退出时锁自动释放"""
+        if self._lock_file is not None:
+            return True
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        lock_file = open(self.lock_path, 'a+b')
+        try:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            elif msvcrt:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def unlock(self):
+        if self._lock_file is not None:
+            # 关闭文件即释放锁
+            self._lock_file.close()
+            self._lock_file = None
+
+    @property
+    def phase(self) -> Optional[str]:
+        return self.state.get('phase')
+
+    def save(self, phase: str, **fields):
+        """更新运行阶段及附带字段（先写临时文件再替换，中断时不会留下半个文件）"""
+        self.state.update(fields)
+        self.state.update(crawl_id=self.crawl_id, phase=phase,
+                          updated_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, default=str)
+        os.replace(temp_path, self.path)
+
+    def completed_items(self) -> Dict[str, Dict]:
+        """流水日志中已写入的热榜项（question_hash -> 热榜项）"""
+        if not os.path.exists(self.journal_path):
+            return {}
+        return {item['question_hash']: item for item in load_journal(self.journal_path)
+                if item.get('question_hash')}
+
+    def merged_items(self) -> List[Dict]:
+        """列表阶段的全部热榜项，已完成的用流水日志中补全后的版本替换"""
+        completed = self.completed_items()
+        items = [completed.pop(item['question_hash'], item) for item in self.state.get('items', [])]
+        # 没有检查点文件（或列表阶段未记录）时只有流水日志
+        return items + list(completed.values())
+
+    def remaining(self) -> Tuple[List[Dict], List[Dict], Set[str]]:
+        """(已完成的热榜项, 未写入的热榜项, 其中需要抓取详情的question_hash)"""
+        completed = self.completed_items()
+        items = self.state.get('items', [])
+        done = [completed[item['question_hash']] for item in items if item['question_hash'] in completed]
+        unfinished = [item for item in items if item['question_hash'] not in completed]
+        pending = set(self.state.get('pending', [])) - set(completed)
+        return done, unfinished, pending
+
+    def discard(self):
+        """删除检查点和流水日志并释放锁"""
+        for path in (self.path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+        if self._lock_file is not None:
+            self.unlock()
+            try:
+                os.remove(self.lock_path)
+            except OSError:
+                pass
+
+
+def pending_checkpoints(data_dir: str = "data") -> List[CrawlCheckpoint]:
+    """未正常结束或仍在进行中的运行（有检查点或流水日志），按crawl_id排序；是否仍在进行由调用方用lock()判断"""
+    checkpoint_dir = os.path.join(data_dir, PIPELINE_DIR)
+    if not os.path.isdir(checkpoint_dir):
+        return []
+    crawl_ids = set()
+    for filename in os.listdir(checkpoint_dir):
+        for suffix in (CHECKPOINT_SUFFIX, JOURNAL_SUFFIX):
+            if filename.startswith('run_') and filename.endswith(suffix):
+                crawl_ids.add(filename[len('run_'):-len(suffix)])
+    return [CrawlCheckpoint(data_dir, crawl_id) for crawl_id in sorted(crawl_ids)]
+
+
+class CrawlPipeline:
+    """热榜项 -> 详情抓取 -> 写入 三段流水线
+
+    fetch_details(item) 返回要合并到热榜项的详情（在多个工作线程中调用），
+    write_item(item) 在单个写入线程中按完成顺序逐条调用
+    """
+
+    def __init__(self, fetch_details: Callable[[Dict], Dict], write_item: Callable[[Dict], None],
+                 workers: int = 4, queue_size: int = 8, logger: Optional[logging.Logger] = None):
+        self.fetch_details = fetch_details
+        self.write_item = write_item
+        self.workers = max(1, int(workers))
+        self.queue_size = max(1, int(queue_size))
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.stage_seconds = {'produce': 0.0, 'detail': 0.0, 'write': 0.0}
+        self.write_errors = 0
+
+    def _add_time(self, stage: str, seconds: float):
+        with self._lock:
+            self.stage_seconds[stage] += seconds
+
+    def run(self, items: Iterable[Dict], needs_details: Callable[[Dict], bool]) -> List[Dict]:
+        """运行流水线，返回按产出顺序排列的全部热榜项（原地更新）
+
+        needs_details(item) 为False的热榜项跳过详情阶段直接写入
+        """
+        detail_queue = queue.Queue(maxsize=self.queue_size)
+        write_queue = queue.Queue(maxsize=self.queue_size)
+        produced: List[Dict] = []
+        errors: List[BaseException] = []
+        start = time.perf_counter()
+
+        def _produce():
+            try:
+                iterator = iter(items)
+                while True:
+                    began = time.perf_counter()
+                    item = next(iterator, _DONE)
+                    self._add_time('produce', time.perf_counter() - began)
+                    if item is _DONE:
+                        break
+                    produced.append(item)
+                    (detail_queue if needs_details(item) else write_queue).put(item)
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                for _ in range(self.workers):
+                    detail_queue.put(_DONE)
+                write_queue.put(_DONE)
+
+        def _enrich():
+            try:
+                while True:
+                    item = detail_queue.get()
+                    if item is _DONE:
+                        break
+                    began = time.perf_counter()
+                    try:
+                        item.update(self.fetch_details(item) or {})
+                    except Exception as e:
+                        self.logger.error(f"提取详细信息失败 {item.get('url')}: {e}")
+                    self._add_time('detail', time.perf_counter() - began)
+                    write_queue.put(item)
+            finally:
+                write_queue.put(_DONE)
+
+        threads = [threading.Thread(target=_produce, name='pipeline-produce', daemon=True)]
+        threads += [threading.Thread(target=_enrich, name=f'pipeline-detail-{index}', daemon=True)
+                    for index in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        # 写入阶段在当前线程执行，收到全部上游的结束标记后退出
+        remaining = self.workers + 1
+        while remaining:
+            item = write_queue.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            began = time.perf_counter()
+            try:
+                self.write_item(item)
+            except Exception as e:
+                self.write_errors += 1
+                self.logger.error(f"写入热榜项失败 {item.get('question_hash')}: {e}")
+            self._add_time('write', time.perf_counter() - began)
+
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+        elapsed = time.perf_counter() - start
+        self.logger.info(
+            f"流水线完成 {len(produced)} 条，耗时 {elapsed:.2f} 秒（解析 {self.stage_seconds['produce']:.2f} 秒，"
+            f"详情 {self.stage_seconds['detail']:.2f} 秒/{self.workers} 线程，写入 {self.stage_seconds['write']:.2f} 秒）"
+        )
+        return produced
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+精简爬取配置（lean profile）
+在浏览器层面拦截图片、字体、样式、媒体和第三方跟踪脚本，禁用媒体自动播放，并统计节省的流量
+"""
+
+import json
+import threading
+import logging
+from typing import Dict, List, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+
+# 按资源类型拦截的URL模式（Network.setBlockedURLs支持*通配符）
+RESOURCE_TYPE_PATTERNS = {
+    'image': ['*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*',
+              '*://pic*.zhimg.com/*'],
+    'font': ['*.woff*', '*.ttf*', '*.otf*', '*.eot*'],
+    'stylesheet': ['*.css*'],
+    'media': ['*.mp4*', '*.webm*', '*.m3u8*', '*.mp3*', '*.m4a*', '*.flv*', '*://vdn*.zhimg.com/*'],
+}
+
+# 默认拦截的第三方统计/广告主机
+DEFAULT_BLOCKED_HOSTS = [
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+    'hm.baidu.com', 'cnzz.com', 'umeng.com', 'mmstat.com',
+]
+
+# 被拦截请求的估算大小（字节），用于估算节省的流量
+DEFAULT_ESTIMATED_BYTES = {
+    'image': 30 * 1024,
+    'font': 60 * 1024,
+    'stylesheet': 40 * 1024,
+    'media': 500 * 1024,
+    'script': 50 * 1024,
+    'other': 10 * 1024,
+}
+
+# CDP资源类型到统计类型的映射
+CDP_TYPE_MAP = {'Image': 'image', 'Font': 'font', 'Stylesheet': 'stylesheet', 'Media': 'media', 'Script': 'script'}
+
+
+class LeanCrawlProfile:
+    """精简爬取配置：拦截非必要资源并统计流量"""
+
+    def __init__(self, config: Optional[Dict] = None, logger: Optional[logging.Logger] = None):
+        config = config or {}
+        self.blocked_types = config.get('blocked_resource_types', ['image', 'font', 'stylesheet', 'media'])
+        self.blocked_hosts = config.get('blocked_hosts', DEFAULT_BLOCKED_HOSTS)
+        self.estimated_bytes = dict(DEFAULT_ESTIMATED_BYTES)
+        self.estimated_bytes.update(config.get('estimated_bytes', {}) or {})
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def blocked_url_patterns(self) -> List[str]:
+        """需要拦截的全部URL模式"""
+        patterns = []
+        for resource_type in self.blocked_types:
+            patterns.extend(RESOURCE_TYPE_PATTERNS.get(resource_type, []))
+        for host in self.blocked_hosts:
+            patterns.append(f"*://*.{host}/*")
+            patterns.append(f"*://{host}/*")
+        return patterns
+
+    def apply_options(self, options):
+        """在启动前写入Chrome选项"""
+        if 'image' in self.blocked_types:
+            options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_argument('--autoplay-policy=user-gesture-required')
+        options.add_argument('--mute-audio')
+        options.add_argument('--disable-extensions')
+        options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2 if 'image' in self.blocked_types else 1,
+            'profile.default_content_setting_values.notifications': 2,
+            'profile.managed_default_content_settings.media_stream': 2,
+        })
+        # 开启性能日志，用于统计传输字节和被拦截的请求
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+    def install(self, driver):
+        """在驱动启动后通过CDP设置URL拦截"""
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.blocked_url_patterns()})
+        except WebDriverException as e:
+            self.logger.warning(f"设置资源拦截失败: {e}")
+
+    def collect(self, driver):
+        """读取并清空驱动的性能日志，累计流量统计"""
+        try:
+            entries = driver.get_log('performance')
+        except WebDriverException as e:
+            self.logger.debug(f"读取性能日志失败: {e}")
+            return
+
+        request_types = {}
+        with self._lock:
+            for entry in entries:
+                try:
+                    message = json.loads(entry['message'])['message']
+                except (KeyError, ValueError):
+                    continue
+                method, params = message.get('method'), message.get('params', {})
+                if method == 'Network.requestWillBeSent':
+                    request_types[params.get('requestId')] = CDP_TYPE_MAP.get(params.get('type'), 'other')
+                    self.stats['requests'] += 1
+                elif method == 'Network.loadingFinished':
+                    self.stats['bytes_transferred'] += int(params.get('encodedDataLength', 0))
+                elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+                    resource_type = CDP_TYPE_MAP.get(params.get('type'),
+                                                     request_types.get(params.get('requestId'), 'other'))
+                    blocked = self.stats['blocked_by_type']
+                    blocked[resource_type] = blocked.get(resource_type, 0) + 1
+                    self.stats['blocked_requests'] += 1
+                    self.stats['estimated_bytes_saved'] += self.estimated_bytes.get(
+                        resource_type, self.estimated_bytes['other'])
+
+    def summary(self) -> Dict:
+        """本次运行的流量统计"""
+        with self._lock:
+            return json.loads(json.dumps(self.stats))
+
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self.stats = {
+                'requests': 0,
+                'bytes_transferred': 0,
+                'blocked_requests': 0,
+                'blocked_by_type': {},
+                'estimated_bytes_saved': 0,
+            }
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+爬取运行日志
+每次运行追加一行紧凑JSON到 crawl_runs.ndjson（耗时、条数、详情数、字节数、失败原因），
+文件超过大小上限时轮转为 crawl_runs.NNNNN.ndjson，轮转文件全部保留，读取时按顺序拼接成完整历史
+"""
+
+import os
+import json
+import math
+import logging
+from collections import Counter
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+
+RUN_LOG_FILE = "crawl_runs.ndjson"
+LEGACY_HISTORY_FILE = "crawl_history.json"
+
+
+class CrawlRunLog:
+    """追加写入、按大小轮转的运行日志"""
+
+    def __init__(self, data_dir: str = "data", max_bytes: int = 5 * 1024 * 1024,
+                 logger: Optional[logging.Logger] = None):
+        self.data_dir = data_dir
+        self.log_file = os.path.join(data_dir, RUN_LOG_FILE)
+        self.max_bytes = max_bytes
+        self.logger = logger or logging.getLogger(__name__)
+        self._migrate_legacy()
+
+    def _migrate_legacy(self):
+        """把旧版 crawl_history.json 导入运行日志（只执行一次）"""
+        legacy_file = os.path.join(self.data_dir, LEGACY_HISTORY_FILE)
+        if not os.path.exists(legacy_file):
+            return
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"读取旧版爬取历史失败: {e}")
+            history = []
+        if self.rotated_files() or os.path.exists(self.log_file):
+            history = []
+        for entry in history:
+            self.append({
+                'started_at': entry.get('timestamp'),
+                'status': 'ok',
+                'items': entry.get('count', 0),
+                'filepath': entry.get('filepath'),
+                'migrated': True,
+            })
+        os.replace(legacy_file, f"{legacy_file}.migrated")
+        if history:
+            self.logger.info(f"旧版爬取历史已导入运行日志: {len(history)} 条")
+
+    def rotated_files(self) -> List[str]:
+        """已轮转的日志文件（按轮转顺序）"""
+        prefix, suffix = RUN_LOG_FILE.split('.', 1)
+        rotated = []
+        for filename in os.listdir(self.data_dir):
+            parts = filename.split('.')
+            if len(parts) == 3 and parts[0] == prefix and parts[2] == suffix and parts[1].isdigit():
+                rotated.append(filename)
+        return [os.path.join(self.data_dir, filename) for filename in sorted(rotated)]
+
+    def _rotate(self):
+        prefix, suffix = RUN_LOG_FILE.split('.', 1)
+        index = len(self.rotated_files()) + 1
+        os.replace(self.log_file, os.path.join(self.data_dir, f"{prefix}.{index:05d}.{suffix}"))
+
+    def append(self, entry: Dict):
+        """追加一条运行记录"""
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n'
+        try:
+            if self.max_bytes and os.path.getsize(self.log_file) >= self.max_bytes:
+                self._rotate()
+        except OSError:
+            pass
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+    def iter_runs(self) -> Iterator[Dict]:
+        """按时间顺序逐条读取全部运行记录（含轮转文件）"""
+        for filepath in self.rotated_files() + [self.log_file]:
+            if not os.path.exists(filepath):
+                continue
+            with open(filepath, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # 写入中断导致的残缺行
+                        continue
+
+    def load_runs(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """全部运行记录的DataFrame，可只取部分列"""
+        df = pd.DataFrame(list(self.iter_runs()))
+        if df.empty:
+            return df
+        if columns is not None:
+            df = df[[column for column in columns if column in df.columns]]
+        if 'started_at' in df.columns:
+            df['started_at'] = pd.to_datetime(df['started_at'], errors='coerce')
+        return df
+
+    def summary(self) -> Dict:
+        """运行历史汇总（用于容量规划）"""
+        runs = 0
+        statuses = Counter()
+        failures = Counter()
+        durations = []
+        totals = dict.fromkeys(('items', 'details_fetched', 'bytes_written', 'bytes_downloaded'), 0)
+        for run in self.iter_runs():
+            runs += 1
+            statuses[run.get('status', 'ok')] += 1
+            failures.update(run.get('failures') or {})
+            if run.get('duration') is not None:
+                durations.append(run['duration'])
+            for key in totals:
+                totals[key] += run.get(key) or 0
+
+        durations.sort()
+        return {
+            'runs': runs,
+            'statuses': dict(statuses),
+            'failures': dict(failures.most_common()),
+            'duration_mean': sum(durations) / len(durations) if durations else None,
+            'duration_p95': durations[math.ceil(0.95 * len(durations)) - 1] if durations else None,
+            **{f'total_{key}': value for key, value in totals.items()},
+        }
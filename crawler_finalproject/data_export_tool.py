@@ -15,6 +15,10 @@ from typing import List, Dict, Optional
 import argparse
 import logging
 
+from raw_storage import is_raw_file, iter_raw_records
+from history_loader import load_history, load_observation_records
+from numeric_fields import normalize_frame
+
 
 class DataExporter:
     """数据导出工具"""
@@ -34,39 +38,30 @@ class DataExporter:
         self.logger = logging.getLogger(__name__)
     
     def load_data_by_date_range(self, start_date: str, end_date: str) -> pd.DataFrame:
-        """按日期范围加载数据"""
-        all_data = []
+        """按日期范围加载数据（已建立SQLite库或Parquet历史存储时只读取范围内的数据）"""
+        df = load_history(self.data_dir, start_date=start_date, end_date=end_date, logger=self.logger)
+        if df is not None:
+            return df
         
-        if not os.path.exists(self.raw_dir):
-            return pd.DataFrame()
+        all_data = []
         
         start_dt = datetime.strptime(start_date, '%Y-%m-%d')
         end_dt = datetime.strptime(end_date, '%Y-%m-%d')
         
-        for filename in os.listdir(self.raw_dir):
-            if not filename.endswith('.json') or 'zhihu_hot' not in filename:
-                continue
-                
-            try:
-                # 从文件名提取日期
-                date_str = filename.split('_')[2][:8]  # zhihu_hot_20240101_123456.json
-                file_date = datetime.strptime(date_str, '%Y%m%d')
-                
-                if start_dt <= file_date <= end_dt:
-                    filepath = os.path.join(self.raw_dir, filename)
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        all_data.extend(data)
-                        
-            except Exception as e:
-                self.logger.warning(f"跳过文件 {filename}: {e}")
+        # 按文件名中的日期过滤: zhihu_hot_20240101_123456.json / zhihu_hot_20240101.ndjson
+        all_data.extend(iter_raw_records(
+            self.raw_dir, start_dt, end_dt,
+            on_error=lambda filename, e: self.logger.warning(f"跳过文件 {filename}: {e}")))
+        # 快照模式下的记录在观测存储中
+        all_data.extend(load_observation_records(self.data_dir, start_dt, end_dt, logger=self.logger))
         
         if not all_data:
             return pd.DataFrame()
         
         df = pd.DataFrame(all_data)
         
-        # 数据类型转换
+        # 数据类型转换（旧数据中的热度/计数文本转换为数值）
+        normalize_frame(df, keep_raw_text=True)
         if 'crawl_time' in df.columns:
             df['crawl_time'] = pd.to_datetime(df['crawl_time'])
         if 'date' in df.columns:
@@ -283,7 +278,7 @@ class BackupManager:
             raw_dir = os.path.join(self.data_dir, "raw")
             if os.path.exists(raw_dir):
                 for filename in os.listdir(raw_dir):
-                    if filename.endswith('.json'):
+                    if is_raw_file(filename):
                         file_path = os.path.join(raw_dir, filename)
                         
                         # 检查文件修改时间
@@ -447,4 +442,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+去重存储
+记录已抓取问题的哈希值：默认使用追加日志+内存集合，定期压缩；
+有界内存模式使用SQLite主键索引，不把全部哈希载入内存；
+可选在精确存储前加一层布隆过滤器，未命中时不再查询精确存储
+"""
+
+import os
+import json
+import sqlite3
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from bloom_filter import ScalableBloomFilter
+
+
+class AppendLogHashStore:
+    """追加日志去重存储：启动时读入集合，保存时只追加新哈希，重复行过多时压缩重写"""
+
+    def __init__(self, log_file: str, legacy_file: Optional[str] = None, compact_ratio: float = 1.5,
+                 logger: Optional[logging.Logger] = None):
+        self.log_file = log_file
+        self.compact_ratio = max(1.0, compact_ratio)
+        self.logger = logger or logging.getLogger(__name__)
+        self._hashes = set()
+        self._pending: List[str] = []
+        self._log_lines = 0
+        self._load(legacy_file)
+
+    def _load(self, legacy_file: Optional[str]):
+        """读取日志；日志不存在时从旧版question_hashes.json迁移"""
+        if os.path.exists(self.log_file):
+            with open(self.log_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    question_hash = line.strip()
+                    if question_hash:
+                        self._hashes.add(question_hash)
+                        self._log_lines += 1
+        elif legacy_file and os.path.exists(legacy_file):
+            try:
+                with open(legacy_file, 'r', encoding='utf-8') as f:
+                    self._hashes = set(json.load(f))
+                self.compact()
+                self.logger.info(f"已从 {legacy_file} 迁移 {len(self._hashes)} 个问题哈希")
+            except Exception as e:
+                self.logger.warning(f"迁移旧去重文件失败: {e}")
+
+    def __contains__(self, question_hash: str) -> bool:
+        return question_hash in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._hashes)
+
+    def add(self, question_hash: str):
+        """记录哈希，flush时写入磁盘"""
+        if question_hash not in self._hashes:
+            self._hashes.add(question_hash)
+            self._pending.append(question_hash)
+
+    def update(self, question_hashes: Iterable[str]):
+        """批量记录哈希"""
+        for question_hash in question_hashes:
+            self.add(question_hash)
+
+    def flush(self):
+        """把新哈希追加到日志，重复行比例过高时压缩"""
+        if self._pending:
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(''.join(f"{question_hash}\n" for question_hash in self._pending))
+            self._log_lines += len(self._pending)
+            self._pending = []
+        if self._log_lines > len(self._hashes) * self.compact_ratio:
+            self.compact()
+
+    def compact(self):
+        """用当前集合原子重写日志，去掉重复行"""
+        tmp_file = f"{self.log_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(''.join(f"{question_hash}\n" for question_hash in self._hashes))
+        os.replace(tmp_file, self.log_file)
+        self._log_lines = len(self._hashes)
+        self._pending = []
+
+    def close(self):
+        """写入未保存的哈希"""
+        self.flush()
+
+
+class SQLiteHashStore:
+    """有界内存去重存储：哈希保存在SQLite主键索引中，按需查询"""
+
+    def __init__(self, db_file: str, legacy_file: Optional[str] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.db_file = db_file
+        self.logger = logger or logging.getLogger(__name__)
+        is_new = not os.path.exists(db_file)
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS question_hashes (hash TEXT PRIMARY KEY) WITHOUT ROWID")
+        if is_new and legacy_file and os.path.exists(legacy_file):
+            try:
+                with open(legacy_file, 'r', encoding='utf-8') as f:
+                    legacy_hashes = json.load(f)
+                self.update(legacy_hashes)
+                self.flush()
+                self.logger.info(f"已从 {legacy_file} 迁移 {len(legacy_hashes)} 个问题哈希")
+            except Exception as e:
+                self.logger.warning(f"迁移旧去重文件失败: {e}")
+
+    def __contains__(self, question_hash: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM question_hashes WHERE hash = ?",
+                                  (question_hash,)).fetchone() is not None
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM question_hashes").fetchone()[0]
+
+    def __iter__(self) -> Iterator[str]:
+        for (question_hash,) in self._conn.execute("SELECT hash FROM question_hashes"):
+            yield question_hash
+
+    def add(self, question_hash: str):
+        """记录哈希（在当前事务中，flush时提交）"""
+        self._conn.execute("INSERT OR IGNORE INTO question_hashes (hash) VALUES (?)", (question_hash,))
+
+    def update(self, question_hashes: Iterable[str]):
+        """批量记录哈希"""
+        self._conn.executemany("INSERT OR IGNORE INTO question_hashes (hash) VALUES (?)",
+                               ((question_hash,) for question_hash in question_hashes))
+
+    def flush(self):
+        """提交未保存的哈希"""
+        self._conn.commit()
+
+    def compact(self):
+        """回收已删除页的空间"""
+        self._conn.commit()
+        self._conn.execute("VACUUM")
+
+    def close(self):
+        """提交并关闭数据库"""
+        self._conn.commit()
+        self._conn.close()
+
+
+class BloomTieredHashStore:
+    """布隆过滤器+精确存储：过滤器判定不存在时直接返回，判定存在时按需用精确存储排除误判"""
+
+    def __init__(self, bloom: ScalableBloomFilter, exact_store, verify: bool = True,
+                 logger: Optional[logging.Logger] = None):
+        self.bloom = bloom
+        self.exact_store = exact_store
+        self.verify = verify
+        self.logger = logger or logging.getLogger(__name__)
+        self.stats = {'bloom_negatives': 0, 'exact_checks': 0, 'false_positives': 0}
+        # 精确存储中的哈希数只在打开时统计一次，之后随add增量维护（避免每次flush都COUNT(*)）
+        self._count = len(exact_store)
+        if not bloom.exists:
+            self._rebuild()
+        elif not bloom.intact or bloom.source_count != self._count:
+            # 分片文件损坏，或过滤器停用期间精确存储有新增（过滤器会漏判已存在的问题）
+            self.logger.warning("布隆过滤器与精确存储不一致，重新构建")
+            bloom.clear()
+            self._rebuild()
+
+    def _rebuild(self):
+        """从精确存储重建过滤器"""
+        count = 0
+        for question_hash in self.exact_store:
+            self.bloom.add(question_hash)
+            count += 1
+        self._count = count
+        self.bloom.flush(source_count=count)
+        if count:
+            self.logger.info(f"已从精确存储重建布隆过滤器: {count} 个问题哈希")
+
+    def __contains__(self, question_hash: str) -> bool:
+        if question_hash not in self.bloom:
+            self.stats['bloom_negatives'] += 1
+            return False
+        if not self.verify:
+            return True
+        self.stats['exact_checks'] += 1
+        if question_hash in self.exact_store:
+            return True
+        self.stats['false_positives'] += 1
+        return False
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.exact_store)
+
+    def add(self, question_hash: str):
+        """同时写入过滤器和精确存储（过滤器判定可能存在时才查询精确存储确认是否为新哈希）"""
+        if question_hash not in self.bloom or question_hash not in self.exact_store:
+            self._count += 1
+        self.bloom.add(question_hash)
+        self.exact_store.add(question_hash)
+
+    def update(self, question_hashes: Iterable[str]):
+        """批量记录哈希"""
+        for question_hash in question_hashes:
+            self.add(question_hash)
+
+    def flush(self):
+        self.exact_store.flush()
+        self.bloom.flush(source_count=self._count)
+
+    def compact(self):
+        self.exact_store.compact()
+
+    def close(self):
+        self.bloom.close(source_count=self._count)
+        self.exact_store.close()
+
+
+def open_hash_store(data_dir: str, config: Optional[dict] = None, logger: Optional[logging.Logger] = None):
+    """按deduplication配置打开去重存储
+
+    mode 为 log 时使用追加日志（全部哈希在内存中），为 sqlite 时使用有界内存的SQLite索引；
+    bloom.enabled 为真时在精确存储前加一层布隆过滤器（仅支持 sqlite 模式）
+    """
+    config = config or {}
+    logger = logger or logging.getLogger(__name__)
+    legacy_file = os.path.join(data_dir, "question_hashes.json")
+    if config.get('mode', 'log') == 'sqlite':
+        store = SQLiteHashStore(os.path.join(data_dir, config.get('db_file', 'question_hashes.db')),
+                                legacy_file=legacy_file, logger=logger)
+    else:
+        store = AppendLogHashStore(os.path.join(data_dir, config.get('storage_file', 'question_hashes.log')),
+                                   legacy_file=legacy_file, compact_ratio=config.get('compact_ratio', 1.5),
+                                   logger=logger)
+
+    bloom_config: Dict = config.get('bloom', {}) or {}
+    if not bloom_config.get('enabled', False):
+        return store
+    if not isinstance(store, SQLiteHashStore):
+        # log模式仍在内存中保存全部哈希，加上过滤器只会多占内存
+        logger.warning("布隆过滤器层需要 deduplication.mode 为 sqlite，当前模式下不启用")
+        return store
+    bloom = ScalableBloomFilter(
+        os.path.join(data_dir, bloom_config.get('storage_file', 'question_hashes.bloom')),
+        initial_capacity=bloom_config.get('initial_capacity', 100000),
+        error_rate=bloom_config.get('error_rate', 0.001),
+        growth=bloom_config.get('growth', 2),
+        tightening=bloom_config.get('tightening', 0.5),
+        logger=logger
+    )
+    return BloomTieredHashStore(bloom, store, verify=bloom_config.get('verify', True), logger=logger)
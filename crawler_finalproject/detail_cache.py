@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+问题详情缓存
+按question_hash缓存回答数/关注数/浏览数/标签，支持TTL过期和LRU容量上限，持久化到磁盘
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class DetailCache:
+    """持久化的问题详情TTL/LRU缓存"""
+
+    def __init__(self, cache_file: str, ttl_seconds: float = 12 * 3600, max_entries: int = 5000,
+                 logger: Optional[logging.Logger] = None):
+        self.cache_file = cache_file
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, int(max_entries))
+        self.logger = logger or logging.getLogger(__name__)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """从磁盘加载缓存（按最近使用顺序保存）"""
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            now = time.time()
+            for question_hash, entry in entries:
+                if now - entry['fetched_at'] < self.ttl_seconds:
+                    self._entries[question_hash] = entry
+            self._evict()
+        except Exception as e:
+            self.logger.warning(f"加载详情缓存失败，将重新建立: {e}")
+            self._entries = OrderedDict()
+
+    def _evict(self):
+        """超出容量时淘汰最久未使用的条目"""
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._dirty = True
+
+    def get(self, question_hash: str) -> Optional[Dict]:
+        """命中且未过期时返回详情副本，否则返回None"""
+        with self._lock:
+            entry = self._entries.get(question_hash)
+            if entry is not None and time.time() - entry['fetched_at'] < self.ttl_seconds:
+                self._entries.move_to_end(question_hash)
+                self.hits += 1
+                return dict(entry['details'], question_tags=list(entry['details'].get('question_tags', [])))
+            if entry is not None:
+                del self._entries[question_hash]
+                self._dirty = True
+            self.misses += 1
+            return None
+
+    def put(self, question_hash: str, details: Dict):
+        """写入详情"""
+        with self._lock:
+            self._entries[question_hash] = {'fetched_at': time.time(), 'details': details}
+            self._entries.move_to_end(question_hash)
+            self._dirty = True
+            self._evict()
+
+    def fetched_at(self, question_hash: str) -> Optional[float]:
+        """返回上次抓取时间戳（不计入命中统计）"""
+        with self._lock:
+            entry = self._entries.get(question_hash)
+            return entry['fetched_at'] if entry else None
+
+    def save(self):
+        """有变更时原子写回磁盘"""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = list(self._entries.items())
+            self._dirty = False
+        tmp_file = f"{self.cache_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_file, self.cache_file)
+
+    def stats(self) -> Dict:
+        """命中/未命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+                'entries': len(self._entries),
+            }
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+详情刷新规划
+按排名、排名变化和详情新鲜度给热榜项打分，在每次运行的请求数/时间预算内优先刷新价值最高的问题。
+时间预算先按历史单条耗时折算为条数，抓取时再按实际耗时检查，用完后不再发出新的请求
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+from typing import Dict, List, Optional
+
+
+DEFAULT_WEIGHTS = {'rank': 1.0, 'movement': 1.0, 'staleness': 2.0}
+
+
+class DetailRefreshPlanner:
+    """详情刷新规划器：记录上次排名快照和单条抓取耗时，按预算挑选需要刷新的热榜项"""
+
+    def __init__(self, state_file: str, max_requests: int = 20, time_budget: Optional[float] = 60,
+                 movement_threshold: int = 5, max_items: int = 50, weights: Optional[Dict] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.state_file = state_file
+        self.max_requests = max(0, int(max_requests))
+        self.time_budget = time_budget
+        self.movement_threshold = max(1, int(movement_threshold))
+        self.max_items = max(1, int(max_items))
+        self.weights = dict(DEFAULT_WEIGHTS)
+        self.weights.update(weights or {})
+        self.logger = logger or logging.getLogger(__name__)
+        self.previous_ranks: Dict[str, int] = {}
+        # 多热榜爬取时问题上次所在的热榜（排名只在同一热榜内可比）
+        self.previous_lists: Dict[str, Optional[str]] = {}
+        self.seconds_per_item: Optional[float] = None
+        self._deadline: Optional[float] = None
+        self._lock = threading.Lock()
+        self.deadline_skips = 0
+        self._load()
+
+    def _load(self):
+        """加载上次的排名快照和耗时估计"""
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.previous_ranks = state.get('ranks', {})
+            self.previous_lists = state.get('lists', {})
+            self.seconds_per_item = state.get('seconds_per_item')
+        except Exception as e:
+            self.logger.warning(f"加载详情刷新状态失败: {e}")
+
+    def budget(self) -> int:
+        """本次运行最多抓取的详情数：请求数预算与按历史耗时折算的时间预算取较小值"""
+        budget = self.max_requests
+        if self.time_budget and self.seconds_per_item:
+            budget = min(budget, int(self.time_budget / self.seconds_per_item))
+        return max(budget, 0)
+
+    def allow_fetch(self) -> bool:
+        """抓取前调用：本次规划的时间预算已用完时返回False并计入跳过数（可在多个线程中调用）"""
+        if self._deadline is None or time.monotonic() < self._deadline:
+            return True
+        with self._lock:
+            self.deadline_skips += 1
+            if self.deadline_skips == 1:
+                self.logger.warning(f"详情抓取已用完 {self.time_budget} 秒的时间预算，不再发出新的请求")
+        return False
+
+    def _previous_rank(self, item: Dict) -> Optional[int]:
+        """问题上次在同一热榜中的排名；上次不在榜或在其他热榜时返回None"""
+        question_hash = item['question_hash']
+        if self.previous_lists.get(question_hash) != item.get('source_list'):
+            return None
+        return self.previous_ranks.get(question_hash)
+
+    def score(self, item: Dict, fetched_at: Optional[float], ttl_seconds: float, now: float) -> float:
+        """刷新价值：排名越靠前、排名变化越大、详情越旧，分数越高"""
+        rank = item.get('rank', self.max_items)
+        rank_score = max(self.max_items - rank + 1, 0) / self.max_items
+
+        previous_rank = self._previous_rank(item)
+        if previous_rank is None:
+            movement_score = 1.0  # 新上榜（或换了热榜）
+        else:
+            movement_score = min(abs(previous_rank - rank) / self.max_items, 1.0)
+
+        if fetched_at is None:
+            staleness_score = 1.0  # 从未抓取或已过期
+        else:
+            staleness_score = min((now - fetched_at) / max(ttl_seconds, 1), 1.0)
+
+        return (self.weights['rank'] * rank_score
+                + self.weights['movement'] * movement_score
+                + self.weights['staleness'] * staleness_score)
+
+    def _moved(self, item: Dict) -> bool:
+        """排名变化是否超过阈值（换了热榜也视为变化）"""
+        if item['question_hash'] not in self.previous_ranks:
+            return False
+        previous_rank = self._previous_rank(item)
+        return previous_rank is None or abs(previous_rank - item['rank']) >= self.movement_threshold
+
+    def plan(self, items: List[Dict], pending: List[Dict], detail_cache=None) -> List[Dict]:
+        """从全部热榜项中挑选本次需要抓取详情的项
+
+        pending 为缓存缺失或过期的项；已缓存但排名变化超过阈值的项也参与竞争，
+        按分数从高到低取预算内的条数，返回结果按热榜顺序和排名排序（多热榜时不同热榜的同一排名不会混淆）；
+        同时开始计算本次的时间预算
+        """
+        # 热榜项的产出顺序即（热榜, 排名）顺序
+        position = {item['question_hash']: index for index, item in enumerate(items)}
+        pending_hashes = {item['question_hash'] for item in pending}
+        candidates = list(pending) + [item for item in items
+                                      if item['question_hash'] not in pending_hashes and self._moved(item)]
+
+        now = time.time()
+        ttl_seconds = detail_cache.ttl_seconds if detail_cache else 1
+        scored = []
+        for item in candidates:
+            fetched_at = None
+            if detail_cache and item['question_hash'] not in pending_hashes:
+                fetched_at = detail_cache.fetched_at(item['question_hash'])
+            scored.append((self.score(item, fetched_at, ttl_seconds, now), item))
+        scored.sort(key=lambda pair: (-pair[0], pair[1]['rank'], position.get(pair[1]['question_hash'], 0)))
+
+        budget = self.budget()
+        selected = sorted((item for _, item in scored[:budget]),
+                          key=lambda item: position.get(item['question_hash'], 0))
+        self.deadline_skips = 0
+        self._deadline = time.monotonic() + self.time_budget if self.time_budget else None
+        self.logger.info(f"详情刷新规划: 候选 {len(candidates)} 条，预算 {budget} 条，"
+                         f"本次抓取 {len(selected)} 条，跳过 {len(candidates) - len(selected)} 条")
+        return selected
+
+    def record(self, items: List[Dict], fetched: int, elapsed: float):
+        """保存本次排名快照，并用本次抓取耗时更新单条耗时估计"""
+        if fetched > 0:
+            observed = elapsed / fetched
+            if self.seconds_per_item is None:
+                self.seconds_per_item = observed
+            else:
+                self.seconds_per_item = 0.7 * self.seconds_per_item + 0.3 * observed
+        self.previous_ranks = {item['question_hash']: item['rank'] for item in items}
+        self.previous_lists = {item['question_hash']: item.get('source_list') for item in items}
+        self._deadline = None
+
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'ranks': self.previous_ranks, 'lists': self.previous_lists,
+                       'seconds_per_item': self.seconds_per_item,
+                       'updated_at': time.time()}, f, ensure_ascii=False)
+        os.replace(tmp_file, self.state_file)
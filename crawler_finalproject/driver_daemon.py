@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+预热驱动池守护进程
+常驻进程预先启动若干个已加载Cookie的Chrome实例（开启远程调试端口），爬虫通过本地socket借用，
+用 debuggerAddress 直接接管已启动的浏览器，省去每次运行启动Chrome的开销。
+借出的实例用完即回收，守护进程在后台补充新实例，并定期检查空闲实例是否崩溃或过期。
+除ping外的请求须携带守护进程启动时写入数据目录的令牌（文件权限0600），防止本机其他用户借用已登录的浏览器
+"""
+
+import os
+import hmac
+import json
+import time
+import uuid
+import socket
+import secrets
+import threading
+import logging
+import socketserver
+from typing import Callable, Dict, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 47800
+TOKEN_FILE = "driver_daemon.token"
+
+
+def write_token(path: str) -> str:
+    """生成新令牌并写入仅当前用户可读写的文件"""
+    token = secrets.token_hex(16)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(token)
+    os.chmod(path, 0o600)
+    return token
+
+
+def read_token(path: Optional[str]) -> Optional[str]:
+    """读取令牌文件，不存在或不可读时返回None"""
+    if not path:
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def free_port() -> int:
+    """取一个本机空闲端口（用作Chrome远程调试端口）"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((DEFAULT_HOST, 0))
+        return sock.getsockname()[1]
+
+
+class ChromeInstance:
+    """守护进程持有的一个预热浏览器"""
+
+    def __init__(self, driver, debugger_address: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.driver = driver
+        self.debugger_address = debugger_address
+        self.created_at = time.monotonic()
+        self.leased_at: Optional[float] = None
+        self.lease: Optional[str] = None
+
+    def is_alive(self) -> bool:
+        """浏览器是否仍可响应"""
+        try:
+            return self.driver.execute_script("return document.readyState") is not None
+        except WebDriverException:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except WebDriverException:
+            pass
+
+
+def crawler_launcher(crawler, headless: bool = True) -> Callable[[], ChromeInstance]:
+    """用爬虫的Chrome配置启动预热实例：开启远程调试端口并加载Cookie"""
+    def _launch() -> ChromeInstance:
+        port = free_port()
+        driver = crawler._create_driver(extra_arguments=[f'--remote-debugging-port={port}'], headless=headless)
+        if not crawler.load_cookies(driver):
+            driver.quit()
+            raise RuntimeError("无法加载Cookie，请先手动登录")
+        return ChromeInstance(driver, f"{DEFAULT_HOST}:{port}")
+    return _launch
+
+
+class DriverPoolDaemon:
+    """保持size个空闲的预热实例；借出的实例归还后关闭并补充新实例
+
+    token_file 不为空时启动服务前生成令牌，除ping外的请求令牌不符一律拒绝；
+    headless 为预热实例的模式，借用请求指定的模式与之不同时拒绝借出
+    """
+
+    def __init__(self, launcher: Callable[[], ChromeInstance], size: int = 2, host: str = DEFAULT_HOST,
+                 port: int = DEFAULT_PORT, health_interval: float = 30, max_age: float = 3600,
+                 lease_timeout: float = 1800, token_file: Optional[str] = None, headless: Optional[bool] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.launcher = launcher
+        self.size = max(1, int(size))
+        self.host = host
+        self.port = port
+        self.health_interval = health_interval
+        self.max_age = max_age
+        self.lease_timeout = lease_timeout
+        self.token_file = token_file
+        self.token: Optional[str] = None
+        self.headless = headless
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._idle: Dict[str, ChromeInstance] = {}
+        self._leased: Dict[str, ChromeInstance] = {}
+        self.stats = {'launched': 0, 'launch_failures': 0, 'leases': 0, 'crashed': 0, 'expired': 0}
+        self._server: Optional[socketserver.ThreadingTCPServer] = None
+
+    # ---- 实例管理 ----
+
+    def _retire(self, instance: ChromeInstance, reason: str):
+        self.logger.info(f"回收Chrome实例 {instance.id}: {reason}")
+        instance.quit()
+        self._wakeup.set()
+
+    def _check_health(self):
+        """移除崩溃或超过max_age的空闲实例，收回超时未归还的实例"""
+        now = time.monotonic()
+        with self._lock:
+            idle = list(self._idle.values())
+            overdue = [instance for instance in self._leased.values()
+                       if self.lease_timeout and now - instance.leased_at > self.lease_timeout]
+            for instance in overdue:
+                del self._leased[instance.lease]
+        for instance in overdue:
+            self._retire(instance, f"借出超过 {self.lease_timeout:.0f} 秒未归还")
+        for instance in idle:
+            if self.max_age and now - instance.created_at > self.max_age:
+                reason, key = f"已运行超过 {self.max_age:.0f} 秒", 'expired'
+            elif not instance.is_alive():
+                reason, key = "浏览器无响应", 'crashed'
+            else:
+                continue
+            with self._lock:
+                if self._idle.pop(instance.id, None) is None:
+                    # 检查期间已被借出
+                    continue
+                self.stats[key] += 1
+            self._retire(instance, reason)
+
+    def _replenish(self):
+        """启动新实例直到空闲实例数达到size（逐个启动，避免同时拉起多个Chrome抢占CPU）"""
+        while not self._stopped.is_set():
+            with self._lock:
+                if len(self._idle) >= self.size:
+                    return
+            start = time.perf_counter()
+            try:
+                instance = self.launcher()
+            except Exception as e:
+                with self._lock:
+                    self.stats['launch_failures'] += 1
+                self.logger.error(f"预热Chrome实例启动失败: {e}")
+                return
+            with self._lock:
+                self._idle[instance.id] = instance
+                self.stats['launched'] += 1
+                idle = len(self._idle)
+            self.logger.info(f"预热Chrome实例 {instance.id} 已就绪（{instance.debugger_address}），"
+                             f"耗时 {time.perf_counter() - start:.1f} 秒，空闲 {idle}/{self.size}")
+
+    def _maintain(self):
+        """后台线程：补充实例并定期做健康检查（启动失败时按健康检查间隔重试）"""
+        last_check = time.monotonic()
+        while not self._stopped.is_set():
+            self._replenish()
+            self._wakeup.wait(timeout=self.health_interval)
+            self._wakeup.clear()
+            if time.monotonic() - last_check >= self.health_interval:
+                self._check_health()
+                last_check = time.monotonic()
+
+    def acquire(self) -> Optional[ChromeInstance]:
+        """借出一个可响应的空闲实例，没有时返回None"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                _, instance = self._idle.popitem()
+            if instance.is_alive():
+                break
+            with self._lock:
+                self.stats['crashed'] += 1
+            self._retire(instance, "借出前检查发现浏览器无响应")
+        instance.lease = uuid.uuid4().hex
+        instance.leased_at = time.monotonic()
+        with self._lock:
+            self._leased[instance.lease] = instance
+            self.stats['leases'] += 1
+        self._wakeup.set()
+        return instance
+
+    def release(self, lease: str, healthy: bool = True) -> bool:
+        """归还实例（爬虫用过的浏览器状态不确定，一律关闭后补充新实例）"""
+        with self._lock:
+            instance = self._leased.pop(lease, None)
+        if instance is None:
+            return False
+        self._retire(instance, "已归还" if healthy else "爬虫报告实例异常")
+        return True
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {'size': self.size, 'idle': len(self._idle), 'leased': len(self._leased),
+                    'headless': self.headless, **self.stats}
+
+    # ---- socket服务 ----
+
+    def handle(self, request: Dict) -> Dict:
+        """处理一条请求：ping/status、acquire、release、shutdown（ping以外须携带令牌）"""
+        command = request.get('cmd')
+        if command == 'ping':
+            return {'ok': True, **self.status()}
+        if self.token and not hmac.compare_digest(str(request.get('token', '')), self.token):
+            self.logger.warning(f"拒绝未通过令牌验证的请求: {command}")
+            return {'ok': False, 'error': '令牌验证失败'}
+        if command == 'status':
+            return {'ok': True, **self.status()}
+        if command == 'acquire':
+            headless = request.get('headless')
+            if headless is not None and self.headless is not None and bool(headless) != self.headless:
+                self.logger.info(f"借用请求的headless={bool(headless)}与预热实例（headless={self.headless}）不一致，拒绝借出")
+                return {'ok': False, 'error': f'预热实例的headless为{self.headless}，与请求不一致'}
+            instance = self.acquire()
+            if instance is None:
+                return {'ok': False, 'error': '没有空闲的预热实例'}
+            return {'ok': True, 'lease': instance.lease, 'debugger_address': instance.debugger_address}
+        if command == 'release':
+            return {'ok': self.release(request.get('lease', ''), request.get('healthy', True))}
+        if command == 'shutdown':
+            threading.Thread(target=self.stop, daemon=True).start()
+            return {'ok': True}
+        return {'ok': False, 'error': f'未知命令: {command}'}
+
+    def serve_forever(self):
+        """启动后台维护线程并在本机端口上提供服务（阻塞直到stop）"""
+        daemon = self
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        response = daemon.handle(json.loads(line))
+                    except Exception as e:
+                        response = {'ok': False, 'error': str(e)}
+                    self.wfile.write((json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8'))
+
+        if self.token_file:
+            self.token = write_token(self.token_file)
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer((self.host, self.port), _Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._maintain, name='driver-daemon-maintain', daemon=True).start()
+        self.logger.info(f"驱动池守护进程已启动: {self.host}:{self.port}，保持 {self.size} 个预热实例")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        """停止服务并关闭全部实例"""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wakeup.set()
+        if self._server:
+            self._server.shutdown()
+        with self._lock:
+            instances = list(self._idle.values()) + list(self._leased.values())
+            self._idle.clear()
+            self._leased.clear()
+        for instance in instances:
+            instance.quit()
+        if self.token_file and self.token and read_token(self.token_file) == self.token:
+            os.remove(self.token_file)
+        self.logger.info("驱动池守护进程已停止")
+
+
+class DriverDaemonClient:
+    """爬虫端：通过本地socket向守护进程借用/归还预热实例（令牌从token_file读取）"""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, timeout: float = 2.0,
+                 token_file: Optional[str] = None, logger: Optional[logging.Logger] = None):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.token_file = token_file
+        self.logger = logger or logging.getLogger(__name__)
+
+    def request(self, payload: Dict) -> Dict:
+        """发送一条请求并读取响应，连接失败时抛出OSError"""
+        # 守护进程每次启动都会生成新令牌，每次请求时重新读取
+        token = read_token(self.token_file)
+        if token:
+            payload = dict(payload, token=token)
+        with socket.create_connection((self.host, self.port), timeout=self.timeout) as sock:
+            sock.sendall((json.dumps(payload) + '\n').encode('utf-8'))
+            with sock.makefile('rb') as reader:
+                line = reader.readline()
+        if not line:
+            raise ConnectionError("守护进程未返回响应")
+        return json.loads(line)
+
+    def ping(self) -> Optional[Dict]:
+        """守护进程在线时返回其状态，否则返回None"""
+        try:
+            response = self.request({'cmd': 'ping'})
+        except (OSError, ValueError):
+            return None
+        return response if response.get('ok') else None
+
+    def acquire(self, headless: Optional[bool] = None) -> Optional[Dict]:
+        """借用一个实例，返回 {'lease', 'debugger_address'}；守护进程不可用、没有空闲实例或headless不符时返回None"""
+        payload = {'cmd': 'acquire'}
+        if headless is not None:
+            payload['headless'] = bool(headless)
+        try:
+            response = self.request(payload)
+        except (OSError, ValueError):
+            return None
+        if not response.get('ok'):
+            self.logger.info(f"未能从驱动池守护进程借用实例: {response.get('error')}")
+            return None
+        return response
+
+    def release(self, lease: str, healthy: bool = True) -> bool:
+        """归还实例，守护进程不可用时返回False"""
+        try:
+            return bool(self.request({'cmd': 'release', 'lease': lease, 'healthy': healthy}).get('ok'))
+        except (OSError, ValueError):
+            return False
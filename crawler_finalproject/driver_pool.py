@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+WebDriver实例池
+为问题详情页提供多个独立登录的浏览器并发抓取，并按主机限制访问频率
+"""
+
+import os
+import time
+import queue
+import threading
+import logging
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from typing import Callable, Dict, List, Optional
+
+
+class HostPoliteness:
+    """按主机限制并发数和最小请求间隔"""
+
+    def __init__(self, max_concurrent_per_host: int = 2, min_interval: float = 1.0):
+        self.max_concurrent_per_host = max(1, int(max_concurrent_per_host))
+        self.min_interval = max(0.0, float(min_interval))
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+        self._next_slot: Dict[str, float] = {}
+
+    def _semaphore(self, host: str) -> threading.Semaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.Semaphore(self.max_concurrent_per_host)
+            return self._semaphores[host]
+
+    def _reserve(self, host: str) -> float:
+        """预约该主机下一个可用的请求时间点，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+            return slot - now
+
+    @contextmanager
+    def slot(self, url: str):
+        """获取访问指定URL所在主机的许可"""
+        host = urlparse(url).netloc or url
+        semaphore = self._semaphore(host)
+        with semaphore:
+            delay = self._reserve(host)
+            if delay > 0:
+                time.sleep(delay)
+            yield
+
+
+class DriverPool:
+    """有界的WebDriver池，每个实例独立加载Cookie"""
+
+    def __init__(self, driver_factory: Callable, size: Optional[int] = None,
+                 politeness: Optional[HostPoliteness] = None, close_driver: Optional[Callable] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.driver_factory = driver_factory
+        self.close_driver = close_driver
+        self.size = max(1, int(size or min(4, os.cpu_count() or 1)))
+        self.politeness = politeness or HostPoliteness()
+        self.logger = logger or logging.getLogger(__name__)
+        self._drivers = []
+        self._idle = queue.Queue()
+
+    def start(self) -> int:
+        """并发启动所有驱动，返回成功启动的数量"""
+        def _launch(index):
+            try:
+                return self.driver_factory()
+            except Exception as e:
+                self.logger.error(f"驱动池第 {index + 1} 个实例启动失败: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            drivers = list(executor.map(_launch, range(self.size)))
+
+        for driver in drivers:
+            if driver is not None:
+                self._drivers.append(driver)
+                self._idle.put(driver)
+
+        self.logger.info(f"驱动池已就绪: {len(self._drivers)}/{self.size} 个实例")
+        return len(self._drivers)
+
+    def run(self, func: Callable, url: str):
+        """借出一个空闲驱动执行 func(driver, url)（可在多个线程中调用）"""
+        if not self._drivers:
+            raise RuntimeError("驱动池中没有可用实例")
+        driver = self._idle.get()
+        try:
+            with self.politeness.slot(url):
+                return func(driver, url)
+        finally:
+            self._idle.put(driver)
+
+    def map(self, func: Callable, urls: List[str]) -> List:
+        """用池中驱动并发执行 func(driver, url)，结果按输入顺序返回"""
+        if not self._drivers:
+            raise RuntimeError("驱动池中没有可用实例")
+
+        with ThreadPoolExecutor(max_workers=len(self._drivers)) as executor:
+            return list(executor.map(lambda url: self.run(func, url), urls))
+
+    def close(self):
+        """关闭池中所有驱动"""
+        for driver in self._drivers:
+            try:
+                if self.close_driver:
+                    self.close_driver(driver)
+                else:
+                    driver.quit()
+            except Exception as e:
+                self.logger.warning(f"关闭驱动失败: {e}")
+        self._drivers = []
+        self._idle = queue.Queue()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -13,6 +13,11 @@ from typing import Dict, List, Optional, Tuple
 import warnings
 warnings.filterwarnings('ignore')
 
+from raw_storage import is_raw_file, iter_file_records
+from history_loader import load_history, load_observation_records
+from numeric_fields import normalize_frame
+from excerpt_store import strip_excerpts
+
 
 # 设置中文字体和样式
 plt.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'SimHei', 'DejaVu Sans']
@@ -58,32 +63,36 @@ class EnhancedDataVisualizer:
             }
         }
     
-    def load_all_data(self) -> pd.DataFrame:
-        """加载所有历史数据"""
-        all_data = []
+    def load_all_data(self, start_date: Optional[datetime] = None) -> pd.DataFrame:
+        """加载历史数据（已建立SQLite库或Parquet历史存储时只读取start_date之后的数据）"""
+        df = load_history(self.data_dir, start_date=start_date)
+        if df is not None:
+            if df.empty:
+                print("❌ 未找到数据，请先运行爬虫")
+                return df
+            print(f"✅ 从历史存储加载 {len(df)} 条记录")
+            return self._preprocess_data(df)
         
-        if not os.path.exists(self.raw_dir):
-            print("❌ 数据目录不存在，请先运行爬虫")
-            return pd.DataFrame()
+        all_data = []
         
-        json_files = [f for f in os.listdir(self.raw_dir) 
-                     if f.endswith('.json') and 'zhihu_hot' in f]
+        # 快照模式下的记录在观测存储中
+        observations = load_observation_records(self.data_dir, start_date=start_date)
+        json_files = sorted(f for f in os.listdir(self.raw_dir) if is_raw_file(f)) if os.path.exists(self.raw_dir) else []
         
-        if not json_files:
+        if not json_files and not observations:
             print("❌ 未找到数据文件，请先运行爬虫")
             return pd.DataFrame()
         
-        print(f"📂 发现 {len(json_files)} 个数据文件，正在加载...")
+        if json_files:
+            print(f"📂 发现 {len(json_files)} 个数据文件，正在加载...")
+        if observations:
+            print(f"📂 快照观测 {len(observations)} 条")
+        all_data.extend(observations)
         
         for filename in json_files:
             filepath = os.path.join(self.raw_dir, filename)
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        all_data.extend(data)
-                    else:
-                        all_data.append(data)
+                all_data.extend(iter_file_records(filepath))
             except Exception as e:
                 print(f"⚠️  加载文件失败 {filename}: {e}")
         
@@ -106,11 +115,13 @@ class EnhancedDataVisualizer:
         if 'date' in df.columns:
             df['date'] = pd.to_datetime(df['date'], errors='coerce')
         
-        # 数值转换
-        numeric_columns = ['rank', 'answer_count', 'follower_count', 'view_count']
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+        # 数值转换（热度和计数在入库时已数值化，这里只向量化处理旧数据中的文本）
+        if 'rank' in df.columns:
+            df['rank'] = pd.to_numeric(df['rank'], errors='coerce')
+        normalize_frame(df)
+        
+        # 旧数据标题中附带的摘要
+        strip_excerpts(df)
         
         # 标签处理
         if 'question_tags' in df.columns:
@@ -126,14 +137,14 @@ class EnhancedDataVisualizer:
     
     def create_comprehensive_dashboard(self, days: int = 7) -> str:
         """创建综合数据仪表板"""
-        df = self.load_all_data()
+        cutoff_date = datetime.now() - timedelta(days=days)
+        df = self.load_all_data(start_date=cutoff_date)
         
         if df.empty:
             print("❌ 没有数据可视化")
             return None
         
         # 过滤数据
-        cutoff_date = datetime.now() - timedelta(days=days)
         if 'crawl_time' in df.columns:
             recent_df = df[df['crawl_time'] >= cutoff_date].copy()
         else:
@@ -487,14 +498,14 @@ class EnhancedDataVisualizer:
     
     def generate_trend_charts(self, days: int = 7):
         """生成趋势图表"""
-        df = self.load_all_data()
+        cutoff_date = datetime.now() - timedelta(days=days)
+        df = self.load_all_data(start_date=cutoff_date)
         
         if df.empty:
             print("没有数据可用于生成图表")
             return
         
         # 过滤数据
-        cutoff_date = datetime.now() - timedelta(days=days)
         if 'crawl_time' in df.columns:
             recent_df = df[df['crawl_time'] >= cutoff_date]
         else:
@@ -612,4 +623,4 @@ class EnhancedDataVisualizer:
         plt.show()
         
         print(f"图表已保存到: {filename}")
-        return filename
\ No newline at end of file
+        return filename
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+问题摘要存储
+热榜标题元素的文本是 "标题\\n问题摘要"，入库时拆成 title 和 excerpt：
+记录中只保留标题，摘要按问题追加写入 excerpts.jsonl 保存一次，需要时再按question_hash读取
+"""
+
+import os
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+
+EXCERPT_FILE = "excerpts.jsonl"
+
+
+def split_title(text: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """把 "标题\\n摘要" 拆成 (标题, 摘要)，没有摘要时摘要为None"""
+    if not isinstance(text, str):
+        return text, None
+    lines = [line.strip() for line in text.strip().split('\n')]
+    excerpt = ' '.join(line for line in lines[1:] if line)
+    return lines[0], excerpt or None
+
+
+def strip_excerpts(df: pd.DataFrame) -> pd.DataFrame:
+    """向量化去掉旧数据标题中附带的摘要（原地修改并返回）"""
+    if 'title' in df.columns and not pd.api.types.is_numeric_dtype(df['title']):
+        df['title'] = df['title'].str.strip().str.split('\n', n=1).str[0].str.strip()
+    return df
+
+
+class ExcerptStore:
+    """按question_hash追加保存的摘要，内存中只保留 哈希 -> 文件偏移 的索引"""
+
+    def __init__(self, data_dir: str = "data", logger: Optional[logging.Logger] = None):
+        self.excerpt_file = os.path.join(data_dir, EXCERPT_FILE)
+        self.logger = logger or logging.getLogger(__name__)
+        self._index: Dict[str, int] = {}
+        self._indexed_size = 0
+
+    def _load_index(self) -> Dict[str, int]:
+        """增量扫描摘要文件中新追加的行（其他进程也可能在追加），同一问题以最后一行为准"""
+        try:
+            size = os.path.getsize(self.excerpt_file)
+        except OSError:
+            return self._index
+        if size > self._indexed_size:
+            with open(self.excerpt_file, 'rb') as f:
+                f.seek(self._indexed_size)
+                offset = self._indexed_size
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        # 正在写入的行，下次再读
+                        break
+                    try:
+                        self._index[json.loads(line)['question_hash']] = offset
+                    except (ValueError, KeyError):
+                        pass
+                    offset += len(line)
+                self._indexed_size = offset
+        return self._index
+
+    def _read_at(self, f, offset: int) -> Optional[str]:
+        f.seek(offset)
+        try:
+            return json.loads(f.readline()).get('excerpt')
+        except ValueError:
+            return None
+
+    def __contains__(self, question_hash: str) -> bool:
+        return question_hash in self._load_index()
+
+    def get(self, question_hash: str) -> Optional[str]:
+        """读取一个问题的摘要"""
+        return self.get_many([question_hash]).get(question_hash)
+
+    def get_many(self, question_hashes: Iterable[str]) -> Dict[str, str]:
+        """批量读取摘要，只返回存在的问题"""
+        index = self._load_index()
+        offsets = [(question_hash, index[question_hash]) for question_hash in question_hashes
+                   if question_hash in index]
+        if not offsets:
+            return {}
+        excerpts = {}
+        with open(self.excerpt_file, 'rb') as f:
+            for question_hash, offset in sorted(offsets, key=lambda pair: pair[1]):
+                excerpt = self._read_at(f, offset)
+                if excerpt:
+                    excerpts[question_hash] = excerpt
+        return excerpts
+
+    def put_many(self, items: List[Dict]) -> int:
+        """从一批热榜项中取出摘要并保存，返回写入条数
+
+        原地删除excerpt字段（旧数据的标题同时拆分）；只追加新问题或摘要有变化的问题
+        """
+        excerpts = {}
+        for item in items:
+            excerpt = item.pop('excerpt', None)
+            if excerpt is None and isinstance(item.get('title'), str) and '\n' in item['title']:
+                item['title'], excerpt = split_title(item['title'])
+            if excerpt and item.get('question_hash'):
+                excerpts[item['question_hash']] = excerpt
+        if not excerpts:
+            return 0
+
+        existing = self.get_many(excerpts)
+        changed = [(question_hash, excerpt) for question_hash, excerpt in excerpts.items()
+                   if existing.get(question_hash) != excerpt]
+        if not changed:
+            return 0
+
+        with open(self.excerpt_file, 'ab') as f:
+            f.write(''.join(json.dumps({'question_hash': question_hash, 'excerpt': excerpt}, ensure_ascii=False) + '\n'
+                            for question_hash, excerpt in changed).encode('utf-8'))
+        self._load_index()
+        return len(changed)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+历史数据加载
+各加载器共用：依次尝试SQLite库和Parquet历史存储，按时间窗口和列读取；都未建立时由调用方回退到原始文件，
+并用load_observation_records补上快照模式下只写入观测存储的记录
+"""
+
+import os
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+from sqlite_store import SQLiteHotListStore, SQLITE_DB_FILE
+from parquet_store import ParquetHistoryStore
+from observation_store import ObservationStore
+
+
+def _observation_file_date(filename: str) -> Optional[datetime]:
+    """从观测文件名提取日期: obs_20240101_123456.json"""
+    try:
+        return datetime.strptime(filename.split('_')[1][:8], '%Y%m%d')
+    except (IndexError, ValueError):
+        return None
+
+
+def load_observation_records(data_dir: str, start_date: Union[str, datetime, None] = None,
+                             end_date: Union[str, datetime, None] = None,
+                             logger: Optional[logging.Logger] = None) -> List[Dict]:
+    """快照模式写入的观测（关联问题维度后与原始热榜数据结构相同），可按文件日期过滤"""
+    store = ObservationStore(data_dir, logger)
+    start = pd.Timestamp(start_date).normalize() if start_date is not None else None
+    end = pd.Timestamp(end_date).normalize() if end_date is not None else None
+    filenames = []
+    for filename in store.observation_files():
+        file_date = _observation_file_date(filename)
+        if (start is not None or end is not None) and file_date is None:
+            continue
+        if (start is not None and file_date < start) or (end is not None and file_date > end):
+            continue
+        filenames.append(filename)
+    return store.load_records(filenames) if filenames else []
+
+
+def load_history(data_dir: str, start_date: Union[str, datetime, None] = None,
+                 end_date: Union[str, datetime, None] = None, columns: Optional[List[str]] = None,
+                 logger: Optional[logging.Logger] = None) -> Optional[pd.DataFrame]:
+    """从已建立的历史存储读取数据，SQLite和Parquet都不存在时返回None"""
+    sqlite_store = SQLiteHotListStore(os.path.join(data_dir, SQLITE_DB_FILE), logger)
+    if sqlite_store.exists:
+        return sqlite_store.query(start_time=start_date, end_date=end_date, columns=columns)
+
+    history = ParquetHistoryStore(data_dir, logger)
+    if history.ready:
+        return history.load(start_date=start_date, end_date=end_date, columns=columns)
+    return None
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+HTTP抓取后端
+复用已保存的Cookie，通过连接池直接请求并解析热榜页和问题页，不启动浏览器
+"""
+
+import os
+import re
+import pickle
+import logging
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+
+from numeric_fields import parse_count, VIEW_COUNT_PATTERN
+from excerpt_store import split_title
+
+
+ZHIHU_BASE_URL = "https://www.zhihu.com"
+DEFAULT_USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                      "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+# 与Selenium路径保持一致的选择器
+HOT_ITEM_SELECTORS = ["div.HotItem", "section.HotItem", "[class*='HotItem']", "div[data-za-detail-view-id]"]
+TITLE_SELECTOR = "h2, [class*='title'], a"
+HEAT_SELECTOR = "[class*='metrics'], [class*='hot'], [class*='HotItem-metrics']"
+
+
+def load_pickled_cookies(cookie_file: str) -> List[Dict]:
+    """读取Selenium保存的Cookie列表"""
+    with open(cookie_file, 'rb') as f:
+        return pickle.load(f)
+
+
+def resolve_url(base_url: str, url: str) -> str:
+    """把知乎链接映射到指定站点根地址（便于指向本地替身服务器）"""
+    parsed = urlparse(url)
+    path = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+    return urljoin(base_url.rstrip('/') + '/', path.lstrip('/'))
+
+
+def _element_text(element) -> str:
+    """近似浏览器innerText：块级子元素之间用换行分隔"""
+    return element.get_text("\n", strip=True) if element is not None else ""
+
+
+def parse_hot_list(html: str, max_items: int = 50) -> List[Dict]:
+    """解析热榜页HTML，返回 rank/title/excerpt/url/heat_value 列表"""
+    soup = BeautifulSoup(html, "lxml")
+    entries = []
+
+    elements = []
+    for selector in HOT_ITEM_SELECTORS:
+        elements = soup.select(selector)
+        if elements:
+            break
+
+    if elements:
+        for idx, element in enumerate(elements[:max_items], 1):
+            title_elem = element.select_one(TITLE_SELECTOR)
+            link_elem = element.select_one("a[href]")
+            if title_elem is None or link_elem is None:
+                continue
+            heat_elem = element.select_one(HEAT_SELECTOR)
+            title, excerpt = split_title(_element_text(title_elem))
+            entries.append({
+                'rank': idx,
+                'title': title,
+                'excerpt': excerpt,
+                'url': urljoin(ZHIHU_BASE_URL, link_elem['href']),
+                'heat_value': _element_text(heat_elem) or None,
+            })
+    else:
+        # 备用方案：通过问题链接查找
+        links = [link for link in soup.find_all("a", href=True) if "/question/" in link['href']]
+        for idx, link in enumerate(links[:max_items], 1):
+            title, excerpt = split_title(_element_text(link))
+            entries.append({
+                'rank': idx,
+                'title': title,
+                'excerpt': excerpt,
+                'url': urljoin(ZHIHU_BASE_URL, link['href']),
+                'heat_value': None,
+            })
+
+    return [entry for entry in entries if entry['title'] and entry['url']]
+
+
+def parse_question_page(html: str) -> Dict:
+    """解析问题页HTML，返回与extract_detailed_info相同结构的详细信息"""
+    details = {
+        'answer_count': 0,
+        'follower_count': 0,
+        'view_count': 0,
+        'question_tags': [],
+        'created_time': None
+    }
+    soup = BeautifulSoup(html, "lxml")
+
+    # 回答数
+    answer_elem = soup.select_one(
+        "[class*='NumberBoard-itemValue'], [class*='List-headerText'], .NumberBoard-value")
+    if answer_elem is not None:
+        answer_count = parse_count(_element_text(answer_elem))
+        if answer_count is not None:
+            details['answer_count'] = answer_count
+
+    # 关注数
+    for elem in soup.select("[class*='NumberBoard-itemValue'], .NumberBoard-value"):
+        if elem.parent is not None and '关注' in _element_text(elem.parent):
+            follower_count = parse_count(_element_text(elem))
+            if follower_count is not None:
+                details['follower_count'] = follower_count
+                break
+
+    # 浏览数
+    view_elem = soup.select_one("[class*='ContentItem-meta'], [class*='QuestionHeader-detail']")
+    if view_elem is not None:
+        view_match = re.search(VIEW_COUNT_PATTERN, _element_text(view_elem))
+        if view_match:
+            details['view_count'] = parse_count(view_match.group(1))
+
+    # 标签
+    for tag_elem in soup.select(".QuestionHeader-tags .Tag, [class*='QuestionTopic'] .Tag"):
+        tag_text = _element_text(tag_elem)
+        if tag_text and tag_text not in details['question_tags']:
+            details['question_tags'].append(tag_text)
+
+    return details
+
+
+class HttpHotListFetcher:
+    """基于requests连接池的热榜抓取器"""
+
+    def __init__(self, cookie_file: str, base_url: str = ZHIHU_BASE_URL, target_url: Optional[str] = None,
+                 user_agent: str = DEFAULT_USER_AGENT, pool_size: int = 10, timeout: float = 10,
+                 logger: Optional[logging.Logger] = None):
+        self.cookie_file = cookie_file
+        self.base_url = base_url.rstrip('/')
+        self.target_url = target_url or f"{self.base_url}/hot"
+        self.timeout = timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self.bytes_received = 0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            'User-Agent': user_agent,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'zh-CN,zh;q=0.9',
+        })
+
+    def load_cookies(self) -> bool:
+        """从Selenium保存的Cookie文件加载到会话"""
+        if not os.path.exists(self.cookie_file):
+            return False
+        try:
+            cookies = load_pickled_cookies(self.cookie_file)
+            for cookie in cookies:
+                self.session.cookies.set(cookie['name'], cookie['value'],
+                                         domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+            self.logger.info(f"HTTP后端已加载 {len(cookies)} 个Cookie")
+            return True
+        except Exception as e:
+            self.logger.error(f"HTTP后端加载Cookie失败: {e}")
+            return False
+
+    def get(self, url: str) -> requests.Response:
+        """GET请求，失败时抛出异常"""
+        response = self.session.get(resolve_url(self.base_url, url), timeout=self.timeout)
+        self.bytes_received += len(response.content)
+        response.raise_for_status()
+        return response
+
+    def fetch_hot_list(self, max_items: int = 50, url: Optional[str] = None) -> List[Dict]:
+        """抓取并解析热榜（默认target_url）；被重定向到登录页时抛出PermissionError"""
+        response = self.get(url or self.target_url)
+        if "signin" in response.url or "login" in response.url:
+            raise PermissionError("Cookie已失效，请求被重定向到登录页")
+        return parse_hot_list(response.text, max_items)
+
+    def fetch_question_details(self, url: str) -> Dict:
+        """抓取并解析问题详情页"""
+        return parse_question_page(self.get(url).text)
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
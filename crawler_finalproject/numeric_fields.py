@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+热度与计数字段的数值化
+把 "135 万热度"、"1.2 万"、"1,234"、"3 亿" 这类文本统一转换为整数，
+入库前对一批记录按列向量化处理，分析时无需再逐行解析
+"""
+
+import re
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+
+# 数字（可带千分位和小数）+ 可选的万/亿单位
+COUNT_PATTERN = r'(\d+(?:,\d{3})*(?:\.\d+)?)\s*([万亿]?)'
+UNIT_MULTIPLIERS = {'': 1, '万': 10_000, '亿': 100_000_000}
+
+# 问题页 "1.2 万 次浏览" 中的浏览数
+VIEW_COUNT_PATTERN = r'(\d+(?:,\d{3})*(?:\.\d+)?\s*[万亿]?)\s*次浏览'
+
+# 需要数值化的字段
+COUNT_FIELDS = ['heat_value', 'answer_count', 'follower_count', 'view_count']
+
+# 保留原始热度文本时使用的字段
+HEAT_TEXT_FIELD = 'heat_text'
+
+_COUNT_RE = re.compile(COUNT_PATTERN)
+
+
+def parse_count(value) -> Optional[int]:
+    """解析单个计数值，无法解析时返回None"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value) if value == value else None
+    match = _COUNT_RE.search(str(value))
+    if not match:
+        return None
+    return round(float(match.group(1).replace(',', '')) * UNIT_MULTIPLIERS[match.group(2)])
+
+
+def to_count_series(values: pd.Series) -> pd.Series:
+    """向量化解析一列计数值
+
+    返回取整后的float64列（缺失为NaN，与从SQLite/Parquet读取的可空计数列类型一致）
+    """
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.astype('float64').round()
+    parts = values.astype('string').str.extract(COUNT_PATTERN)
+    numbers = parts[0].str.replace(',', '', regex=False).astype('Float64')
+    multipliers = parts[1].map(UNIT_MULTIPLIERS).astype('Float64')
+    return (numbers * multipliers).round().astype('float64')
+
+
+def normalize_frame(df: pd.DataFrame, keep_raw_text: bool = False) -> pd.DataFrame:
+    """把DataFrame中的热度和计数列转换为取整后的数值（原地修改并返回）"""
+    if keep_raw_text and 'heat_value' in df.columns and not pd.api.types.is_numeric_dtype(df['heat_value']):
+        heat_text = df['heat_value'].where(df['heat_value'].map(type) == str)
+        if HEAT_TEXT_FIELD in df.columns:
+            heat_text = heat_text.fillna(df[HEAT_TEXT_FIELD])
+        df[HEAT_TEXT_FIELD] = heat_text
+    for field in COUNT_FIELDS:
+        if field in df.columns:
+            df[field] = to_count_series(df[field])
+    return df
+
+
+def normalize_items(items: List[Dict], keep_raw_text: bool = False) -> List[Dict]:
+    """入库前数值化一批热榜项（原地更新），keep_raw_text为True时把原始热度文本保存到heat_text"""
+    if not items:
+        return items
+    fields = [field for field in COUNT_FIELDS if any(field in item for item in items)]
+    if not fields:
+        return items
+    df = normalize_frame(pd.DataFrame([{field: item.get(field) for field in fields} for item in items],
+                                      dtype=object), keep_raw_text)
+    for column in df.columns:
+        values = [None if pd.isna(value) else (int(value) if column in COUNT_FIELDS else value)
+                  for value in df[column].tolist()]
+        for item, value in zip(items, values):
+            if column in item or value is not None:
+                item[column] = value
+    return items
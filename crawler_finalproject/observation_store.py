@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+观测快照存储
+每次爬取把每个热榜项记录为轻量观测（crawl_id, rank, question_hash, heat），
+标题、链接、标签等问题属性只在问题维度表中保存一次
+"""
+
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from numeric_fields import HEAT_TEXT_FIELD
+
+
+# 每次观测记录的字段（随时间变化的量）
+OBSERVATION_FIELDS = ['rank', 'question_hash', 'heat_value', 'answer_count', 'follower_count', 'view_count']
+
+# 出现时才记录的观测字段（原始热度文本、多热榜爬取时的来源热榜）
+OPTIONAL_OBSERVATION_FIELDS = [HEAT_TEXT_FIELD, 'source_list']
+
+# 问题维度表字段（基本不变的属性）
+QUESTION_FIELDS = ['question_hash', 'title', 'url', 'question_tags', 'created_time', 'first_seen']
+
+
+class ObservationStore:
+    """观测快照+问题维度表"""
+
+    def __init__(self, data_dir: str = "data", logger: Optional[logging.Logger] = None):
+        self.observation_dir = os.path.join(data_dir, "observations")
+        self.question_file = os.path.join(data_dir, "questions.jsonl")
+        self.logger = logger or logging.getLogger(__name__)
+        self._question_index: Optional[Dict[str, bool]] = None
+
+    def _load_question_index(self) -> Dict[str, bool]:
+        """问题哈希 -> 维度行是否已包含标签"""
+        if self._question_index is None:
+            self._question_index = {
+                question_hash: bool(row.get('question_tags'))
+                for question_hash, row in self.load_questions().items()
+            }
+        return self._question_index
+
+    def write(self, items: List[Dict], crawl_id: Optional[str] = None) -> str:
+        """写入一次爬取的观测，并把新问题（或新获得标签的问题）追加到维度表，返回观测文件路径
+
+        crawl_id 为本次运行的id（与运行日志、指标和SQLite记录一致），未指定时取当前时间
+        """
+        os.makedirs(self.observation_dir, exist_ok=True)
+        now = datetime.now()
+        given_id = crawl_id
+        crawl_id = crawl_id or now.strftime('%Y%m%d_%H%M%S')
+        crawl_time = items[0].get('crawl_time') if items else now.strftime('%Y-%m-%d %H:%M:%S')
+
+        # 维度表：只追加首次出现、或首次拿到标签的问题
+        index = self._load_question_index()
+        new_rows = []
+        for item in items:
+            has_tags = bool(item.get('question_tags'))
+            known = index.get(item['question_hash'])
+            if known is None or (has_tags and not known):
+                row = {field: item.get(field) for field in QUESTION_FIELDS}
+                row['first_seen'] = item.get('crawl_time', crawl_time)
+                new_rows.append(row)
+                index[item['question_hash']] = has_tags
+        if new_rows:
+            with open(self.question_file, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in new_rows))
+
+        # 观测：按列名+行数组紧凑保存（文件已存在时追加序号）
+        filepath = os.path.join(self.observation_dir, f"obs_{crawl_id}.json")
+        suffix = 1
+        while os.path.exists(filepath):
+            filepath = os.path.join(self.observation_dir, f"obs_{crawl_id}_{suffix}.json")
+            suffix += 1
+        if given_id is None:
+            # 按时间生成的id在同一秒内多次爬取时以带序号的文件名区分
+            crawl_id = os.path.basename(filepath)[4:-5]
+        columns = OBSERVATION_FIELDS + [field for field in OPTIONAL_OBSERVATION_FIELDS
+                                        if any(field in item for item in items)]
+        payload = {
+            'crawl_id': crawl_id,
+            'crawl_time': crawl_time,
+            'columns': columns,
+            'rows': [[item.get(field) for field in columns] for item in items],
+        }
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+
+        self.logger.info(f"已记录 {len(items)} 条观测（crawl_id={crawl_id}），新增问题 {len(new_rows)} 个")
+        return filepath
+
+    def load_questions(self) -> Dict[str, Dict]:
+        """读取问题维度表，同一问题以最后一行为准"""
+        questions = {}
+        if not os.path.exists(self.question_file):
+            return questions
+        with open(self.question_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                previous = questions.get(row['question_hash'], {})
+                row['first_seen'] = previous.get('first_seen', row.get('first_seen'))
+                questions[row['question_hash']] = row
+        return questions
+
+    def observation_files(self) -> List[str]:
+        """全部观测文件名（按时间排序）"""
+        if not os.path.exists(self.observation_dir):
+            return []
+        return sorted(filename for filename in os.listdir(self.observation_dir)
+                      if filename.startswith('obs_') and filename.endswith('.json'))
+
+    def load_observations(self, filenames: Optional[List[str]] = None) -> List[Dict]:
+        """读取观测（默认全部文件），每条带 crawl_id/crawl_time/date"""
+        observations = []
+        for filename in (self.observation_files() if filenames is None else filenames):
+            try:
+                with open(os.path.join(self.observation_dir, filename), 'r', encoding='utf-8') as f:
+                    payload = json.load(f)
+            except Exception as e:
+                self.logger.warning(f"加载观测文件失败 {filename}: {e}")
+                continue
+            columns = payload['columns']
+            for values in payload['rows']:
+                observation = dict(zip(columns, values))
+                observation['crawl_id'] = payload['crawl_id']
+                observation['crawl_time'] = payload['crawl_time']
+                observation['date'] = payload['crawl_time'][:10]
+                observations.append(observation)
+        return observations
+
+    def load_records(self, filenames: Optional[List[str]] = None) -> List[Dict]:
+        """观测关联问题维度后得到与原始热榜数据相同结构的记录"""
+        observations = self.load_observations(filenames)
+        if not observations:
+            return []
+        questions = self.load_questions()
+        records = []
+        for observation in observations:
+            question = questions.get(observation['question_hash'], {})
+            record = {field: question.get(field) for field in QUESTION_FIELDS if field != 'first_seen'}
+            record.update({key: value for key, value in observation.items() if value is not None})
+            records.append(record)
+        return records
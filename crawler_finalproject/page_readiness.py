@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+页面就绪检测
+用具体的DOM条件代替固定的time.sleep，并记录每次等待的实际耗时。
+不使用网络空闲条件：知乎页面的统计上报、长轮询和懒加载请求会持续发出，网络空闲往往要等到超时才成立，
+而每个等待点需要的内容（热榜项、数据面板）都能直接用DOM判断，且一定早于网络空闲出现
+"""
+
+import time
+import threading
+import logging
+from typing import Callable, Dict, List, Optional
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+
+# 热榜容器已填充：存在热榜项或问题链接
+HOT_LIST_READY_JS = """
+return document.querySelectorAll("div.HotItem, section.HotItem, [class*='HotItem']").length
+    || document.querySelectorAll("a[href*='/question/']").length;
+"""
+
+# 问题页数据面板已渲染
+NUMBER_BOARD_READY_JS = """
+var values = document.querySelectorAll("[class*='NumberBoard-itemValue'], .NumberBoard-value");
+for (var i = 0; i < values.length; i++) {
+    if (values[i].textContent.trim()) { return true; }
+}
+return false;
+"""
+
+
+class PageReadiness:
+    """基于DOM条件的页面就绪等待器"""
+
+    DEFAULT_TIMEOUTS = {
+        'document': 10,
+        'login': 10,
+        'hot_list': 20,
+        'number_board': 10,
+    }
+
+    def __init__(self, config: Optional[Dict] = None, logger: Optional[logging.Logger] = None):
+        config = config or {}
+        self.timeouts = dict(self.DEFAULT_TIMEOUTS)
+        self.timeouts.update(config.get('timeouts', {}) or {})
+        self.poll_interval = config.get('poll_interval', 0.1)
+        self.logger = logger or logging.getLogger(__name__)
+        self.timings: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def wait(self, driver, condition: str, predicate: Callable, timeout: Optional[float] = None) -> bool:
+        """等待条件满足，返回是否在超时前满足；耗时记录到timings"""
+        timeout = self.timeouts.get(condition, 10) if timeout is None else timeout
+        start = time.perf_counter()
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=self.poll_interval).until(predicate)
+            ok = True
+        except TimeoutException:
+            ok = False
+            self.logger.warning(f"等待条件 '{condition}' 超时（{timeout}秒）")
+        except WebDriverException as e:
+            ok = False
+            self.logger.warning(f"等待条件 '{condition}' 出错: {e}")
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.timings.append({'condition': condition, 'seconds': round(elapsed, 3), 'ok': ok})
+        self.logger.debug(f"就绪条件 '{condition}' 耗时 {elapsed:.2f} 秒 ({'满足' if ok else '未满足'})")
+        return ok
+
+    def wait_for_document(self, driver) -> bool:
+        """等待document.readyState完成"""
+        return self.wait(driver, 'document',
+                         lambda d: d.execute_script("return document.readyState") == "complete")
+
+    def wait_for_login_resolved(self, driver) -> bool:
+        """等待热榜页要么被重定向到登录页，要么热榜内容出现"""
+        def _resolved(d):
+            url = d.current_url
+            return "signin" in url or "login" in url or bool(d.execute_script(HOT_LIST_READY_JS))
+        return self.wait(driver, 'login', _resolved)
+
+    def wait_for_hot_list(self, driver) -> bool:
+        """等待热榜容器填充"""
+        return self.wait(driver, 'hot_list', lambda d: bool(d.execute_script(HOT_LIST_READY_JS)))
+
+    def wait_for_number_board(self, driver) -> bool:
+        """等待问题页NumberBoard渲染"""
+        return self.wait(driver, 'number_board', lambda d: bool(d.execute_script(NUMBER_BOARD_READY_JS)))
+
+    def summary(self) -> Dict[str, Dict]:
+        """按条件汇总等待次数、总耗时、最大耗时和超时次数"""
+        result = {}
+        with self._lock:
+            timings = list(self.timings)
+        for timing in timings:
+            stats = result.setdefault(timing['condition'],
+                                      {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0, 'timeouts': 0})
+            stats['count'] += 1
+            stats['total_seconds'] = round(stats['total_seconds'] + timing['seconds'], 3)
+            stats['max_seconds'] = max(stats['max_seconds'], timing['seconds'])
+            if not timing['ok']:
+                stats['timeouts'] += 1
+        return result
+
+    def reset(self):
+        """清空已记录的耗时"""
+        with self._lock:
+            self.timings = []
@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+按日期分区的Parquet历史存储
+压缩任务把原始数据文件（旧版JSON、NDJSON分段、快照观测）折叠进 history/date=YYYY-MM-DD/ 分区，
+加载时只读取需要的列和日期分区；尚未折叠的新文件在加载时一并读取
+"""
+
+import os
+import json
+import shutil
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+from raw_storage import is_raw_file, raw_file_date, iter_file_records
+from observation_store import ObservationStore
+from numeric_fields import to_count_series
+from excerpt_store import ExcerptStore, strip_excerpts
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+# 分区内的列（date为分区键，不写入文件）
+INT_COLUMNS = ['heat_value', 'answer_count', 'follower_count', 'view_count']
+STRING_COLUMNS = ['title', 'url', 'question_hash', 'heat_text', 'created_time', 'crawl_id', 'source_list']
+
+# 分区结构版本（记录在_sources.json中）；版本2起热度为整数列，版本3起标题不含摘要，版本4增加source_list列。
+# 版本不一致时压缩任务重建全部分区
+HISTORY_SCHEMA_VERSION = 4
+SCHEMA_KEY = '_schema_version'
+
+
+def _history_schema():
+    return pa.schema([
+        ('crawl_time', pa.timestamp('s')),
+        ('rank', pa.int32()),
+        ('title', pa.string()),
+        ('url', pa.string()),
+        ('question_hash', pa.string()),
+        ('heat_value', pa.int64()),
+        ('heat_text', pa.string()),
+        ('answer_count', pa.int64()),
+        ('follower_count', pa.int64()),
+        ('view_count', pa.int64()),
+        ('question_tags', pa.list_(pa.string())),
+        ('created_time', pa.string()),
+        ('crawl_id', pa.string()),
+        ('source_list', pa.string()),
+    ])
+
+
+def _date_str(value: Union[str, datetime, None]) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    return str(value)[:10]
+
+
+class ParquetHistoryStore:
+    """Parquet历史存储：分区压缩与按列/分区加载"""
+
+    def __init__(self, data_dir: str = "data", logger: Optional[logging.Logger] = None):
+        self.data_dir = data_dir
+        self.raw_dir = os.path.join(data_dir, "raw")
+        self.history_dir = os.path.join(data_dir, "history")
+        self.state_file = os.path.join(self.history_dir, "_sources.json")
+        self.logger = logger or logging.getLogger(__name__)
+        self.observations = ObservationStore(data_dir, self.logger)
+        self.excerpts = ExcerptStore(data_dir, self.logger)
+
+    @property
+    def available(self) -> bool:
+        """已安装pyarrow"""
+        return pa is not None
+
+    @property
+    def ready(self) -> bool:
+        """可用且已按当前分区结构执行过压缩"""
+        return self.available and self._load_state().get(SCHEMA_KEY) == HISTORY_SCHEMA_VERSION
+
+    def _load_state(self) -> Dict:
+        if not os.path.exists(self.state_file):
+            return {}
+        with open(self.state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_state(self, state: Dict):
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_file, self.state_file)
+
+    def _sources(self) -> Dict[str, Dict]:
+        """全部源文件: 键 -> {day, signature}"""
+        sources = {}
+        if os.path.exists(self.raw_dir):
+            for filename in os.listdir(self.raw_dir):
+                file_date = raw_file_date(filename) if is_raw_file(filename) else None
+                if file_date is None:
+                    continue
+                stat = os.stat(os.path.join(self.raw_dir, filename))
+                sources[f"raw/{filename}"] = {'day': file_date.strftime('%Y-%m-%d'),
+                                              'signature': [stat.st_size, stat.st_mtime_ns]}
+        for filename in self.observations.observation_files():
+            try:
+                day = datetime.strptime(filename[4:12], '%Y%m%d').strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+            stat = os.stat(os.path.join(self.observations.observation_dir, filename))
+            sources[f"observations/{filename}"] = {'day': day, 'signature': [stat.st_size, stat.st_mtime_ns]}
+        return sources
+
+    def _read_sources(self, keys: List[str]) -> List[Dict]:
+        """读取源文件中的记录"""
+        records = []
+        observation_files = []
+        for key in sorted(keys):
+            kind, filename = key.split('/', 1)
+            if kind == 'observations':
+                observation_files.append(filename)
+                continue
+            try:
+                records.extend(iter_file_records(os.path.join(self.raw_dir, filename)))
+            except Exception as e:
+                self.logger.warning(f"读取原始数据失败 {filename}: {e}")
+        if observation_files:
+            records.extend(self.observations.load_records(observation_files))
+        return records
+
+    @staticmethod
+    def _normalize(records: List[Dict]) -> pd.DataFrame:
+        """把记录转换为带类型的DataFrame（含字符串date列）"""
+        df = pd.DataFrame(records)
+        for column in ['crawl_time', 'rank', 'question_tags'] + INT_COLUMNS + STRING_COLUMNS:
+            if column not in df.columns:
+                df[column] = None
+        df['crawl_time'] = pd.to_datetime(df['crawl_time'], errors='coerce')
+        if 'date' not in df.columns:
+            df['date'] = None
+        df['date'] = df['date'].where(df['date'].notna(), df['crawl_time'].dt.strftime('%Y-%m-%d'))
+        df['date'] = df['date'].astype(str).str[:10]
+        df['rank'] = pd.to_numeric(df['rank'], errors='coerce').fillna(0).astype('int32')
+        for column in INT_COLUMNS:
+            df[column] = to_count_series(df[column])
+        for column in STRING_COLUMNS:
+            df[column] = df[column].apply(lambda value: None if value is None or value != value else str(value))
+        df['question_tags'] = df['question_tags'].apply(
+            lambda tags: [str(tag) for tag in tags] if isinstance(tags, (list, tuple)) else None)
+        return strip_excerpts(df)
+
+    def _write_partition(self, day: str, df: pd.DataFrame):
+        """原子重写一个日期分区"""
+        partition_dir = os.path.join(self.history_dir, f"date={day}")
+        os.makedirs(partition_dir, exist_ok=True)
+        schema = _history_schema()
+        table = pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+        tmp_file = os.path.join(partition_dir, "part-0.parquet.tmp")
+        pq.write_table(table, tmp_file, compression='zstd')
+        os.replace(tmp_file, os.path.join(partition_dir, "part-0.parquet"))
+
+    def _pending_partitions(self, state: Dict, sources: Dict[str, Dict]) -> List[str]:
+        """有新增或变化源文件的分区日期"""
+        pending = [key for key, source in sources.items() if state.get(key) != source['signature']]
+        if not pending:
+            return []
+        return sorted(set(self._normalize(self._read_sources(pending))['date']))
+
+    def _partition_frame(self, day: str, sources: Dict[str, Dict]) -> pd.DataFrame:
+        """从源文件重建一个分区的数据
+
+        记录的date可能比文件名日期早一天（跨零点的爬取），因此读取day和下一天的源文件
+        """
+        next_day = (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        keys = [key for key, source in sources.items() if source['day'] in (day, next_day)]
+        df = self._normalize(self._read_sources(keys))
+        return df[df['date'] == day]
+
+    def compact(self) -> int:
+        """把新增或有变化的源文件折叠进对应日期分区，返回重写的分区数"""
+        if not self.available:
+            self.logger.warning("未安装pyarrow，跳过历史数据压缩")
+            return 0
+        os.makedirs(self.history_dir, exist_ok=True)
+        state = self._load_state()
+        if state.get(SCHEMA_KEY) != HISTORY_SCHEMA_VERSION:
+            # 分区结构变化：丢弃旧分区，从源文件全部重建
+            for name in os.listdir(self.history_dir):
+                if name.startswith('date='):
+                    shutil.rmtree(os.path.join(self.history_dir, name))
+            state = {SCHEMA_KEY: HISTORY_SCHEMA_VERSION}
+        sources = self._sources()
+        pending = [key for key, source in sources.items() if state.get(key) != source['signature']]
+        if pending:
+            # 旧数据标题中附带的摘要转存到摘要存储
+            self.excerpts.put_many(self._read_sources(pending))
+        partitions = self._pending_partitions(state, sources)
+
+        for day in partitions:
+            self._write_partition(day, self._partition_frame(day, sources))
+
+        for key in pending:
+            state[key] = sources[key]['signature']
+        self._save_state(state)
+        if pending:
+            self.logger.info(f"历史数据压缩完成: 折叠 {len(pending)} 个源文件，重写 {len(partitions)} 个分区")
+        return len(partitions)
+
+    def load(self, start_date: Union[str, datetime, None] = None, end_date: Union[str, datetime, None] = None,
+             columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """按日期范围和列加载历史数据（包含尚未压缩的新文件）"""
+        start, end = _date_str(start_date), _date_str(end_date)
+        frames = []
+
+        # 有未压缩源文件的分区直接从源文件重建，其余分区读Parquet
+        sources = self._sources()
+        rebuilt = [day for day in self._pending_partitions(self._load_state(), sources)
+                   if (not start or day >= start) and (not end or day <= end)]
+
+        if os.path.exists(self.history_dir):
+            dataset = ds.dataset(self.history_dir, format='parquet',
+                                 partitioning=ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive'),
+                                 exclude_invalid_files=True)
+            condition = None
+            if start:
+                condition = ds.field('date') >= start
+            if end:
+                condition = (ds.field('date') <= end) if condition is None else condition & (ds.field('date') <= end)
+            if rebuilt:
+                excluded = ~ds.field('date').isin(rebuilt)
+                condition = excluded if condition is None else condition & excluded
+            read_columns = None
+            if columns is not None:
+                read_columns = [column for column in columns if column in dataset.schema.names]
+            table = dataset.to_table(columns=read_columns, filter=condition)
+            frames.append(table.to_pandas())
+
+        for day in rebuilt:
+            df = self._partition_frame(day, sources)
+            if columns is not None:
+                df = df[[column for column in columns if column in df.columns]]
+            frames.append(df)
+
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+        if 'question_tags' in df.columns:
+            df['question_tags'] = df['question_tags'].apply(
+                lambda tags: list(tags) if tags is not None and not isinstance(tags, float) else None)
+        if 'crawl_time' in df.columns:
+            df['crawl_time'] = pd.to_datetime(df['crawl_time'])
+        if 'date' in df.columns:
+            df['date'] = pd.to_datetime(df['date'])
+        return df
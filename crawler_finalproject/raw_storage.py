@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+原始数据存储
+按天追加写入NDJSON分段文件（可选gzip/zstd分帧压缩，批量fsync），
+并提供所有加载器共用的流式读取（兼容旧版 zhihu_hot_*.json）
+"""
+
+import io
+import os
+import gzip
+import json
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# 分段文件后缀（按压缩方式）
+SEGMENT_SUFFIXES = {'none': '.ndjson', 'gzip': '.ndjson.gz', 'zstd': '.ndjson.zst'}
+
+# 旧版整文件JSON
+LEGACY_SUFFIX = '.json'
+
+
+def is_raw_file(filename: str) -> bool:
+    """是否为原始数据文件（旧版JSON或NDJSON分段）"""
+    return 'zhihu_hot' in filename and (
+        filename.endswith(LEGACY_SUFFIX) or any(filename.endswith(suffix) for suffix in SEGMENT_SUFFIXES.values()))
+
+
+def raw_file_date(filename: str) -> Optional[datetime]:
+    """从文件名提取日期: zhihu_hot_20240101.ndjson / zhihu_hot_20240101_123456.json"""
+    try:
+        return datetime.strptime(filename.split('_')[2][:8], '%Y%m%d')
+    except (IndexError, ValueError):
+        return None
+
+
+class RawSegmentWriter:
+    """按天分段的NDJSON追加写入器
+
+    每次write追加一批紧凑记录；启用压缩时每批写成一个独立的gzip成员/zstd帧，
+    文件始终可以被流式读取。fsync按记录数或时间间隔批量执行
+    """
+
+    def __init__(self, raw_dir: str, prefix: str = "zhihu_hot", compression: str = "none",
+                 fsync_every: int = 1, fsync_interval: float = 0, logger: Optional[logging.Logger] = None):
+        self.raw_dir = raw_dir
+        self.prefix = prefix
+        self.logger = logger or logging.getLogger(__name__)
+        if compression == 'zstd' and zstandard is None:
+            self.logger.warning("未安装zstandard，原始数据改用gzip压缩")
+            compression = 'gzip'
+        self.compression = compression if compression in SEGMENT_SUFFIXES else 'none'
+        self.fsync_every = max(1, int(fsync_every))
+        self.fsync_interval = fsync_interval
+        self._unsynced_records = 0
+        self._unsynced_paths = set()
+        self._last_sync = time.monotonic()
+        self._compressor = zstandard.ZstdCompressor() if self.compression == 'zstd' else None
+        os.makedirs(raw_dir, exist_ok=True)
+
+    def segment_path(self, day: Optional[str] = None) -> str:
+        """某天（默认今天）的分段文件路径"""
+        day = day or datetime.now().strftime('%Y%m%d')
+        return os.path.join(self.raw_dir, f"{self.prefix}_{day}{SEGMENT_SUFFIXES[self.compression]}")
+
+    def _encode(self, records: List[Dict]) -> bytes:
+        """编码一批记录为一帧"""
+        payload = ''.join(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+                          for record in records).encode('utf-8')
+        if self.compression == 'gzip':
+            return gzip.compress(payload)
+        if self.compression == 'zstd':
+            return self._compressor.compress(payload)
+        return payload
+
+    def write(self, records: List[Dict]) -> str:
+        """追加一批记录到当天分段，返回分段路径"""
+        path = self.segment_path()
+        if not records:
+            return path
+        with open(path, 'ab') as f:
+            f.write(self._encode(records))
+            f.flush()
+            self._unsynced_records += len(records)
+            due = (self._unsynced_records >= self.fsync_every or
+                   (self.fsync_interval and time.monotonic() - self._last_sync >= self.fsync_interval))
+            if due:
+                os.fsync(f.fileno())
+        if due:
+            self._unsynced_paths.discard(path)
+            self.sync()
+        else:
+            self._unsynced_paths.add(path)
+        return path
+
+    def sync(self):
+        """fsync所有尚未落盘的分段"""
+        for path in self._unsynced_paths:
+            try:
+                with open(path, 'ab') as f:
+                    os.fsync(f.fileno())
+            except OSError as e:
+                self.logger.warning(f"fsync失败 {path}: {e}")
+        self._unsynced_paths = set()
+        self._unsynced_records = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """落盘剩余数据"""
+        self.sync()
+
+
+def _open_segment(filepath: str):
+    """按后缀以文本流打开分段文件"""
+    if filepath.endswith('.gz'):
+        return gzip.open(filepath, 'rt', encoding='utf-8')
+    if filepath.endswith('.zst'):
+        if zstandard is None:
+            raise ImportError("读取 .zst 分段需要安装zstandard")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(filepath, 'rb'), read_across_frames=True,
+                                                            closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8')
+    return open(filepath, 'r', encoding='utf-8')
+
+
+def iter_file_records(filepath: str) -> Iterator[Dict]:
+    """逐条读取一个原始数据文件"""
+    if filepath.endswith(LEGACY_SUFFIX):
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            yield from data
+        else:
+            yield data
+        return
+
+    with _open_segment(filepath) as f:
+        try:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # 写入中断导致的残缺行
+                    continue
+        except EOFError:
+            # 最后一帧写入中断，之前的帧仍然完整
+            return
+
+
+def iter_raw_records(raw_dir: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                     on_error=None) -> Iterator[Dict]:
+    """流式读取目录下全部原始数据，可按文件日期过滤
+
+    on_error(filename, exception) 在单个文件读取失败时调用，未提供时跳过该文件
+    """
+    if not os.path.exists(raw_dir):
+        return
+    for filename in sorted(os.listdir(raw_dir)):
+        if not is_raw_file(filename):
+            continue
+        if start_date or end_date:
+            file_date = raw_file_date(filename)
+            if file_date is None:
+                continue
+            if (start_date and file_date < start_date) or (end_date and file_date > end_date):
+                continue
+        try:
+            yield from iter_file_records(os.path.join(raw_dir, filename))
+        except Exception as e:
+            if on_error:
+                on_error(filename, e)
@@ -0,0 +1,361 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+离线录制/回放与端到端基准测试
+录制器通过HTTP后端保存热榜页和问题页作为fixture；回放服务器在本机按fixture响应请求，可配置延迟和抖动，
+爬虫把 crawler.base_url 指向它即可离线运行；基准测试在独立的临时数据目录中多轮执行 run_single_crawl
+（不抓详情/抓详情），报告墙钟时间、CPU时间和各阶段耗时，结果保存为JSON便于前后对比
+"""
+
+import os
+import copy
+import json
+import time
+import pickle
+import random
+import shutil
+import tempfile
+import threading
+import logging
+import multiprocessing
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from http_fetcher import parse_hot_list, resolve_url
+
+
+FIXTURES_DIR = "fixtures"
+BENCHMARKS_DIR = "benchmarks"
+MANIFEST_FILE = "manifest.json"
+PAGES_DIR = "pages"
+
+
+def page_key(url: str) -> str:
+    """fixture中页面的键：路径加查询串"""
+    parsed = urlparse(url)
+    return (parsed.path or '/') + (f"?{parsed.query}" if parsed.query else "")
+
+
+def _page_filename(key: str) -> str:
+    name = ''.join(char if char.isalnum() else '_' for char in key.strip('/')) or 'index'
+    return f"{name}.html"
+
+
+class FixtureRecorder:
+    """通过已登录的HTTP抓取器录制热榜页和前N个问题页"""
+
+    def __init__(self, fetcher, fixture_dir: str, logger: Optional[logging.Logger] = None):
+        self.fetcher = fetcher
+        self.fixture_dir = fixture_dir
+        self.logger = logger or logging.getLogger(__name__)
+        self.pages: Dict[str, str] = {}
+
+    def _save_page(self, url: str, html: str) -> str:
+        key = page_key(url)
+        filename = _page_filename(key)
+        with open(os.path.join(self.fixture_dir, PAGES_DIR, filename), 'w', encoding='utf-8') as f:
+            f.write(html)
+        self.pages[key] = filename
+        return key
+
+    def record(self, sources: List[Dict], questions: int = 20, max_items: int = 50) -> Dict:
+        """录制各热榜页（[{'name', 'url'}]）及每个热榜前questions个问题页，返回manifest"""
+        os.makedirs(os.path.join(self.fixture_dir, PAGES_DIR), exist_ok=True)
+        question_urls = []
+        hot_pages = []
+        for source in sources:
+            url = source['url']
+            response = self.fetcher.get(url)
+            if "signin" in response.url or "login" in response.url:
+                raise PermissionError("Cookie已失效，请求被重定向到登录页")
+            hot_pages.append({'name': source['name'], 'key': self._save_page(url, response.text)})
+            entries = parse_hot_list(response.text, max_items)
+            self.logger.info(f"已录制热榜页 {url}（{len(entries)} 条）")
+            for entry in entries[:questions]:
+                if entry['url'] not in question_urls:
+                    question_urls.append(entry['url'])
+
+        for index, url in enumerate(question_urls, 1):
+            try:
+                self._save_page(url, self.fetcher.get(url).text)
+            except Exception as e:
+                self.logger.warning(f"录制问题页失败 {url}: {e}")
+                continue
+            if index % 10 == 0:
+                self.logger.info(f"已录制 {index}/{len(question_urls)} 个问题页")
+
+        manifest = {
+            'recorded_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'hot_pages': hot_pages,
+            'questions_per_list': questions,
+            'questions': len(self.pages) - len(hot_pages),
+            'pages': self.pages,
+        }
+        with open(os.path.join(self.fixture_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        self.logger.info(f"fixture已保存到 {self.fixture_dir}: {len(hot_pages)} 个热榜页，{manifest['questions']} 个问题页")
+        return manifest
+
+
+def latest_fixture(data_dir: str = "data") -> Optional[str]:
+    """data/fixtures/ 下最近录制的fixture目录"""
+    fixtures_dir = os.path.join(data_dir, FIXTURES_DIR)
+    if not os.path.isdir(fixtures_dir):
+        return None
+    candidates = [os.path.join(fixtures_dir, name) for name in sorted(os.listdir(fixtures_dir))
+                  if os.path.exists(os.path.join(fixtures_dir, name, MANIFEST_FILE))]
+    return candidates[-1] if candidates else None
+
+
+def load_manifest(fixture_dir: str) -> Dict:
+    with open(os.path.join(fixture_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ReplayServer:
+    """按fixture响应GET请求的本地HTTP服务器，每个请求按 latency ± jitter 秒延迟后返回"""
+
+    def __init__(self, fixture_dir: str, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, seed: Optional[int] = None, logger: Optional[logging.Logger] = None):
+        self.fixture_dir = fixture_dir
+        self.manifest = load_manifest(fixture_dir)
+        self.latency = max(0.0, latency)
+        self.jitter = max(0.0, jitter)
+        self.logger = logger or logging.getLogger(__name__)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.misses = 0
+        self._pages: Dict[str, bytes] = {}
+        for key, filename in self.manifest['pages'].items():
+            with open(os.path.join(fixture_dir, PAGES_DIR, filename), 'rb') as f:
+                self._pages[key] = f.read()
+
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._respond(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _delay(self) -> float:
+        with self._lock:
+            self.requests += 1
+            offset = self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        return max(0.0, self.latency + offset)
+
+    def _respond(self, handler: BaseHTTPRequestHandler):
+        time.sleep(self._delay())
+        body = self._pages.get(page_key(handler.path))
+        if body is None:
+            # 查询串不同（如跟踪参数）时按路径匹配
+            body = self._pages.get(urlparse(handler.path).path)
+        if body is None:
+            with self._lock:
+                self.misses += 1
+            handler.send_error(404)
+            return
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/html; charset=utf-8')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self) -> str:
+        """在后台线程中启动，返回站点根地址"""
+        self._thread = threading.Thread(target=self.serve_forever, name='replay-server', daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _serve_replay(fixture_dir: str, latency: float, jitter: float, seed: Optional[int], connection):
+    """子进程入口：启动回放服务器并把根地址发回父进程"""
+    server = ReplayServer(fixture_dir, latency=latency, jitter=jitter, seed=seed)
+    connection.send(server.base_url)
+    connection.close()
+    server.serve_forever()
+
+
+class CrawlBenchmark:
+    """对回放服务器多轮执行 run_single_crawl，统计墙钟时间、CPU时间和各阶段耗时
+
+    回放服务器运行在子进程中，CPU时间只包含爬虫进程；每轮使用新的临时数据目录，去重和详情缓存不会跨轮生效
+    """
+
+    def __init__(self, fixture_dir: str, config: Dict, latency: float = 0.05, jitter: float = 0.02,
+                 seed: Optional[int] = 0, keep_politeness: bool = False, logger: Optional[logging.Logger] = None):
+        self.fixture_dir = fixture_dir
+        self.manifest = load_manifest(fixture_dir)
+        self.config = config
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        self.keep_politeness = keep_politeness
+        self.logger = logger or logging.getLogger(__name__)
+
+    def _crawl_config(self, base_url: str, data_dir: str) -> Dict:
+        """指向回放服务器的配置（HTTP后端，只爬录制的热榜页）"""
+        config = copy.deepcopy(self.config)
+        config.setdefault('basic', {})['data_dir'] = data_dir
+        crawler_config = config.setdefault('crawler', {})
+        crawler_config['backend'] = 'http'
+        crawler_config['base_url'] = base_url
+        hot_pages = self.manifest['hot_pages']
+        crawler_config['target_url'] = resolve_url(base_url, hot_pages[0]['key'])
+        # 录制了多个热榜时按多热榜方式爬取
+        crawler_config['multi_list'] = {
+            'enabled': len(hot_pages) > 1,
+            'lists': [{'name': page['name'], 'url': page['key']} for page in hot_pages],
+        }
+        # 只对录制了问题页的热榜项抓取详情
+        crawler_config['extract_details_for_top'] = self.manifest.get('questions_per_list', 20)
+        crawler_config['driver_daemon'] = {'enabled': False}
+        if not self.keep_politeness:
+            # 访问间隔用于保护线上站点，对本地回放只会掩盖代码本身的耗时
+            crawler_config['detail_pool'] = dict(crawler_config.get('detail_pool') or {}, min_host_interval=0)
+        return config
+
+    def _run_once(self, base_url: str, extract_details: bool) -> Dict:
+        from zhihu_crawler import EnhancedZhihuCrawler
+
+        data_dir = tempfile.mkdtemp(prefix='zhihu_bench_')
+        try:
+            # 回放服务器不校验Cookie，只需让HTTP后端能加载
+            with open(os.path.join(data_dir, "zhihu_cookies.pkl"), 'wb') as f:
+                pickle.dump([], f)
+            crawler = EnhancedZhihuCrawler(data_dir, self._crawl_config(base_url, data_dir))
+            cpu_start = time.process_time()
+            wall_start = time.perf_counter()
+            filepath = crawler.run_single_crawl(extract_details=extract_details, backend='http')
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            summary = crawler.metrics.summary()
+            return {
+                'ok': filepath is not None,
+                'wall_seconds': round(wall, 4),
+                'cpu_seconds': round(cpu, 4),
+                'items': crawler.run_stats.get('items', 0),
+                'details_fetched': crawler.run_stats.get('details_fetched', 0),
+                'failures': sum(crawler.run_stats['failures'].values()),
+                'phases': {phase: stats['sum'] for phase, stats in summary['phases'].items()},
+                'phase_counts': {phase: stats['count'] for phase, stats in summary['phases'].items()},
+            }
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    @staticmethod
+    def _aggregate(runs: List[Dict]) -> Dict:
+        walls = sorted(run['wall_seconds'] for run in runs)
+        cpus = [run['cpu_seconds'] for run in runs]
+        phases = sorted({phase for run in runs for phase in run['phases']})
+        return {
+            'rounds': len(runs),
+            'failed': sum(1 for run in runs if not run['ok']),
+            'wall_mean': round(sum(walls) / len(walls), 4),
+            'wall_median': round(walls[len(walls) // 2], 4),
+            'wall_min': walls[0],
+            'wall_max': walls[-1],
+            'cpu_mean': round(sum(cpus) / len(cpus), 4),
+            'items': runs[-1]['items'],
+            'details_fetched': runs[-1]['details_fetched'],
+            'failures': sum(run['failures'] for run in runs),
+            'phases': {phase: round(sum(run['phases'].get(phase, 0) for run in runs) / len(runs), 4)
+                       for phase in phases},
+            'runs': runs,
+        }
+
+    def run(self, rounds: int = 3, modes=('list', 'details'), warmup: bool = True) -> Dict:
+        """依次执行各模式的基准测试（list 不抓详情，details 抓详情），返回报告"""
+        parent, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=_serve_replay, daemon=True,
+                                          args=(self.fixture_dir, self.latency, self.jitter, self.seed, child))
+        process.start()
+        try:
+            if not parent.poll(30):
+                raise RuntimeError("回放服务器启动超时")
+            base_url = parent.recv()
+            self.logger.info(f"回放服务器已启动: {base_url}（延迟 {self.latency * 1000:.0f}±{self.jitter * 1000:.0f} 毫秒）")
+            if warmup:
+                # 预热一轮（模块导入、解析器初始化），不计入结果
+                self._run_once(base_url, extract_details=False)
+
+            results = {}
+            for mode in modes:
+                runs = []
+                for index in range(rounds):
+                    runs.append(self._run_once(base_url, extract_details=(mode == 'details')))
+                    self.logger.info(f"[{mode}] 第 {index + 1}/{rounds} 轮: {runs[-1]['wall_seconds']:.2f} 秒，"
+                                     f"CPU {runs[-1]['cpu_seconds']:.2f} 秒")
+                results[mode] = self._aggregate(runs)
+        finally:
+            process.terminate()
+            process.join(5)
+
+        return {
+            'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'fixture': os.path.abspath(self.fixture_dir),
+            'recorded_at': self.manifest.get('recorded_at'),
+            'latency': self.latency,
+            'jitter': self.jitter,
+            'keep_politeness': self.keep_politeness,
+            'cpu_count': os.cpu_count(),
+            'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1) if resource else None,
+            'results': results,
+        }
+
+
+def save_report(report: Dict, data_dir: str = "data") -> str:
+    """把基准测试报告保存到 data/benchmarks/，返回文件路径"""
+    benchmark_dir = os.path.join(data_dir, BENCHMARKS_DIR)
+    os.makedirs(benchmark_dir, exist_ok=True)
+    path = os.path.join(benchmark_dir, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def format_report(report: Dict, baseline: Optional[Dict] = None) -> str:
+    """基准测试结果的文本表格，提供baseline时附带相对变化"""
+    def _delta(value: float, before: Optional[float]) -> str:
+        if not before:
+            return ""
+        return f" ({(value - before) / before * 100:+.1f}%)"
+
+    lines = [f"fixture: {report['fixture']}（录制于 {report['recorded_at']}），"
+             f"延迟 {report['latency'] * 1000:.0f}±{report['jitter'] * 1000:.0f} 毫秒"]
+    for mode, result in report['results'].items():
+        before = ((baseline or {}).get('results') or {}).get(mode) or {}
+        lines.append(f"\n[{mode}] {result['rounds']} 轮（失败 {result['failed']}），{result['items']} 条，"
+                     f"详情 {result['details_fetched']} 条，请求失败 {result['failures']} 次")
+        lines.append(f"  墙钟: 中位 {result['wall_median']:.3f} 秒{_delta(result['wall_median'], before.get('wall_median'))}，"
+                     f"最小 {result['wall_min']:.3f}，最大 {result['wall_max']:.3f}")
+        lines.append(f"  CPU:  平均 {result['cpu_mean']:.3f} 秒{_delta(result['cpu_mean'], before.get('cpu_mean'))}")
+        for phase, seconds in sorted(result['phases'].items(), key=lambda pair: -pair[1]):
+            previous = (before.get('phases') or {}).get(phase)
+            lines.append(f"  {phase:<16} {seconds:.3f} 秒{_delta(seconds, previous)}")
+    return '\n'.join(lines)
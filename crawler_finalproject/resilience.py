@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+导航容错
+页面导航/HTTP请求按失败类别计数，可重试的错误按指数退避重试（次数取 basic.max_retry），
+按主机统计最近请求的失败率，超过阈值时熔断，跳过该主机剩余的请求直到冷却结束
+"""
+
+import time
+import random
+import socket
+import threading
+import logging
+from collections import Counter, deque
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from selenium.common.exceptions import (NoSuchElementException, StaleElementReferenceException,
+                                        TimeoutException, WebDriverException)
+
+
+# 值得重试的失败类别
+RETRYABLE_CLASSES = {'timeout', 'connection', 'throttled', 'http_5xx', 'webdriver'}
+
+
+def classify_error(error: Exception) -> Optional[str]:
+    """把网络/浏览器异常归类；不属于导航失败的异常（如解析错误、Cookie失效）返回None"""
+    if isinstance(error, (TimeoutException, requests.Timeout, socket.timeout, TimeoutError)):
+        return 'timeout'
+    if isinstance(error, NoSuchElementException):
+        return 'not_found'
+    if isinstance(error, StaleElementReferenceException):
+        return 'stale'
+    if isinstance(error, WebDriverException):
+        return 'webdriver'
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        if status == 429:
+            return 'throttled'
+        return 'http_5xx' if status >= 500 else f'http_{status}'
+    if isinstance(error, (requests.ConnectionError, ConnectionError)):
+        return 'connection'
+    if isinstance(error, requests.RequestException):
+        return 'request'
+    return None
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc or url
+
+
+class NavigationError(Exception):
+    """导航最终失败（已计数）"""
+
+    def __init__(self, url: str, failure_class: str, message: str = ""):
+        super().__init__(f"{failure_class}: {message or url}")
+        self.url = url
+        self.failure_class = failure_class
+
+
+class CircuitOpenError(NavigationError):
+    """目标主机已熔断，请求被直接跳过"""
+
+    def __init__(self, url: str):
+        super().__init__(url, 'circuit_open', f"主机 {host_of(url)} 已熔断")
+
+
+class HostCircuitBreaker:
+    """按主机的熔断器
+
+    每个主机保留最近window次请求结果，样本数达到min_requests且失败率不低于failure_rate时熔断；
+    熔断cooldown秒后放行一次试探请求，成功则恢复，失败则继续熔断
+    """
+
+    def __init__(self, window: int = 20, min_requests: int = 5, failure_rate: float = 0.5,
+                 cooldown: float = 60, logger: Optional[logging.Logger] = None):
+        self.window = max(1, int(window))
+        self.min_requests = max(1, int(min_requests))
+        self.failure_rate = failure_rate
+        self.cooldown = cooldown
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._results: Dict[str, deque] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._probing: Dict[str, bool] = {}
+        self.trips = 0
+
+    def is_open(self, url: str) -> bool:
+        """主机当前是否处于熔断（冷却中）状态"""
+        host = host_of(url)
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            return opened_at is not None and time.monotonic() - opened_at < self.cooldown
+
+    def allow(self, url: str) -> bool:
+        """是否放行请求；冷却结束后只放行一个试探请求"""
+        host = host_of(url)
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return True
+            if time.monotonic() - opened_at < self.cooldown or self._probing.get(host):
+                return False
+            self._probing[host] = True
+            return True
+
+    def record(self, url: str, ok: bool):
+        """记录一次请求结果"""
+        host = host_of(url)
+        with self._lock:
+            if host in self._opened_at:
+                # 试探请求的结果决定恢复还是继续熔断
+                self._probing.pop(host, None)
+                if ok:
+                    del self._opened_at[host]
+                    self._results[host] = deque(maxlen=self.window)
+                    self.logger.info(f"主机 {host} 已恢复，解除熔断")
+                else:
+                    self._opened_at[host] = time.monotonic()
+                return
+
+            results = self._results.setdefault(host, deque(maxlen=self.window))
+            results.append(ok)
+            failures = results.count(False)
+            if len(results) >= self.min_requests and failures / len(results) >= self.failure_rate:
+                self._opened_at[host] = time.monotonic()
+                self.trips += 1
+                self.logger.warning(f"主机 {host} 最近 {len(results)} 次请求失败 {failures} 次，"
+                                    f"熔断 {self.cooldown:.0f} 秒")
+
+
+class RetryPolicy:
+    """带指数退避重试和熔断的调用包装"""
+
+    def __init__(self, max_retry: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 breaker: Optional[HostCircuitBreaker] = None,
+                 on_failure: Optional[Callable[[str], None]] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.max_retry = max(1, int(max_retry))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self.on_failure = on_failure
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.failures = Counter()
+        self.retries = 0
+
+    def reset_stats(self):
+        with self._lock:
+            self.failures = Counter()
+            self.retries = 0
+        if self.breaker:
+            self.breaker.trips = 0
+
+    def backoff(self, attempt: int) -> float:
+        """第attempt次失败后的等待秒数（指数增长，带抖动）"""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def record_retry(self):
+        """计数一次重试（由自行实现重试循环的调用方使用，如异步详情引擎）"""
+        with self._lock:
+            self.retries += 1
+
+    def record_failure(self, url: str, failure_class: str, label: str = 'request'):
+        """计数一次失败并计入熔断统计"""
+        key = f"{label}:{failure_class}"
+        with self._lock:
+            self.failures[key] += 1
+        if self.on_failure:
+            self.on_failure(key)
+        if self.breaker and failure_class != 'circuit_open':
+            self.breaker.record(url, ok=False)
+
+    def call(self, url: str, func: Callable, *args, label: str = 'request', **kwargs):
+        """执行func(*args, **kwargs)
+
+        导航类失败按类别计数，可重试类别按指数退避重试，最终失败时抛出NavigationError；
+        主机已熔断时直接抛出CircuitOpenError。其他异常不重试，原样抛出
+        """
+        for attempt in range(1, self.max_retry + 1):
+            if self.breaker and not self.breaker.allow(url):
+                self.record_failure(url, 'circuit_open', label)
+                raise CircuitOpenError(url)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                failure_class = classify_error(e)
+                if failure_class is None:
+                    # 主机有响应（如解析错误、Cookie失效），不计入熔断
+                    if self.breaker:
+                        self.breaker.record(url, ok=True)
+                    raise
+                self.record_failure(url, failure_class, label)
+                if failure_class not in RETRYABLE_CLASSES or attempt == self.max_retry:
+                    raise NavigationError(url, failure_class, str(e).splitlines()[0] if str(e) else "") from e
+                delay = self.backoff(attempt)
+                with self._lock:
+                    self.retries += 1
+                self.logger.warning(f"第 {attempt} 次请求失败 {url}: {failure_class}，{delay:.1f} 秒后重试")
+                time.sleep(delay)
+                continue
+            if self.breaker:
+                self.breaker.record(url, ok=True)
+            return result
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                'retries': self.retries,
+                'failures': dict(self.failures),
+                'circuit_trips': self.breaker.trips if self.breaker else 0,
+            }
@@ -39,13 +39,21 @@ def load_config(config_file="crawler_config.yaml"):
 def run_single_crawl(args, config):
     """执行单次爬取"""
     data_dir = config.get('basic', {}).get('data_dir', 'data')
-    crawler = EnhancedZhihuCrawler(data_dir)
+    if args.multi_list:
+        crawler_config = config.setdefault('crawler', {})
+        crawler_config['multi_list'] = dict(crawler_config.get('multi_list') or {}, enabled=True)
+    crawler = EnhancedZhihuCrawler(data_dir, config)
     
-    print(f"开始{'详细' if args.detailed else '基础'}爬取...")
+    if args.resume:
+        print("继续最近一次中断的爬取...")
+    else:
+        print(f"开始{'详细' if args.detailed else '基础'}爬取...")
     
     filepath = crawler.run_single_crawl(
         extract_details=args.detailed,
-        headless=args.headless
+        headless=args.headless,
+        backend=args.backend,
+        resume=args.resume
     )
     
     if filepath:
@@ -81,7 +89,7 @@ def run_analysis(args, config):
 def run_scheduler(args, config):
     """启动定时任务"""
     data_dir = config.get('basic', {}).get('data_dir', 'data')
-    scheduler = ScheduledCrawler(data_dir)
+    scheduler = ScheduledCrawler(data_dir, config)
     
     print("启动定时任务调度器...")
     
@@ -93,26 +101,198 @@ def run_scheduler(args, config):
     scheduler.start_scheduler()
 
 
-def check_environment():
+def run_compaction(args, config):
+    """把新增原始数据压缩进Parquet历史存储"""
+    from parquet_store import ParquetHistoryStore
+    
+    data_dir = config.get('basic', {}).get('data_dir', 'data')
+    store = ParquetHistoryStore(data_dir)
+    if not store.available:
+        print("✗ 需要安装pyarrow才能使用Parquet历史存储")
+        sys.exit(1)
+    
+    partitions = store.compact()
+    print(f"✓ 历史数据压缩完成，重写 {partitions} 个日期分区")
+
+
+def show_run_history(args, config):
+    """输出爬取运行日志汇总和最近的运行记录"""
+    from crawl_run_log import CrawlRunLog
+    
+    data_dir = config.get('basic', {}).get('data_dir', 'data')
+    run_log = CrawlRunLog(data_dir)
+    summary = run_log.summary()
+    if not summary['runs']:
+        print("暂无运行记录")
+        return
+    
+    print(f"运行次数: {summary['runs']}，状态: {summary['statuses']}")
+    if summary['duration_mean'] is not None:
+        print(f"耗时: 平均 {summary['duration_mean']:.1f} 秒，P95 {summary['duration_p95']:.1f} 秒")
+    print(f"累计: {summary['total_items']} 条数据，抓取详情 {summary['total_details_fetched']} 条，"
+          f"写入 {summary['total_bytes_written'] / 1024:.1f} KB，下载 {summary['total_bytes_downloaded'] / 1024:.1f} KB")
+    if summary['failures']:
+        print(f"失败原因: {summary['failures']}")
+    
+    columns = ['started_at', 'status', 'duration', 'items', 'details_fetched', 'bytes_written']
+    runs = run_log.load_runs(columns=columns)
+    print(runs.tail(args.last).to_string(index=False))
+
+
+def run_recording(args, config):
+    """通过HTTP后端录制热榜页和问题页，作为离线回放的fixture"""
+    from replay_harness import FixtureRecorder, FIXTURES_DIR
+    
+    data_dir = config.get('basic', {}).get('data_dir', 'data')
+    crawler_config = config.setdefault('crawler', {})
+    if args.multi_list:
+        crawler_config['multi_list'] = dict(crawler_config.get('multi_list') or {}, enabled=True)
+    crawler = EnhancedZhihuCrawler(data_dir, config)
+    if not crawler.setup_http_fetcher():
+        print("✗ 无法加载Cookie，请先手动登录")
+        sys.exit(1)
+    
+    fixture_dir = os.path.join(data_dir, FIXTURES_DIR, args.name or datetime.now().strftime('%Y%m%d_%H%M%S'))
+    sources = crawler._hot_list_sources() or [{'name': 'total', 'url': crawler.http_fetcher.target_url}]
+    questions = args.questions if args.questions is not None else crawler_config.get('extract_details_for_top', 20)
+    try:
+        manifest = FixtureRecorder(crawler.http_fetcher, fixture_dir, crawler.logger).record(
+            sources, questions=questions, max_items=crawler_config.get('max_items', 50))
+    finally:
+        crawler.http_fetcher.close()
+    print(f"✓ 已录制 {len(manifest['hot_pages'])} 个热榜页、{manifest['questions']} 个问题页到: {fixture_dir}")
+
+
+def _fixture_dir(args, config) -> str:
+    from replay_harness import latest_fixture
+    
+    fixture_dir = args.fixtures or latest_fixture(config.get('basic', {}).get('data_dir', 'data'))
+    if not fixture_dir:
+        print("✗ 没有可用的fixture，请先运行 python run_crawler.py record")
+        sys.exit(1)
+    return fixture_dir
+
+
+def run_replay_server(args, config):
+    """在前台启动回放服务器"""
+    from replay_harness import ReplayServer
+    
+    fixture_dir = _fixture_dir(args, config)
+    server = ReplayServer(fixture_dir, port=args.port, latency=args.latency, jitter=args.jitter)
+    print(f"回放服务器已启动: {server.base_url}（fixture: {fixture_dir}），按 Ctrl+C 停止")
+    print(f"把 crawler.base_url 设为 {server.base_url} 并使用 --backend http 即可离线爬取")
+    try:
+        server.serve_forever()
+    finally:
+        print(f"共响应 {server.requests} 个请求，未命中 {server.misses} 个")
+
+
+def run_benchmark(args, config):
+    """对回放服务器执行端到端爬取基准测试"""
+    import json
+    from replay_harness import CrawlBenchmark, format_report, save_report
+    
+    fixture_dir = _fixture_dir(args, config)
+    modes = ['list', 'details'] if args.mode == 'both' else [args.mode]
+    benchmark = CrawlBenchmark(fixture_dir, config, latency=args.latency, jitter=args.jitter,
+                               keep_politeness=args.keep_politeness)
+    print(f"开始基准测试: {', '.join(modes)}，每种 {args.rounds} 轮...")
+    report = benchmark.run(rounds=args.rounds, modes=modes)
+    
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print(format_report(report, baseline))
+    path = save_report(report, config.get('basic', {}).get('data_dir', 'data'))
+    print(f"✓ 基准测试结果已保存到: {path}")
+
+
+def driver_daemon_enabled(config) -> bool:
+    return bool((((config or {}).get('crawler', {}) or {}).get('driver_daemon', {}) or {}).get('enabled', False))
+
+
+def driver_daemon_client(config):
+    """按配置 crawler.driver_daemon 连接驱动池守护进程的客户端"""
+    from driver_daemon import DriverDaemonClient, DEFAULT_HOST, DEFAULT_PORT, TOKEN_FILE
+    
+    daemon_config = ((config or {}).get('crawler', {}) or {}).get('driver_daemon', {}) or {}
+    data_dir = ((config or {}).get('basic', {}) or {}).get('data_dir', 'data')
+    return DriverDaemonClient(daemon_config.get('host', DEFAULT_HOST), daemon_config.get('port', DEFAULT_PORT),
+                              timeout=daemon_config.get('connect_timeout', 2),
+                              token_file=os.path.join(data_dir, TOKEN_FILE))
+
+
+def run_driver_daemon(args, config):
+    """启动预热驱动池守护进程，或查询/停止已运行的守护进程"""
+    from driver_daemon import DriverPoolDaemon, crawler_launcher, TOKEN_FILE
+    
+    client = driver_daemon_client(config)
+    status = client.ping()
+    if args.status or args.stop:
+        if status is None:
+            print("✗ 驱动池守护进程未运行")
+            sys.exit(1)
+        if args.stop:
+            client.request({'cmd': 'shutdown'})
+            print("✓ 已通知驱动池守护进程停止")
+            return
+        print(f"驱动池守护进程运行中: 空闲 {status['idle']}/{status['size']} 个实例，借出 {status['leased']} 个；"
+              f"累计启动 {status['launched']} 个（失败 {status['launch_failures']} 次），借出 {status['leases']} 次，"
+              f"崩溃回收 {status['crashed']} 个，过期回收 {status['expired']} 个")
+        return
+    if status is not None:
+        print(f"✗ 驱动池守护进程已在 {client.host}:{client.port} 运行")
+        sys.exit(1)
+    
+    data_dir = config.get('basic', {}).get('data_dir', 'data')
+    daemon_config = config.get('crawler', {}).get('driver_daemon', {}) or {}
+    crawler = EnhancedZhihuCrawler(data_dir, config)
+    headless = daemon_config.get('headless', True)
+    daemon = DriverPoolDaemon(
+        crawler_launcher(crawler, headless=headless),
+        size=args.size or daemon_config.get('size', 2),
+        host=client.host,
+        port=client.port,
+        health_interval=daemon_config.get('health_interval', 30),
+        max_age=daemon_config.get('max_age', 3600),
+        lease_timeout=daemon_config.get('lease_timeout', 1800),
+        token_file=os.path.join(data_dir, TOKEN_FILE),
+        headless=headless,
+        logger=crawler.logger
+    )
+    print(f"驱动池守护进程启动中（{client.host}:{client.port}），按 Ctrl+C 停止")
+    try:
+        daemon.serve_forever()
+    finally:
+        daemon.stop()
+
+
+def check_environment(config=None):
     """检查运行环境"""
     print("检查运行环境...")
     
-    # 检查Chrome浏览器
-    try:
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
+    # 驱动池守护进程在线时爬虫直接借用其预热实例，不必再启动一次Chrome
+    status = driver_daemon_client(config).ping() if driver_daemon_enabled(config) else None
+    if status:
+        print(f"✓ 驱动池守护进程在线（空闲 {status['idle']}/{status['size']} 个预热实例），跳过Chrome启动检查")
+    else:
+        # 检查Chrome浏览器
+        try:
+            from selenium import webdriver
+            from selenium.webdriver.chrome.options import Options
         
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
+            options = Options()
+            options.add_argument('--headless')
+            options.add_argument('--no-sandbox')
         
-        driver = webdriver.Chrome(options=options)
-        driver.quit()
-        print("✓ Chrome浏览器检查通过")
-    except Exception as e:
-        print(f"✗ Chrome浏览器检查失败: {e}")
-        print("请确保已安装Chrome浏览器和ChromeDriver")
-        return False
+            driver = webdriver.Chrome(options=options)
+            driver.quit()
+            print("✓ Chrome浏览器检查通过")
+        except Exception as e:
+            print(f"✗ Chrome浏览器检查失败: {e}")
+            print("请确保已安装Chrome浏览器和ChromeDriver")
+            return False
     
     # 检查必要的目录
     required_dirs = ['data', 'data/raw', 'data/analysis', 'data/reports', 'data/logs']
@@ -133,9 +313,17 @@ def main():
   python run_crawler.py crawl                    # 基础爬取
   python run_crawler.py crawl --detailed         # 详细爬取
   python run_crawler.py crawl --headless         # 无头模式爬取
+  python run_crawler.py crawl --backend http     # 不启动浏览器，直接HTTP抓取
+  python run_crawler.py crawl --resume           # 继续中断的爬取，只补抓未完成的详情
+  python run_crawler.py crawl --multi-list       # 同时爬取配置中的各分类热榜
   python run_crawler.py analyze --days 7         # 分析最近7天数据
   python run_crawler.py analyze --days 30 --charts  # 分析并生成图表
   python run_crawler.py schedule                 # 启动定时任务
+  python run_crawler.py compact                  # 压缩原始数据到Parquet历史存储
+  python run_crawler.py runs --last 20           # 查看爬取运行日志
+  python run_crawler.py daemon                   # 启动预热Chrome驱动池守护进程
+  python run_crawler.py record                   # 录制热榜页和问题页作为离线fixture
+  python run_crawler.py benchmark --rounds 5     # 对回放服务器执行端到端基准测试
   python run_crawler.py check                    # 检查环境
         """
     )
@@ -151,6 +339,12 @@ def main():
                              help='无头模式运行（适合服务器部署）')
     crawl_parser.add_argument('--auto-analysis', action='store_true',
                              help='爬取完成后自动生成分析报告')
+    crawl_parser.add_argument('--backend', choices=['selenium', 'http'],
+                             help='抓取后端（默认读取配置 crawler.backend）')
+    crawl_parser.add_argument('--resume', action='store_true',
+                             help='继续最近一次中断的爬取（按检查点只补抓未完成的详情）')
+    crawl_parser.add_argument('--multi-list', action='store_true',
+                             help='同时爬取 crawler.multi_list 中配置的各分类热榜')
     
     # 分析命令
     analysis_parser = subparsers.add_parser('analyze', help='执行数据分析')
@@ -164,6 +358,48 @@ def main():
     schedule_parser.add_argument('--config-jobs', action='store_true',
                                 help='使用配置文件中的任务设置')
     
+    # 历史数据压缩命令
+    compact_parser = subparsers.add_parser('compact', help='把新增原始数据压缩进Parquet历史存储')
+    
+    # 运行日志命令
+    runs_parser = subparsers.add_parser('runs', help='查看爬取运行日志汇总')
+    runs_parser.add_argument('--last', type=int, default=10,
+                            help='显示最近几次运行（默认10次）')
+    
+    # 驱动池守护进程命令
+    daemon_parser = subparsers.add_parser('daemon', help='启动预热Chrome驱动池守护进程')
+    daemon_parser.add_argument('--size', type=int,
+                              help='保持的空闲预热实例数（默认读取配置 crawler.driver_daemon.size）')
+    daemon_parser.add_argument('--status', action='store_true',
+                              help='查看已运行的守护进程状态')
+    daemon_parser.add_argument('--stop', action='store_true',
+                              help='停止已运行的守护进程')
+    
+    # 录制/回放/基准测试命令
+    record_parser = subparsers.add_parser('record', help='录制热榜页和问题页作为离线回放的fixture')
+    record_parser.add_argument('--questions', type=int,
+                              help='每个热榜录制的问题页数（默认读取配置 crawler.extract_details_for_top）')
+    record_parser.add_argument('--name', help='fixture目录名（默认为当前时间）')
+    record_parser.add_argument('--multi-list', action='store_true',
+                              help='录制 crawler.multi_list 中配置的各分类热榜')
+    
+    replay_parser = subparsers.add_parser('replay', help='启动本地回放服务器')
+    replay_parser.add_argument('--fixtures', help='fixture目录（默认取最近录制的）')
+    replay_parser.add_argument('--port', type=int, default=8765, help='监听端口（默认8765）')
+    replay_parser.add_argument('--latency', type=float, default=0.05, help='每个请求的延迟（秒，默认0.05）')
+    replay_parser.add_argument('--jitter', type=float, default=0.02, help='延迟的随机抖动（秒，默认0.02）')
+    
+    benchmark_parser = subparsers.add_parser('benchmark', help='对回放服务器执行端到端爬取基准测试')
+    benchmark_parser.add_argument('--fixtures', help='fixture目录（默认取最近录制的）')
+    benchmark_parser.add_argument('--rounds', type=int, default=3, help='每种模式执行的轮数（默认3轮）')
+    benchmark_parser.add_argument('--mode', choices=['list', 'details', 'both'], default='both',
+                                 help='list 只爬热榜，details 同时抓取详情（默认两种都测）')
+    benchmark_parser.add_argument('--latency', type=float, default=0.05, help='回放延迟（秒，默认0.05）')
+    benchmark_parser.add_argument('--jitter', type=float, default=0.02, help='回放延迟抖动（秒，默认0.02）')
+    benchmark_parser.add_argument('--keep-politeness', action='store_true',
+                                 help='保留配置中的主机访问间隔（默认对本地回放关闭）')
+    benchmark_parser.add_argument('--baseline', help='之前保存的基准测试结果JSON，输出相对变化')
+    
     # 环境检查命令
     check_parser = subparsers.add_parser('check', help='检查运行环境')
     
@@ -191,14 +427,16 @@ def main():
     # 执行命令
     try:
         if args.command == 'check':
-            if check_environment():
+            if check_environment(config):
                 print("✓ 环境检查通过，可以正常运行爬虫")
             else:
                 print("✗ 环境检查失败，请解决上述问题后重试")
                 sys.exit(1)
         
         elif args.command == 'crawl':
-            if not check_environment():
+            backend = args.backend or config.get('crawler', {}).get('backend', 'selenium')
+            # HTTP后端不需要浏览器
+            if backend != 'http' and not check_environment(config):
                 sys.exit(1)
             run_single_crawl(args, config)
         
@@ -206,10 +444,28 @@ def main():
             run_analysis(args, config)
         
         elif args.command == 'schedule':
-            if not check_environment():
+            if not check_environment(config):
                 sys.exit(1)
             run_scheduler(args, config)
         
+        elif args.command == 'compact':
+            run_compaction(args, config)
+        
+        elif args.command == 'runs':
+            show_run_history(args, config)
+        
+        elif args.command == 'daemon':
+            run_driver_daemon(args, config)
+        
+        elif args.command == 'record':
+            run_recording(args, config)
+        
+        elif args.command == 'replay':
+            run_replay_server(args, config)
+        
+        elif args.command == 'benchmark':
+            run_benchmark(args, config)
+        
     except KeyboardInterrupt:
         print("\n程序被用户中断")
     except Exception as e:
@@ -221,4 +477,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+SQLite存储后端
+热榜记录按事务写入WAL模式的SQLite数据库，crawl_time/date/question_hash建索引，
+窗口查询走索引范围扫描，爬取写入时仪表板仍可并发读取
+"""
+
+import os
+import json
+import sqlite3
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+from numeric_fields import parse_count, to_count_series
+from excerpt_store import ExcerptStore, split_title, strip_excerpts
+
+
+SQLITE_DB_FILE = "zhihu_hot.db"
+
+# 表结构版本（PRAGMA user_version）；版本2起热度为整数列，原始文本可选存入heat_text；
+# 版本3起标题不含摘要（摘要在excerpts.jsonl中）；版本4增加来源热榜列source_list
+# （只读查询不升级旧库，版本3库读出的source_list为空值）
+SCHEMA_VERSION = 4
+
+# 列名 -> SQLite类型
+COLUMNS = {
+    'crawl_id': 'TEXT',
+    'crawl_time': 'TEXT',
+    'date': 'TEXT',
+    'rank': 'INTEGER',
+    'question_hash': 'TEXT',
+    'title': 'TEXT',
+    'url': 'TEXT',
+    'heat_value': 'INTEGER',
+    'heat_text': 'TEXT',
+    'answer_count': 'INTEGER',
+    'follower_count': 'INTEGER',
+    'view_count': 'INTEGER',
+    'question_tags': 'TEXT',  # JSON数组
+    'created_time': 'TEXT',
+    'source_list': 'TEXT',  # 多热榜爬取时的来源热榜
+}
+
+TABLE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS hot_items (
+    id INTEGER PRIMARY KEY,
+    {', '.join(f'{name} {sql_type}' for name, sql_type in COLUMNS.items())}
+);
+"""
+
+INDEX_SCHEMA = """
+CREATE INDEX IF NOT EXISTS idx_hot_items_crawl_time ON hot_items (crawl_time);
+CREATE INDEX IF NOT EXISTS idx_hot_items_date ON hot_items (date);
+CREATE INDEX IF NOT EXISTS idx_hot_items_question_hash ON hot_items (question_hash);
+"""
+
+
+def _time_str(value: Union[str, datetime, None]) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value)
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value) if value is not None and value == value else None
+    except (TypeError, ValueError):
+        return None
+
+
+class SQLiteHotListStore:
+    """WAL模式的热榜记录库"""
+
+    def __init__(self, db_file: str, logger: Optional[logging.Logger] = None):
+        self.db_file = db_file
+        self.logger = logger or logging.getLogger(__name__)
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.db_file)
+
+    def _connect(self, readonly: bool = False) -> sqlite3.Connection:
+        if readonly:
+            return sqlite3.connect(f"file:{self.db_file}?mode=ro", uri=True)
+        conn = sqlite3.connect(self.db_file)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(TABLE_SCHEMA)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            self._upgrade(conn, version)
+        conn.executescript(INDEX_SCHEMA)
+        return conn
+
+    def _upgrade(self, conn: sqlite3.Connection, version: int):
+        """把旧版库升级到当前结构
+
+        版本2：热度为TEXT列的表重建为当前结构，热度文本转换为整数并保存到heat_text；
+        版本3：标题中附带的摘要转存到摘要存储；
+        版本4：增加source_list列
+        """
+        existing = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(hot_items)")}
+        if existing.get('heat_value') != 'INTEGER':
+            kept = [name for name in COLUMNS if name in existing and name not in ('heat_value', 'heat_text')]
+            conn.execute("BEGIN")
+            conn.execute("ALTER TABLE hot_items RENAME TO hot_items_old")
+            conn.execute(TABLE_SCHEMA)
+            rows = conn.execute(f"SELECT id, {', '.join(kept)}, heat_value FROM hot_items_old").fetchall()
+            conn.executemany(
+                f"INSERT INTO hot_items (id, {', '.join(kept)}, heat_value, heat_text) "
+                f"VALUES ({', '.join('?' * (len(kept) + 3))})",
+                [row[:-1] + (parse_count(row[-1]), row[-1]) for row in rows])
+            conn.execute("DROP TABLE hot_items_old")
+            conn.execute("COMMIT")
+            self.logger.info(f"SQLite库热度列已转换为整数: {len(rows)} 条记录")
+        if version < 3:
+            rows = conn.execute(
+                "SELECT id, question_hash, title FROM hot_items WHERE instr(title, char(10)) > 0").fetchall()
+            if rows:
+                records = [{'question_hash': question_hash, 'title': title} for _, question_hash, title in rows]
+                ExcerptStore(os.path.dirname(self.db_file), self.logger).put_many(records)
+                with conn:
+                    conn.executemany("UPDATE hot_items SET title = ? WHERE id = ?",
+                                     [(record['title'], row[0]) for record, row in zip(records, rows)])
+                self.logger.info(f"SQLite库标题中的摘要已拆分: {len(rows)} 条记录")
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(hot_items)")}
+        for name, sql_type in COLUMNS.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE hot_items ADD COLUMN {name} {sql_type}")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @staticmethod
+    def _row(item: Dict, crawl_id: Optional[str]) -> tuple:
+        crawl_time = _time_str(item.get('crawl_time'))
+        tags = item.get('question_tags')
+        return (
+            item.get('crawl_id', crawl_id),
+            crawl_time,
+            item.get('date') or (crawl_time[:10] if crawl_time else None),
+            _to_int(item.get('rank')),
+            item.get('question_hash'),
+            split_title(item.get('title'))[0],
+            item.get('url'),
+            parse_count(item.get('heat_value')),
+            item.get('heat_text'),
+            _to_int(item.get('answer_count')),
+            _to_int(item.get('follower_count')),
+            _to_int(item.get('view_count')),
+            json.dumps(list(tags), ensure_ascii=False) if isinstance(tags, (list, tuple)) else None,
+            item.get('created_time'),
+            item.get('source_list'),
+        )
+
+    def insert(self, items: Iterable[Dict], crawl_id: Optional[str] = None) -> int:
+        """在一个事务中写入一批记录，返回写入条数"""
+        rows = [self._row(item, crawl_id) for item in items]
+        if not rows:
+            return 0
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    f"INSERT INTO hot_items ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+        finally:
+            conn.close()
+        return len(rows)
+
+    def query(self, start_time: Union[str, datetime, None] = None, end_date: Union[str, datetime, None] = None,
+              columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """按crawl_time下界和date上界（走索引）读取记录"""
+        if not self.exists:
+            return pd.DataFrame()
+        selected = [column for column in (columns or COLUMNS) if column in COLUMNS]
+        conditions, params = [], []
+        if start_time is not None:
+            conditions.append("crawl_time >= ?")
+            params.append(_time_str(start_time))
+        if end_date is not None:
+            conditions.append("date <= ?")
+            params.append(_time_str(end_date)[:10])
+
+        conn = self._connect(readonly=True)
+        try:
+            # 只读连接不会升级旧库：只查询库中已有的列，之后版本新增的列补为空值
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(hot_items)")}
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            sql = f"SELECT {', '.join(column for column in selected if column in existing) or 'NULL'} FROM hot_items"
+            if conditions:
+                sql += " WHERE " + " AND ".join(conditions)
+            df = pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+        df = df.reindex(columns=selected)
+
+        if 'heat_value' in df.columns:
+            # 旧库中的热度文本在读取时转换
+            df['heat_value'] = to_count_series(df['heat_value'])
+        if version < 3:
+            # 版本3之前标题中附带摘要
+            strip_excerpts(df)
+        if 'question_tags' in df.columns:
+            df['question_tags'] = df['question_tags'].apply(
+                lambda tags: json.loads(tags) if isinstance(tags, str) and tags else None)
+        if 'crawl_time' in df.columns:
+            df['crawl_time'] = pd.to_datetime(df['crawl_time'])
+        if 'date' in df.columns:
+            df['date'] = pd.to_datetime(df['date'])
+        return df
+
+    def question_history(self, question_hash: str) -> pd.DataFrame:
+        """某个问题的全部排名记录（走question_hash索引）"""
+        if not self.exists:
+            return pd.DataFrame()
+        conn = self._connect(readonly=True)
+        try:
+            return pd.read_sql_query(
+                "SELECT crawl_time, rank, heat_value, answer_count FROM hot_items "
+                "WHERE question_hash = ? ORDER BY crawl_time", conn, params=[question_hash])
+        finally:
+            conn.close()
@@ -12,7 +12,12 @@ import pandas as pd
 from datetime import datetime, timedelta
 import plotly.graph_objs as go
 import plotly.utils
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from raw_storage import iter_raw_records
+from history_loader import load_history, load_observation_records
+from numeric_fields import normalize_frame
+from excerpt_store import ExcerptStore, strip_excerpts
 
 
 app = Flask(__name__)
@@ -25,30 +30,27 @@ class WebDashboard:
         self.raw_dir = os.path.join(data_dir, "raw")
         self.analysis_dir = os.path.join(data_dir, "analysis")
         self.reports_dir = os.path.join(data_dir, "reports")
+        self.excerpts = ExcerptStore(data_dir)
     
-    def load_all_data(self) -> pd.DataFrame:
-        """加载所有数据"""
-        all_data = []
-        
-        if not os.path.exists(self.raw_dir):
-            return pd.DataFrame()
+    def load_all_data(self, start_date: Optional[datetime] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """加载数据（已建立SQLite库或Parquet历史存储时按时间窗口和列读取）"""
+        df = load_history(self.data_dir, start_date=start_date, columns=columns)
+        if df is not None:
+            return df
         
-        for filename in os.listdir(self.raw_dir):
-            if filename.endswith('.json') and 'zhihu_hot' in filename:
-                filepath = os.path.join(self.raw_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        all_data.extend(data)
-                except Exception as e:
-                    print(f"加载文件失败 {filename}: {e}")
+        all_data = list(iter_raw_records(self.raw_dir,
+                                         on_error=lambda filename, e: print(f"加载文件失败 {filename}: {e}")))
+        # 快照模式下的记录在观测存储中
+        all_data.extend(load_observation_records(self.data_dir, start_date=start_date))
         
         if not all_data:
             return pd.DataFrame()
         
         df = pd.DataFrame(all_data)
         
-        # 数据类型转换
+        # 数据类型转换（旧数据中的热度/计数文本转换为数值，去掉标题附带的摘要）
+        normalize_frame(df)
+        strip_excerpts(df)
         if 'crawl_time' in df.columns:
             df['crawl_time'] = pd.to_datetime(df['crawl_time'])
         if 'date' in df.columns:
@@ -58,13 +60,13 @@ class WebDashboard:
     
     def get_dashboard_stats(self, days: int = 7) -> Dict:
         """获取控制面板统计数据"""
-        df = self.load_all_data()
+        cutoff_date = datetime.now() - timedelta(days=days)
+        df = self.load_all_data(start_date=cutoff_date)
         
         if df.empty:
             return {"error": "没有数据"}
         
         # 过滤最近N天的数据
-        cutoff_date = datetime.now() - timedelta(days=days)
         if 'crawl_time' in df.columns:
             recent_df = df[df['crawl_time'] >= cutoff_date]
         else:
@@ -129,7 +131,9 @@ class WebDashboard:
                 "rank": row.get('rank', 'N/A'),
                 "title": row.get('title', 'N/A'),
                 "url": row.get('url', '#'),
-                "heat_value": row.get('heat_value', 'N/A'),
+                "question_hash": row.get('question_hash'),
+                "has_excerpt": row.get('question_hash') in self.excerpts,
+                "heat_value": int(row['heat_value']) if pd.notna(row.get('heat_value')) else 'N/A',
                 "answer_count": row.get('answer_count', 'N/A'),
                 "question_tags": row.get('question_tags', []) if isinstance(row.get('question_tags'), list) else [],
                 "crawl_time": row.get('crawl_time', '').strftime('%H:%M:%S') if pd.notna(row.get('crawl_time')) else 'N/A'
@@ -138,15 +142,19 @@ class WebDashboard:
         
         return items
     
+    def get_excerpt(self, question_hash: str) -> Optional[str]:
+        """按需读取问题摘要（热榜列表接口不再附带摘要）"""
+        return self.excerpts.get(question_hash)
+    
     def create_trend_chart(self, days: int = 7) -> str:
         """创建趋势图表（Plotly）"""
-        df = self.load_all_data()
+        cutoff_date = datetime.now() - timedelta(days=days)
+        df = self.load_all_data(start_date=cutoff_date, columns=['date'])
         
         if df.empty or 'date' not in df.columns:
             return json.dumps({"data": [], "layout": {"title": "没有数据"}})
         
         # 过滤数据
-        cutoff_date = datetime.now() - timedelta(days=days)
         recent_df = df[df['date'] >= cutoff_date.date()] if 'date' in df.columns else df
         
         # 每日统计
@@ -180,7 +188,7 @@ class WebDashboard:
     
     def create_rank_distribution_chart(self) -> str:
         """创建排名分布图表"""
-        df = self.load_all_data()
+        df = self.load_all_data(columns=['rank'])
         
         if df.empty or 'rank' not in df.columns:
             return json.dumps({"data": [], "layout": {"title": "没有排名数据"}})
@@ -210,7 +218,7 @@ class WebDashboard:
     
     def create_tag_chart(self) -> str:
         """创建标签分布图表"""
-        df = self.load_all_data()
+        df = self.load_all_data(columns=['question_tags'])
         
         if df.empty or 'question_tags' not in df.columns:
             return json.dumps({"data": [], "layout": {"title": "没有标签数据"}})
@@ -270,6 +278,14 @@ def api_recent_items():
     items = dashboard.get_recent_hot_items(limit)
     return jsonify(items)
 
+@app.route('/api/excerpt/<question_hash>')
+def api_excerpt(question_hash):
+    """问题摘要API（展开热榜项时按需加载）"""
+    excerpt = dashboard.get_excerpt(question_hash)
+    if excerpt is None:
+        return jsonify({"error": "没有摘要"}), 404
+    return jsonify({"question_hash": question_hash, "excerpt": excerpt})
+
 @app.route('/api/chart/trend')
 def api_trend_chart():
     """趋势图表API"""
@@ -330,6 +346,8 @@ if __name__ == '__main__':
         .item-title { font-size: 16px; color: #333; text-decoration: none; }
         .item-title:hover { color: #007bff; }
         .item-meta { color: #666; font-size: 12px; margin-top: 5px; }
+        .item-excerpt-toggle { color: #007bff; font-size: 12px; margin-left: 8px; text-decoration: none; }
+        .item-excerpt { color: #555; font-size: 13px; margin-top: 5px; display: none; }
         .tag { background: #e3f2fd; color: #1976d2; padding: 2px 8px; border-radius: 12px; font-size: 11px; margin-right: 5px; }
         .loading { text-align: center; padding: 50px; color: #666; }
         @media (max-width: 768px) {
@@ -429,6 +447,8 @@ if __name__ == '__main__':
                     <div class="item">
                         <span class="item-rank">${item.rank}</span>
                         <a href="${item.url}" target="_blank" class="item-title">${item.title}</a>
+                        ${item.has_excerpt ? `<a href="#" class="item-excerpt-toggle" onclick="toggleExcerpt(this, '${item.question_hash}'); return false;">摘要</a>` : ''}
+                        <div class="item-excerpt"></div>
                         <div class="item-meta">
                             ${item.heat_value !== 'N/A' ? `热度: ${item.heat_value}` : ''}
                             ${item.answer_count !== 'N/A' ? ` | 回答: ${item.answer_count}` : ''}
@@ -446,6 +466,27 @@ if __name__ == '__main__':
             }
         }
 
+        // 展开/收起问题摘要（首次展开时请求摘要接口）
+        async function toggleExcerpt(link, questionHash) {
+            const excerptDiv = link.parentElement.querySelector('.item-excerpt');
+            if (excerptDiv.style.display === 'block') {
+                excerptDiv.style.display = 'none';
+                return;
+            }
+            if (!excerptDiv.dataset.loaded) {
+                try {
+                    const response = await fetch(`/api/excerpt/${encodeURIComponent(questionHash)}`);
+                    const data = await response.json();
+                    excerptDiv.textContent = data.excerpt || '暂无摘要';
+                    excerptDiv.dataset.loaded = '1';
+                } catch (error) {
+                    console.error('加载摘要失败:', error);
+                    return;
+                }
+            }
+            excerptDiv.style.display = 'block';
+        }
+
         // 加载图表
         async function loadCharts() {
             try {
@@ -491,4 +532,4 @@ if __name__ == '__main__':
     print("访问地址: http://127.0.0.1:5000")
     print("按 Ctrl+C 停止服务")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
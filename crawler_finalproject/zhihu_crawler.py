@@ -7,9 +7,8 @@
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
 import time
@@ -19,13 +18,37 @@ import numpy as np
 import pickle
 import hashlib
 import re
+import threading
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, Counter
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from driver_pool import DriverPool, HostPoliteness
+from page_readiness import PageReadiness
+from http_fetcher import HttpHotListFetcher, ZHIHU_BASE_URL, DEFAULT_USER_AGENT, HOT_ITEM_SELECTORS, resolve_url
+from browser_session import BrowserSessionManager
+from crawl_profile import LeanCrawlProfile
+from detail_cache import DetailCache
+from detail_planner import DetailRefreshPlanner
+from dedup_store import open_hash_store
+from observation_store import ObservationStore
+from raw_storage import RawSegmentWriter, iter_raw_records
+from parquet_store import ParquetHistoryStore
+from sqlite_store import SQLiteHotListStore, SQLITE_DB_FILE
+from history_loader import load_history
+from crawl_run_log import CrawlRunLog
+from excerpt_store import ExcerptStore, split_title, strip_excerpts
+from resilience import RetryPolicy, HostCircuitBreaker, NavigationError, classify_error
+from crawl_metrics import CrawlMetrics, MetricsExporter
+from driver_daemon import DriverDaemonClient, DEFAULT_HOST, DEFAULT_PORT, TOKEN_FILE
+from crawl_pipeline import CrawlPipeline, CrawlCheckpoint, PipelineJournal, pending_checkpoints
+from numeric_fields import normalize_items, normalize_frame, parse_count, VIEW_COUNT_PATTERN
 
 # 配置matplotlib中文字体
 # 设置中文字体和样式
@@ -34,14 +57,59 @@ plt.rcParams['axes.unicode_minus'] = False
 plt.rcParams['figure.dpi'] = 100
 plt.rcParams['savefig.dpi'] = 300
 
+# 默认Chrome启动参数（可由 crawler.chrome_options 覆盖）
+DEFAULT_CHROME_OPTIONS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-gpu',
+    '--disable-software-rasterizer',
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+]
+
+# 在浏览器内一次性提取热榜字段（选择器与逐元素解析路径一致），返回JSON字符串
+HOT_LIST_BULK_JS = """
+var selectors = arguments[0], maxItems = arguments[1];
+var elements = [], source = null;
+for (var i = 0; i < selectors.length; i++) {
+    elements = document.querySelectorAll(selectors[i]);
+    if (elements.length) { source = selectors[i]; break; }
+}
+function text(el) { return el ? (el.innerText || el.textContent || '').trim() : ''; }
+var items = [];
+if (elements.length) {
+    for (var j = 0; j < elements.length && j < maxItems; j++) {
+        var el = elements[j];
+        var link = el.querySelector("a[href]");
+        var heat = el.querySelector("[class*='metrics'], [class*='hot'], [class*='HotItem-metrics']");
+        items.push({
+            rank: j + 1,
+            title: text(el.querySelector("h2, [class*='title'], a")),
+            url: link ? link.href : null,
+            heat_value: heat ? text(heat) : null
+        });
+    }
+} else {
+    source = "a[href*='/question/']";
+    var links = Array.prototype.filter.call(document.getElementsByTagName("a"), function (a) {
+        return a.href && a.href.indexOf("/question/") !== -1;
+    });
+    for (var k = 0; k < links.length && k < maxItems; k++) {
+        items.push({rank: k + 1, title: text(links[k]), url: links[k].href, heat_value: null});
+    }
+}
+return JSON.stringify({source: source, items: items});
+"""
+
+
 class EnhancedZhihuCrawler:
     """增强版知乎爬虫 - 支持定时任务、数据分析、去重等功能"""
     
-    def __init__(self, data_dir="data"):
+    def __init__(self, data_dir="data", config: Optional[Dict] = None):
         self.data_dir = data_dir
+        self.config = config or {}
+        self.crawler_config = self.config.get('crawler', {}) or {}
+        self.backend = self.crawler_config.get('backend', 'selenium')
         self.cookie_file = os.path.join(data_dir, "zhihu_cookies.pkl")
-        self.history_file = os.path.join(data_dir, "crawl_history.json")
-        self.duplicate_file = os.path.join(data_dir, "question_hashes.json")
         
         # 创建必要目录
         for subdir in ["raw", "processed", "analysis", "reports"]:
@@ -53,7 +121,126 @@ class EnhancedZhihuCrawler:
         # 初始化去重数据
         self.question_hashes = self._load_question_hashes()
         
+        # 快照模式：每次爬取记录全部热榜项的观测，问题属性只在维度表中保存一次
+        self.snapshot_mode = (self.config.get('storage', {}) or {}).get('snapshot_mode', False)
+        self.observation_store = ObservationStore(data_dir, self.logger) if self.snapshot_mode else None
+        
+        # 问题摘要（每个问题只保存一次，记录中只保留标题）
+        self.excerpt_store = ExcerptStore(data_dir, self.logger)
+        
+        # 原始数据格式：json（每次爬取一个文件）或 ndjson（按天追加分段，可选压缩）
+        storage_config = self.config.get('storage', {}) or {}
+        self.raw_writer = None
+        if storage_config.get('raw_format', 'json') == 'ndjson':
+            self.raw_writer = RawSegmentWriter(
+                os.path.join(data_dir, "raw"),
+                compression=storage_config.get('compression') or 'none',
+                fsync_every=storage_config.get('fsync_every', 1),
+                fsync_interval=storage_config.get('fsync_interval', 0),
+                logger=self.logger
+            )
+        
+        # SQLite存储后端（WAL模式，首次启用时导入已有的原始数据）
+        self.sqlite_store = None
+        self.keep_raw_files = storage_config.get('keep_raw_files', True)
+        self.keep_heat_text = storage_config.get('keep_heat_text', False)
+        if storage_config.get('backend', 'files') == 'sqlite':
+            self.sqlite_store = SQLiteHotListStore(os.path.join(data_dir, SQLITE_DB_FILE), self.logger)
+            if not self.sqlite_store.exists:
+                count = self.sqlite_store.insert(self._existing_records())
+                self.logger.info(f"SQLite库已创建，导入已有记录 {count} 条")
+        
+        # 爬取运行日志（追加写入，按大小轮转，保留全部历史）
+        self.run_log = CrawlRunLog(data_dir, max_bytes=int(storage_config.get('run_log_max_mb', 5) * 1024 * 1024),
+                                   logger=self.logger)
+        self._run_lock = threading.Lock()
+        
+        # 分阶段耗时和计数器，每次运行结束后导出Prometheus textfile和JSON摘要
+        metrics_config = self.config.get('metrics', {}) or {}
+        self.metrics = CrawlMetrics(metrics_config.get('buckets'))
+        self.metrics_exporter = None
+        if metrics_config.get('enabled', True):
+            self.metrics_exporter = MetricsExporter(data_dir, textfile_dir=metrics_config.get('textfile_dir'),
+                                                    keep_runs=metrics_config.get('keep_runs', 200), logger=self.logger)
+        
+        # 导航容错：可重试的失败按指数退避重试 basic.max_retry 次，按主机失败率熔断
+        resilience_config = self.crawler_config.get('resilience', {}) or {}
+        breaker_config = resilience_config.get('circuit_breaker', {}) or {}
+        self.circuit_breaker = HostCircuitBreaker(
+            window=breaker_config.get('window', 20),
+            min_requests=breaker_config.get('min_requests', 5),
+            failure_rate=breaker_config.get('failure_rate', 0.5),
+            cooldown=breaker_config.get('cooldown', 60),
+            logger=self.logger
+        )
+        self.retry_policy = RetryPolicy(
+            max_retry=(self.config.get('basic', {}) or {}).get('max_retry', 3),
+            base_delay=resilience_config.get('base_delay', 0.5),
+            max_delay=resilience_config.get('max_delay', 8),
+            breaker=self.circuit_breaker,
+            on_failure=self._record_failure,
+            logger=self.logger
+        )
+        self._begin_run()
+        
+        # 爬取流水线：详情抓取与逐条写入流水日志并行，中断时已完成的热榜项不会丢失；
+        # 检查点记录运行阶段和列表阶段的结果，用于恢复中断的运行
+        self.pipeline_config = self.crawler_config.get('pipeline', {}) or {}
+        self.journal = None
+        self.checkpoint = None
+        self._resuming = False
+        
+        # 页面就绪检测（代替固定等待）
+        self.readiness = PageReadiness(self.crawler_config.get('readiness'), self.logger)
+        
+        # 问题详情缓存（按question_hash，TTL+LRU）
+        cache_config = self.config.get('detail_cache', {}) or {}
+        self.detail_cache = None
+        if cache_config.get('enabled', True):
+            self.detail_cache = DetailCache(
+                os.path.join(data_dir, cache_config.get('storage_file', 'detail_cache.json')),
+                ttl_seconds=cache_config.get('ttl_hours', 12) * 3600,
+                max_entries=cache_config.get('max_entries', 5000),
+                logger=self.logger
+            )
+        
+        # 详情刷新规划（按排名/排名变化/新鲜度在预算内挑选要刷新的问题）
+        refresh_config = self.crawler_config.get('detail_refresh', {}) or {}
+        self.refresh_planner = None
+        refresh_strategy = refresh_config.get('strategy', 'top_n')
+        if refresh_strategy == 'planner' and not self.snapshot_mode:
+            # 非快照模式下已见过的问题在去重时被丢弃，规划器只能看到首次出现的问题，排名变化和新鲜度都无从谈起
+            self.logger.warning("detail_refresh.strategy 为 planner 需要开启 storage.snapshot_mode，已改用 top_n")
+            refresh_strategy = 'top_n'
+        if refresh_strategy == 'planner':
+            self.refresh_planner = DetailRefreshPlanner(
+                os.path.join(data_dir, refresh_config.get('state_file', 'detail_refresh_state.json')),
+                max_requests=refresh_config.get('max_requests', 20),
+                time_budget=refresh_config.get('time_budget', 60),
+                movement_threshold=refresh_config.get('movement_threshold', 5),
+                max_items=self.crawler_config.get('max_items', 50),
+                weights=refresh_config.get('weights'),
+                logger=self.logger
+            )
+        
+        # 精简爬取配置（拦截非必要资源）
+        self.crawl_profile = None
+        if self.crawler_config.get('crawl_profile', 'full') == 'lean':
+            self.crawl_profile = LeanCrawlProfile(self.crawler_config.get('lean_profile'), self.logger)
+        
+        # 预热驱动池守护进程（启用时优先借用守护进程中已登录的Chrome实例，不可用时本地启动）
+        daemon_config = self.crawler_config.get('driver_daemon', {}) or {}
+        self.driver_daemon = None
+        if daemon_config.get('enabled', False):
+            self.driver_daemon = DriverDaemonClient(daemon_config.get('host', DEFAULT_HOST),
+                                                    daemon_config.get('port', DEFAULT_PORT),
+                                                    timeout=daemon_config.get('connect_timeout', 2),
+                                                    token_file=os.path.join(data_dir, TOKEN_FILE),
+                                                    logger=self.logger)
+        self._daemon_leases: Dict[int, str] = {}
+        
         self.driver = None
+        self.http_fetcher = None
         
     def _setup_logging(self):
         """配置日志系统"""
@@ -70,20 +257,32 @@ class EnhancedZhihuCrawler:
         )
         self.logger = logging.getLogger(__name__)
     
-    def _load_question_hashes(self) -> set:
-        """加载已知问题的哈希值用于去重"""
-        if os.path.exists(self.duplicate_file):
-            try:
-                with open(self.duplicate_file, 'r', encoding='utf-8') as f:
-                    return set(json.load(f))
-            except:
-                return set()
-        return set()
+    def _load_question_hashes(self):
+        """打开已知问题的哈希存储用于去重（追加日志或SQLite索引）"""
+        return open_hash_store(self.data_dir, self.config.get('deduplication'), self.logger)
+    
+    def _existing_records(self) -> List[Dict]:
+        """已保存的原始数据和快照观测记录（旧数据标题中的摘要转存到摘要存储）"""
+        records = list(iter_raw_records(os.path.join(self.data_dir, "raw")))
+        records.extend(ObservationStore(self.data_dir).load_records())
+        self.excerpt_store.put_many(records)
+        return records
+    
+    def _is_duplicate(self, question_hash: str) -> bool:
+        """是否跳过该问题：本次运行已出现过（多热榜爬取时）的跳过；快照模式下每次都记录，否则跳过已抓取过的问题"""
+        duplicate = question_hash in self._run_hashes or (not self.snapshot_mode and question_hash in self.question_hashes)
+        if duplicate:
+            self.metrics.inc('items:skipped_dedup')
+        return duplicate
+    
+    def _mark_seen(self, question_hash: str):
+        """记录已采集的问题（本次运行和去重存储）"""
+        self._run_hashes.add(question_hash)
+        self.question_hashes.add(question_hash)
     
     def _save_question_hashes(self):
-        """保存问题哈希值"""
-        with open(self.duplicate_file, 'w', encoding='utf-8') as f:
-            json.dump(list(self.question_hashes), f, ensure_ascii=False, indent=2)
+        """保存新增的问题哈希值"""
+        self.question_hashes.flush()
     
     def _generate_question_hash(self, title: str, url: str) -> str:
         """生成问题的唯一标识哈希"""
@@ -95,46 +294,121 @@ class EnhancedZhihuCrawler:
             # 如果没有问题ID，使用标题哈希
             return hashlib.md5(title.encode('utf-8')).hexdigest()
     
-    def setup_driver(self):
-        """设置Chrome驱动"""
+    def _create_driver(self, extra_arguments: Optional[List[str]] = None, headless: Optional[bool] = None):
+        """创建一个新的Chrome驱动实例（headless未指定时取本次运行的设置）"""
+        if headless is None:
+            headless = getattr(self, 'headless', False)
         options = Options()
         
         # 基本反检测设置
-        options.add_argument('--disable-blink-features=AutomationControlled')
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option('useAutomationExtension', False)
         
-        # 性能优化
-        options.add_argument('--disable-gpu')
-        options.add_argument('--disable-software-rasterizer')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
+        # 反检测与性能优化参数
+        for argument in self.crawler_config.get('chrome_options', DEFAULT_CHROME_OPTIONS):
+            options.add_argument(argument)
         
         # 静默模式（定时任务时使用）
-        if hasattr(self, 'headless') and self.headless:
+        if headless:
             options.add_argument('--headless')
         
         # User-Agent
-        options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        
-        self.driver = webdriver.Chrome(options=options)
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        options.add_argument(f"user-agent={self.crawler_config.get('user_agent', DEFAULT_USER_AGENT)}")
+        
+        # 精简配置：拦截图片/字体/样式/媒体和第三方脚本
+        if self.crawl_profile:
+            self.crawl_profile.apply_options(options)
+        
+        for argument in extra_arguments or []:
+            options.add_argument(argument)
+        
+        start = time.perf_counter()
+        driver = webdriver.Chrome(options=options)
+        self.metrics.observe('driver_startup', time.perf_counter() - start)
+        # 页面加载超时后由重试策略处理，而不是卡在默认的300秒
+        driver.set_page_load_timeout((self.crawler_config.get('resilience', {}) or {}).get('page_load_timeout', 20))
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        if self.crawl_profile:
+            self.crawl_profile.install(driver)
+        return driver
+    
+    def _lease_driver(self, headless: Optional[bool] = None):
+        """从预热驱动池守护进程借用已登录的Chrome实例（通过debuggerAddress接管），不可用时返回None"""
+        if not self.driver_daemon:
+            return None
+        lease = self.driver_daemon.acquire(headless=getattr(self, 'headless', False) if headless is None else headless)
+        if not lease:
+            return None
+        options = Options()
+        options.debugger_address = lease['debugger_address']
+        start = time.perf_counter()
+        try:
+            driver = webdriver.Chrome(options=options)
+        except WebDriverException as e:
+            self.logger.warning(f"接管预热实例失败，改为本地启动Chrome: {e}")
+            self.driver_daemon.release(lease['lease'], healthy=False)
+            return None
+        self.metrics.observe('driver_startup', time.perf_counter() - start)
+        self.metrics.inc('driver:leased')
+        driver.set_page_load_timeout((self.crawler_config.get('resilience', {}) or {}).get('page_load_timeout', 20))
+        if self.crawl_profile:
+            self.crawl_profile.install(driver)
+        self._daemon_leases[id(driver)] = lease['lease']
+        return driver
+    
+    def _is_leased(self, driver) -> bool:
+        """驱动是否借自守护进程（已加载Cookie）"""
+        return id(driver) in self._daemon_leases
+    
+    def quit_driver(self, driver, healthy: bool = True):
+        """关闭驱动；借自守护进程的实例同时通知守护进程回收"""
+        lease = self._daemon_leases.pop(id(driver), None)
+        try:
+            driver.quit()
+        except WebDriverException as e:
+            self.logger.warning(f"关闭驱动失败: {e}")
+        finally:
+            if lease:
+                self.driver_daemon.release(lease, healthy)
+    
+    def setup_driver(self):
+        """设置Chrome驱动（启用守护进程时优先借用预热实例）"""
+        self.driver = self._lease_driver()
+        if self.driver is not None:
+            self.logger.info("已从驱动池守护进程借用预热的Chrome实例")
+            return
+        self.driver = self._create_driver()
         self.logger.info("Chrome驱动启动成功")
     
-    def load_cookies(self) -> bool:
+    def create_driver(self, headless: Optional[bool] = None):
+        """创建已加载Cookie的驱动（供驱动池和长驻会话使用，启用守护进程时优先借用预热实例），用完后交给quit_driver关闭"""
+        driver = self._lease_driver(headless)
+        if driver is not None:
+            return driver
+        driver = self._create_driver(headless=headless)
+        if not self.load_cookies(driver):
+            driver.quit()
+            raise RuntimeError("无法加载Cookie，请先手动登录")
+        return driver
+    
+    def load_cookies(self, driver=None) -> bool:
         """加载Cookie"""
+        with self.metrics.phase('cookie_load'):
+            return self._load_cookies(driver or self.driver)
+    
+    def _load_cookies(self, driver) -> bool:
         if os.path.exists(self.cookie_file):
             try:
                 with open(self.cookie_file, 'rb') as f:
                     cookies = pickle.load(f)
                 
                 # 访问主页设置域
-                self.driver.get("https://www.zhihu.com")
-                time.sleep(2)
+                driver.get("https://www.zhihu.com")
+                self.readiness.wait_for_document(driver)
                 
                 for cookie in cookies:
                     try:
-                        self.driver.add_cookie(cookie)
+                        driver.add_cookie(cookie)
                     except:
                         pass
                 
@@ -146,30 +420,42 @@ class EnhancedZhihuCrawler:
     
     def check_login_status(self) -> bool:
         """检查登录状态"""
+        with self.metrics.phase('login_check'):
+            return self._check_login_status()
+    
+    def _check_login_status(self) -> bool:
         try:
             self.driver.get("https://www.zhihu.com/hot")
-            time.sleep(3)
+            
+            # 等待跳转到登录页或热榜内容出现
+            if not self.readiness.wait_for_login_resolved(self.driver):
+                return False
             
             # 检查是否需要登录
             current_url = self.driver.current_url
             if "signin" in current_url or "login" in current_url:
                 return False
             
-            # 检查页面是否正常加载
-            try:
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "div, section, a"))
-                )
-                return True
-            except:
-                return False
+            return True
                 
         except Exception as e:
             self.logger.error(f"检查登录状态失败: {e}")
             return False
     
-    def extract_detailed_info(self, url: str) -> Dict:
-        """提取问题详细信息"""
+    def extract_detailed_info(self, url: str, driver=None, check_cache: bool = True) -> Dict:
+        """提取问题详细信息
+        
+        先查详情缓存（check_cache为False时跳过）；未命中时，未指定driver则在主驱动的新标签页中打开，
+        指定时直接在该驱动中导航（驱动池模式）。成功抓取的结果写入缓存
+        """
+        question_hash = self._generate_question_hash('', url)
+        if check_cache and self.detail_cache:
+            cached = self.detail_cache.get(question_hash)
+            if cached is not None:
+                return cached
+        
+        start = time.perf_counter()
+        fetched = False
         details = {
             'answer_count': 0,
             'follower_count': 0,
@@ -178,188 +464,716 @@ class EnhancedZhihuCrawler:
             'created_time': None
         }
         
+        use_new_tab = driver is None
+        driver = driver or self.driver
+        
         try:
             # 打开新标签页
-            self.driver.execute_script("window.open('');")
-            self.driver.switch_to.window(self.driver.window_handles[-1])
-            self.driver.get(url)
-            time.sleep(2)
+            if use_new_tab:
+                self._open_tab(driver)
+            self.retry_policy.call(url, driver.get, url, label='detail')
             
-            # 等待页面加载
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            # 等待数据面板渲染（超时后仍按已加载内容提取，并计入该主机的失败率）
+            if not self.readiness.wait_for_number_board(driver):
+                self.retry_policy.record_failure(url, 'not_ready', label='detail')
             
             # 提取回答数
             try:
-                answer_elem = self.driver.find_element(By.CSS_SELECTOR, 
+                answer_elem = driver.find_element(By.CSS_SELECTOR, 
                     "[class*='NumberBoard-itemValue'], [class*='List-headerText'], .NumberBoard-value")
                 answer_text = answer_elem.text
-                answer_match = re.search(r'(\d+)', answer_text)
-                if answer_match:
-                    details['answer_count'] = int(answer_match.group(1))
-            except:
-                pass
+                answer_count = parse_count(answer_text)
+                if answer_count is not None:
+                    details['answer_count'] = answer_count
+            except WebDriverException as e:
+                self._record_element_failure(e)
             
             # 提取关注数
             try:
-                follower_elems = self.driver.find_elements(By.CSS_SELECTOR, 
+                follower_elems = driver.find_elements(By.CSS_SELECTOR, 
                     "[class*='NumberBoard-itemValue'], .NumberBoard-value")
                 for elem in follower_elems:
                     text = elem.text
                     if '关注' in elem.find_element(By.XPATH, "..").text:
-                        follower_match = re.search(r'(\d+)', text)
-                        if follower_match:
-                            details['follower_count'] = int(follower_match.group(1))
+                        follower_count = parse_count(text)
+                        if follower_count is not None:
+                            details['follower_count'] = follower_count
                             break
-            except:
-                pass
+            except WebDriverException as e:
+                self._record_element_failure(e)
             
             # 提取浏览数（通常在问题描述附近）
             try:
-                view_elem = self.driver.find_element(By.CSS_SELECTOR, 
+                view_elem = driver.find_element(By.CSS_SELECTOR, 
                     "[class*='ContentItem-meta'], [class*='QuestionHeader-detail']")
                 view_text = view_elem.text
-                view_match = re.search(r'(\d+(?:,\d+)*)\s*次浏览', view_text)
+                view_match = re.search(VIEW_COUNT_PATTERN, view_text)
                 if view_match:
-                    details['view_count'] = int(view_match.group(1).replace(',', ''))
-            except:
-                pass
+                    details['view_count'] = parse_count(view_match.group(1))
+            except WebDriverException as e:
+                self._record_element_failure(e)
             
             # 提取标签
             try:
-                tag_elems = self.driver.find_elements(By.CSS_SELECTOR, 
+                tag_elems = driver.find_elements(By.CSS_SELECTOR, 
                     ".QuestionHeader-tags .Tag, [class*='QuestionTopic'] .Tag")
                 for tag_elem in tag_elems:
                     tag_text = tag_elem.text.strip()
                     if tag_text and tag_text not in details['question_tags']:
                         details['question_tags'].append(tag_text)
-            except:
-                pass
+            except WebDriverException as e:
+                self._record_element_failure(e)
             
             # 关闭当前标签页
-            self.driver.close()
-            self.driver.switch_to.window(self.driver.window_handles[0])
+            if use_new_tab:
+                driver.close()
+                driver.switch_to.window(driver.window_handles[0])
+            fetched = True
             
         except Exception as e:
-            self.logger.error(f"提取详细信息失败 {url}: {e}")
+            if isinstance(e, NavigationError):
+                # 已按失败类别计数
+                self.logger.warning(f"提取详细信息失败 {url}: {e}")
+            else:
+                self.logger.error(f"提取详细信息失败 {url}: {e}")
+                self._record_failure(f"detail:{classify_error(e) or type(e).__name__}")
             # 确保切换回主窗口
             try:
-                if len(self.driver.window_handles) > 1:
-                    self.driver.close()
-                    self.driver.switch_to.window(self.driver.window_handles[0])
-            except:
+                if use_new_tab and len(driver.window_handles) > 1:
+                    driver.close()
+                    driver.switch_to.window(driver.window_handles[0])
+            except WebDriverException:
                 pass
         
+        # 统计该页面的流量
+        if self.crawl_profile:
+            self.crawl_profile.collect(driver)
+        
+        if fetched and self.detail_cache:
+            self.detail_cache.put(question_hash, details)
+        
+        self.metrics.observe('detail_fetch', time.perf_counter() - start)
         return details
     
     def crawl_hot_list(self, extract_details=True) -> List[Dict]:
         """爬取热榜数据（增强版）"""
         self.logger.info("开始爬取热榜数据")
         
-        if "hot" not in self.driver.current_url:
-            self.driver.get("https://www.zhihu.com/hot")
-            time.sleep(3)
+        sources = self._hot_list_sources()
+        if "hot" not in self.driver.current_url and not sources:
+            hot_url = "https://www.zhihu.com/hot"
+            self.retry_policy.call(hot_url, self.driver.get, hot_url, label='hot_list')
         
         hot_items = []
         new_items_count = 0
         
         try:
-            # 等待页面加载
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            if sources:
+                # 多热榜：各热榜在独立标签页中同时加载
+                items = self._iter_lists_in_tabs(sources)
+            else:
+                # 等待热榜容器填充
+                self.readiness.wait_for_hot_list(self.driver)
+                items = self._iter_current_list()
             
-            # 多种选择器策略
-            selectors = [
-                "div.HotItem",
-                "section.HotItem", 
-                "[class*='HotItem']",
-                "div[data-za-detail-view-id]"
-            ]
+            # 解析出的热榜项逐条进入详情抓取和写入（启用流水线时三者并行）
+            hot_items = self._process_items(items, extract_details)
+            new_items_count = len(hot_items)
+                        
+        except Exception as e:
+            self.logger.error(f"爬取过程出错: {e}")
+            self._record_crawl_error(e)
+        
+        self.logger.info(f"本次爬取完成，新增 {new_items_count} 条数据，总计 {len(hot_items)} 条")
+        return hot_items
+    
+    def _iter_current_list(self, source_list: Optional[str] = None) -> Iterator[Dict]:
+        """逐条产出当前页面的热榜项：批量提取（一次execute_script取回全部字段），失败时回退到逐元素解析"""
+        entries = None
+        if self.crawler_config.get('bulk_extraction', True):
+            entries = self._extract_hot_entries_bulk()
+        
+        if entries:
+            yield from self._collect_new_items(entries, source_list)
+        else:
+            yield from self._iter_hot_list_elements(source_list)
+    
+    def _hot_list_sources(self) -> List[Dict]:
+        """多热榜爬取的热榜列表 [{'name', 'url'}]，未启用时返回空列表"""
+        multi_config = self.crawler_config.get('multi_list', {}) or {}
+        if not multi_config.get('enabled', False):
+            return []
+        base_url = self.crawler_config.get('base_url', ZHIHU_BASE_URL)
+        return [{'name': source['name'], 'url': resolve_url(base_url, source['url'])}
+                for source in multi_config.get('lists', []) if source.get('name') and source.get('url')]
+    
+    def _open_tab(self, driver, url: Optional[str] = None) -> Optional[str]:
+        """打开空白标签页并切换过去，先设置资源拦截（CDP拦截只作用于当前标签页）再开始加载url（不等待加载完成）
+
+        返回新标签页的句柄，打开失败时返回None
+        """
+        before = set(driver.window_handles)
+        driver.execute_script("window.open('about:blank', '_blank');")
+        opened = [handle for handle in driver.window_handles if handle not in before]
+        if not opened:
+            return None
+        driver.switch_to.window(opened[0])
+        if self.crawl_profile:
+            self.crawl_profile.install(driver)
+        if url:
+            driver.execute_script("window.location.href = arguments[0];", url)
+        return opened[0]
+    
+    def _iter_lists_in_tabs(self, sources: List[Dict]) -> Iterator[Dict]:
+        """在独立标签页中同时加载全部热榜，再按配置顺序逐个等待就绪并逐条产出热榜项
+        
+        同一个问题只保留第一次出现的热榜，详情缓存和去重在各热榜之间共享
+        """
+        driver = self.driver
+        main_window = driver.current_window_handle
+        tabs = []
+        for source in sources:
+            tabs.append((source, self._open_tab(driver, source['url'])))
+        
+        for source, handle in tabs:
+            if handle is None:
+                self.logger.error(f"热榜 {source['name']} 的标签页打开失败")
+                self._record_failure('hot_list:tab')
+                continue
+            try:
+                driver.switch_to.window(handle)
+                if not self.readiness.wait_for_hot_list(driver):
+                    # 标签页加载失败时按重试策略重新导航
+                    self.retry_policy.call(source['url'], driver.get, source['url'], label='hot_list')
+                    self.readiness.wait_for_hot_list(driver)
+                count = 0
+                for item in self._iter_current_list(source['name']):
+                    count += 1
+                    yield item
+                self.logger.info(f"热榜 {source['name']}: 新增 {count} 条")
+            except Exception as e:
+                self.logger.error(f"热榜 {source['name']} 爬取失败: {e}")
+                self._record_crawl_error(e)
+            finally:
+                try:
+                    driver.close()
+                except WebDriverException:
+                    pass
+        driver.switch_to.window(main_window)
+    
+    def _extract_hot_entries_bulk(self) -> Optional[List[Dict]]:
+        """在浏览器内一次性提取全部热榜项的 rank/title/url/heat_value"""
+        try:
+            payload = self.driver.execute_script(HOT_LIST_BULK_JS, HOT_ITEM_SELECTORS,
+                                                 self.crawler_config.get('max_items', 50))
+            result = json.loads(payload)
+        except Exception as e:
+            self.logger.warning(f"批量提取失败，回退到逐元素解析: {e}")
+            return None
+        
+        entries = [entry for entry in result.get('items', []) if entry.get('title') and entry.get('url')]
+        self.logger.info(f"批量提取（{result.get('source')}）得到 {len(entries)} 条热榜")
+        return entries
+    
+    def _collect_new_items(self, entries: List[Dict], source_list: Optional[str] = None) -> List[Dict]:
+        """把 rank/title/url/heat_value 条目构造成热榜项并去重（source_list为来源热榜名称）"""
+        hot_items = []
+        for entry in entries:
+            item = self._build_hot_item(entry['rank'], entry['title'], entry['url'], entry.get('heat_value'),
+                                        entry.get('excerpt'))
+            if source_list:
+                item['source_list'] = source_list
+            
+            # 去重检查
+            if self._is_duplicate(item['question_hash']):
+                continue
             
-            elements = []
-            for selector in selectors:
+            hot_items.append(item)
+            self._mark_seen(item['question_hash'])
+            self.logger.info(f"解析第 {item['rank']} 条: {item['title'][:50]}...")
+        return hot_items
+    
+    def _iter_hot_list_elements(self, source_list: Optional[str] = None) -> Iterator[Dict]:
+        """逐元素解析热榜并逐条产出（批量提取不可用时的备用路径）"""
+        # 多种选择器策略
+        elements = []
+        for selector in HOT_ITEM_SELECTORS:
+            try:
+                elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                if elements:
+                    self.logger.info(f"使用选择器 '{selector}' 找到 {len(elements)} 个元素")
+                    break
+            except:
+                continue
+        
+        # 备用方案：通过链接查找
+        if not elements:
+            self.logger.info("使用备用方案：通过链接查找")
+            all_links = self.driver.find_elements(By.TAG_NAME, "a")
+            # 每个链接只读取一次href
+            question_links = [(link, href) for link, href in ((link, link.get_attribute("href")) for link in all_links)
+                            if href and "/question/" in href]
+            
+            for idx, (link, url) in enumerate(question_links[:50], 1):
                 try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        self.logger.info(f"使用选择器 '{selector}' 找到 {len(elements)} 个元素")
-                        break
-                except:
+                    title, excerpt = split_title(link.text)
+                    
+                    if not title or not url:
+                        continue
+                    
+                    # 去重检查
+                    question_hash = self._generate_question_hash(title, url)
+                    if self._is_duplicate(question_hash):
+                        continue
+                    
+                    # 基础数据
+                    item = {
+                        'rank': idx,
+                        'title': title,
+                        'url': url,
+                        'question_hash': question_hash,
+                        'heat_value': None,
+                        'crawl_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                        'date': datetime.now().strftime('%Y-%m-%d')
+                    }
+                    if excerpt:
+                        item['excerpt'] = excerpt
+                    if source_list:
+                        item['source_list'] = source_list
+                    
+                    self._mark_seen(question_hash)
+                    self.logger.info(f"提取第 {idx} 条: {title[:50]}...")
+                    
+                except Exception as e:
+                    self.logger.error(f"处理第 {idx} 条时出错: {e}")
                     continue
-            
-            # 备用方案：通过链接查找
-            if not elements:
-                self.logger.info("使用备用方案：通过链接查找")
-                all_links = self.driver.find_elements(By.TAG_NAME, "a")
-                question_links = [link for link in all_links 
-                                if link.get_attribute("href") and "/question/" in link.get_attribute("href")]
-                
-                for idx, link in enumerate(question_links[:50], 1):
-                    try:
-                        title = link.text.strip()
-                        url = link.get_attribute('href')
-                        
-                        if not title or not url:
-                            continue
-                        
-                        # 去重检查
-                        question_hash = self._generate_question_hash(title, url)
-                        if question_hash in self.question_hashes:
-                            continue
-                        
-                        # 基础数据
-                        item = {
-                            'rank': idx,
-                            'title': title,
-                            'url': url,
-                            'question_hash': question_hash,
-                            'heat_value': None,
-                            'crawl_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                            'date': datetime.now().strftime('%Y-%m-%d')
-                        }
-                        
-                        # 提取详细信息
-                        if extract_details and idx <= 20:  # 只对前20条提取详细信息
-                            self.logger.info(f"正在提取第 {idx} 条详细信息...")
-                            details = self.extract_detailed_info(url)
-                            item.update(details)
-                            time.sleep(1)  # 避免请求过快
-                        
-                        hot_items.append(item)
-                        self.question_hashes.add(question_hash)
-                        new_items_count += 1
-                        
-                        self.logger.info(f"提取第 {idx} 条: {title[:50]}...")
-                        
-                    except Exception as e:
-                        self.logger.error(f"处理第 {idx} 条时出错: {e}")
+                yield item
+        else:
+            # 解析标准热榜元素
+            for idx, element in enumerate(elements[:50], 1):
+                try:
+                    item = self._parse_hot_item_enhanced(element, idx)
+                    if not item or not item.get('title'):
                         continue
-            else:
-                # 解析标准热榜元素
-                for idx, element in enumerate(elements[:50], 1):
-                    try:
-                        item = self._parse_hot_item_enhanced(element, idx, extract_details and idx <= 20)
-                        if item and item.get('title'):
-                            # 去重检查
-                            question_hash = item.get('question_hash')
-                            if question_hash and question_hash not in self.question_hashes:
-                                hot_items.append(item)
-                                self.question_hashes.add(question_hash)
-                                new_items_count += 1
-                                self.logger.info(f"解析第 {idx} 条: {item['title'][:50]}...")
-                            
-                    except Exception as e:
-                        self.logger.error(f"解析第 {idx} 条时出错: {e}")
+                    # 去重检查
+                    question_hash = item.get('question_hash')
+                    if not question_hash or self._is_duplicate(question_hash):
+                        continue
+                    if source_list:
+                        item['source_list'] = source_list
+                    self._mark_seen(question_hash)
+                    self.logger.info(f"解析第 {idx} 条: {item['title'][:50]}...")
                         
+                except Exception as e:
+                    self.logger.error(f"解析第 {idx} 条时出错: {e}")
+                    continue
+                yield item
+    
+    def setup_http_fetcher(self) -> bool:
+        """创建HTTP抓取后端并加载Cookie"""
+        self.http_fetcher = HttpHotListFetcher(
+            self.cookie_file,
+            base_url=self.crawler_config.get('base_url', ZHIHU_BASE_URL),
+            target_url=self.crawler_config.get('target_url'),
+            user_agent=self.crawler_config.get('user_agent', DEFAULT_USER_AGENT),
+            pool_size=self.crawler_config.get('http_pool_size', 10),
+            logger=self.logger
+        )
+        return self.http_fetcher.load_cookies()
+    
+    def crawl_hot_list_http(self, extract_details=True) -> List[Dict]:
+        """通过HTTP后端爬取热榜数据，返回与crawl_hot_list相同结构的数据"""
+        self.logger.info("开始爬取热榜数据（HTTP后端）")
+        
+        hot_items = []
+        
+        try:
+            sources = self._hot_list_sources()
+            items = self._iter_lists_http(sources) if sources else self._iter_hot_list_http()
+            
+            # 解析出的热榜项逐条进入详情抓取和写入（启用流水线时三者并行）
+            hot_items = self._process_items(items, extract_details)
+        
+        except PermissionError as e:
+            self.logger.error(f"登录状态检查失败，请重新登录: {e}")
+            self._record_failure('login')
         except Exception as e:
             self.logger.error(f"爬取过程出错: {e}")
+            self._record_crawl_error(e)
         
-        self.logger.info(f"本次爬取完成，新增 {new_items_count} 条数据，总计 {len(hot_items)} 条")
+        self.logger.info(f"本次爬取完成，新增 {len(hot_items)} 条数据")
+        return hot_items
+    
+    def _iter_hot_list_http(self) -> Iterator[Dict]:
+        """请求热榜页并逐条产出去重后的热榜项"""
+        entries = self.retry_policy.call(self.http_fetcher.target_url, self.http_fetcher.fetch_hot_list,
+                                         self.crawler_config.get('max_items', 50), label='hot_list')
+        self.logger.info(f"HTTP后端解析到 {len(entries)} 条热榜")
+        yield from self._collect_new_items(entries)
+    
+    def _iter_lists_http(self, sources: List[Dict]) -> Iterator[Dict]:
+        """并发请求全部热榜，按配置顺序去重后逐条产出（同一个问题只保留第一次出现的热榜）"""
+        max_items = self.crawler_config.get('max_items', 50)
+        
+        def _fetch(source):
+            try:
+                return self.retry_policy.call(source['url'], self.http_fetcher.fetch_hot_list, max_items, source['url'],
+                                              label='hot_list')
+            except PermissionError:
+                raise
+            except Exception as e:
+                self.logger.error(f"热榜 {source['name']} 爬取失败: {e}")
+                self._record_crawl_error(e)
+                return []
+        
+        with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+            for source, entries in zip(sources, executor.map(_fetch, sources)):
+                items = self._collect_new_items(entries, source['name'])
+                self.logger.info(f"热榜 {source['name']}: 解析到 {len(entries)} 条，新增 {len(items)} 条")
+                yield from items
+    
+    def _detail_candidates(self, hot_items: List[Dict]) -> List[Dict]:
+        """需要提取详细信息的热榜项：启用刷新规划时交给规划器挑选，否则只取前N条"""
+        if self.refresh_planner:
+            return hot_items
+        top_n = self.crawler_config.get('extract_details_for_top', 20)
+        return [item for item in hot_items if item['rank'] <= top_n]
+    
+    def _politeness(self) -> HostPoliteness:
+        """按detail_pool配置创建主机访问限速器"""
+        pool_config = self.crawler_config.get('detail_pool', {}) or {}
+        return HostPoliteness(
+            max_concurrent_per_host=pool_config.get('per_host_concurrency', 2),
+            min_interval=pool_config.get('min_host_interval', 1.0)
+        )
+    
+    def _detail_circuit_open(self, url: str) -> bool:
+        """目标主机是否已熔断（熔断时计入失败，调用方应在占用主机访问间隔之前检查）"""
+        if self.circuit_breaker.is_open(url):
+            self._record_failure('detail:circuit_open')
+            return True
+        return False
+    
+    def _fetch_detail_pooled(self, pool: DriverPool, url: str) -> Dict:
+        """借用驱动池中的驱动抓取详情；主机已熔断时直接返回空字典，不占用驱动和主机访问间隔"""
+        if self._detail_circuit_open(url):
+            return {}
+        return pool.run(lambda driver, url: self.extract_detailed_info(url, driver=driver, check_cache=False), url)
+    
+    def _fetch_detail_http(self, url: str, politeness: HostPoliteness) -> Dict:
+        """通过HTTP后端抓取一个问题页的详细信息，失败时返回空字典"""
+        if self.circuit_breaker.is_open(url):
+            # 熔断期间不占用主机的请求间隔
+            self.retry_policy.record_failure(url, 'circuit_open', 'detail')
+            return {}
+        with politeness.slot(url), self.metrics.phase('detail_fetch'):
+            try:
+                return self.retry_policy.call(url, self.http_fetcher.fetch_question_details, url,
+                                              label='detail')
+            except NavigationError as e:
+                self.logger.warning(f"提取详细信息失败 {url}: {e}")
+                return {}
+            except Exception as e:
+                self.logger.error(f"提取详细信息失败 {url}: {e}")
+                self._record_failure(f"detail:{type(e).__name__}")
+                return {}
+    
+    def _extract_details_async(self, items: List[Dict]) -> bool:
+        """使用异步引擎提取详细信息（原地更新），引擎不可用时返回False"""
+        try:
+            from async_detail_engine import AsyncDetailEngine
+        except ImportError as e:
+            self.logger.warning(f"异步详情引擎不可用（{e}），回退到默认方式")
+            return False
+        
+        basic_config = self.config.get('basic', {}) or {}
+        async_config = self.crawler_config.get('async_detail', {}) or {}
+        engine = AsyncDetailEngine(
+            self.cookie_file,
+            base_url=self.crawler_config.get('base_url', ZHIHU_BASE_URL),
+            user_agent=self.crawler_config.get('user_agent', DEFAULT_USER_AGENT),
+            request_delay=basic_config.get('request_delay', [1, 3]),
+            max_retry=basic_config.get('max_retry', 3),
+            concurrency=async_config.get('concurrency', 8),
+            burst=async_config.get('burst', 1),
+            timeout=async_config.get('timeout', 10),
+            retry_policy=self.retry_policy,
+            allow_fetch=self.refresh_planner.allow_fetch if self.refresh_planner else None,
+            logger=self.logger
+        )
+        for item, details in engine.run(items):
+            self._cache_details(item, details)
+        return True
+    
+    def _cache_details(self, item: Dict, details: Dict):
+        """把成功抓取的详情写入缓存（空结果表示抓取失败，不缓存）"""
+        if details and self.detail_cache and item.get('question_hash'):
+            self.detail_cache.put(item['question_hash'], details)
+    
+    def extract_details_for_items(self, items: List[Dict]):
+        """为热榜项批量提取详细信息（原地更新）
+        
+        先用详情缓存填充未过期的问题，只抓取缺失或过期的部分；
+        启用刷新规划时再按分数在预算内挑选实际抓取的项
+        """
+        items = [item for item in items if item.get('url')]
+        if not items:
+            return
+        
+        pending = self._plan_detail_fetches(items)
+        start = time.perf_counter()
+        if pending:
+            self._fetch_details(pending)
+        self._finish_detail_fetches(items, pending, time.perf_counter() - start)
+    
+    def _fill_from_cache(self, item: Dict) -> bool:
+        """用详情缓存中未过期的详情填充热榜项，命中时返回True"""
+        if not self.detail_cache:
+            return False
+        cached = self.detail_cache.get(item['question_hash'])
+        if cached is None:
+            return False
+        item.update(cached)
+        return True
+    
+    def _plan_detail_fetches(self, items: List[Dict]) -> List[Dict]:
+        """用详情缓存填充未过期的问题，返回需要实际抓取的热榜项"""
+        # 先查详情缓存
+        pending = [item for item in items if not self._fill_from_cache(item)]
+        if self.detail_cache:
+            self.logger.info(f"详情缓存命中 {len(items) - len(pending)} 条，需抓取 {len(pending)} 条")
+        
+        self.run_stats['details_requested'] += len(items)
+        self.run_stats['details_cached'] += len(items) - len(pending)
+        
+        if self.refresh_planner:
+            pending = self.refresh_planner.plan(items, pending, self.detail_cache)
+        self.run_stats['details_fetched'] += len(pending)
+        return pending
+    
+    def _finish_detail_fetches(self, items: List[Dict], pending: List[Dict], elapsed: float):
+        """记录刷新规划的耗时并保存详情缓存（因时间预算用完而跳过的项不计入抓取数）"""
+        if self.refresh_planner:
+            skipped = self.refresh_planner.deadline_skips
+            if skipped:
+                self.run_stats['details_fetched'] -= skipped
+                self.logger.info(f"时间预算用完，跳过 {skipped} 条详情抓取")
+            self.refresh_planner.record(items, len(pending) - skipped, elapsed)
+        
+        if self.detail_cache:
+            self.detail_cache.save()
+            stats = self.detail_cache.stats()
+            self.logger.info(f"详情缓存: 命中 {stats['hits']} 次，未命中 {stats['misses']} 次，"
+                             f"命中率 {stats['hit_rate']:.0%}，缓存 {stats['entries']} 条")
+    
+    def _process_items(self, hot_items: Iterable[Dict], extract_details: bool) -> List[Dict]:
+        """为解析出的热榜项补全详细信息（原地更新），返回全部热榜项
+        
+        启用流水线时热榜项一解析出来就交给详情工作线程，补全后立即写入本次运行的流水日志；
+        刷新规划需要完整列表，异步详情引擎只支持整批抓取，这两种情况先解析出完整列表
+        """
+        async_engine = self.crawler_config.get('detail_engine', 'pool') == 'async'
+        batch = not self.pipeline_config.get('enabled', True) or (extract_details and async_engine)
+        if not batch and not (extract_details and self.refresh_planner):
+            return self._stream_items(hot_items, extract_details)
+        
+        with self.metrics.phase('list_parse'):
+            hot_items = list(hot_items)
+        candidates = [item for item in self._detail_candidates(hot_items) if item.get('url')] if extract_details else []
+        if batch:
+            # 整批抓取没有逐条进度，恢复时重新抓取全部候选项
+            self._save_checkpoint('detail', items=hot_items, pending=[item['question_hash'] for item in candidates])
+            if candidates:
+                self.extract_details_for_items(candidates)
+            self._save_checkpoint('save')
+            return hot_items
+        
+        pending = self._plan_detail_fetches(candidates) if candidates else []
+        pending_hashes = {item['question_hash'] for item in pending}
+        self._save_checkpoint('detail', items=hot_items, pending=sorted(pending_hashes))
+        
+        start = time.perf_counter()
+        self._run_pipeline(hot_items, pending_hashes)
+        if candidates:
+            self._finish_detail_fetches(candidates, pending, time.perf_counter() - start)
         return hot_items
     
-    def _parse_hot_item_enhanced(self, element, rank: int, extract_details: bool = True) -> Optional[Dict]:
-        """解析热榜项（增强版）"""
+    def _stream_items(self, hot_items: Iterable[Dict], extract_details: bool) -> List[Dict]:
+        """边解析边抓取：每条热榜项产出时按前N条和详情缓存决定是否抓取，列表解析完后记录检查点"""
+        top_n = self.crawler_config.get('extract_details_for_top', 20)
+        produced, candidates, pending_hashes = [], [], set()
+        
+        def _planned():
+            for item in hot_items:
+                produced.append(item)
+                if extract_details and item.get('url') and item['rank'] <= top_n:
+                    candidates.append(item)
+                    if not self._fill_from_cache(item):
+                        pending_hashes.add(item['question_hash'])
+                yield item
+            # 列表阶段结束，记录完整列表用于恢复
+            self._save_checkpoint('detail', items=produced, pending=sorted(pending_hashes))
+        
+        start = time.perf_counter()
+        try:
+            pipeline = self._run_pipeline(_planned(), pending_hashes, count=top_n if extract_details else 0)
+            self.metrics.observe('list_parse', pipeline.stage_seconds['produce'])
+        finally:
+            self.run_stats['details_requested'] += len(candidates)
+            self.run_stats['details_cached'] += len(candidates) - len(pending_hashes)
+            self.run_stats['details_fetched'] += len(pending_hashes)
+        if candidates:
+            if self.detail_cache:
+                self.logger.info(f"详情缓存命中 {len(candidates) - len(pending_hashes)} 条，"
+                                 f"抓取 {len(pending_hashes)} 条")
+            pending = [item for item in candidates if item['question_hash'] in pending_hashes]
+            self._finish_detail_fetches(candidates, pending, time.perf_counter() - start)
+        return produced
+    
+    def _run_pipeline(self, items: Iterable[Dict], pending_hashes: set, count: Optional[int] = None) -> CrawlPipeline:
+        """抓取pending_hashes中问题的详情，全部热榜项逐条写入本次运行的流水日志
+        
+        items可以是边解析边产出的迭代器，此时pending_hashes随解析逐步填充，count为需要抓取详情的条数上限
+        """
+        if self.journal is None:
+            self.journal = PipelineJournal(self.data_dir, run_id=self.checkpoint.crawl_id if self.checkpoint else None,
+                                           fsync=self.pipeline_config.get('fsync', True))
+        with self._detail_fetcher(len(pending_hashes) if count is None else count) as (fetch, workers):
+            if self.backend != 'http' and workers == 1:
+                # 主驱动逐条抓取详情时不能同时用它解析热榜，先解析出完整列表
+                items = list(items)
+            pipeline = CrawlPipeline(fetch, self.journal.append, workers=workers,
+                                     queue_size=self.pipeline_config.get('queue_size', 8), logger=self.logger)
+            pipeline.run(items, lambda item: item['question_hash'] in pending_hashes)
+        self._save_checkpoint('save')
+        return pipeline
+    
+    def _save_checkpoint(self, phase: str, **fields):
+        """更新本次运行的检查点（写入失败不影响爬取）"""
+        if self.checkpoint is None:
+            return
+        try:
+            self.checkpoint.save(phase, **fields)
+        except OSError as e:
+            self.logger.warning(f"写入检查点失败: {e}")
+    
+    def _resume_items(self) -> List[Dict]:
+        """从检查点恢复：已写入流水日志的热榜项直接复用，只补抓未完成的详情"""
+        done, unfinished, pending = self.checkpoint.remaining()
+        for item in done + unfinished:
+            self._mark_seen(item['question_hash'])
+        
+        # 中断后其他运行可能已经抓取过的详情
+        if self.detail_cache:
+            for item in unfinished:
+                cached = self.detail_cache.get(item['question_hash']) if item['question_hash'] in pending else None
+                if cached is not None:
+                    item.update(cached)
+                    pending.discard(item['question_hash'])
+        
+        self.logger.info(f"从检查点 {self.checkpoint.crawl_id} 恢复：已完成 {len(done)} 条，"
+                         f"未写入 {len(unfinished)} 条，需抓取详情 {len(pending)} 条")
+        self.run_stats['details_requested'] += len(pending)
+        self.run_stats['details_fetched'] += len(pending)
+        self._run_pipeline(unfinished, pending)
+        if self.detail_cache:
+            self.detail_cache.save()
+        
+        position = {item['question_hash']: index for index, item in enumerate(self.checkpoint.state.get('items', []))}
+        return sorted(done + unfinished, key=lambda item: position[item['question_hash']])
+    
+    @contextmanager
+    def _detail_fetcher(self, count: int):
+        """准备逐条抓取详情的函数和工作线程数（流水线和整批抓取共用）
+        
+        HTTP后端多线程请求问题页；Selenium后端在 detail_pool.size 大于1时启动驱动池，否则使用主驱动
+        """
+        pool_config = self.crawler_config.get('detail_pool', {}) or {}
+        size = max(1, min(pool_config.get('size', min(4, os.cpu_count() or 1)), count))
+        politeness = self._politeness()
+        
+        if count == 0:
+            yield (lambda item: {}), 1
+            return
+        
+        if self.backend == 'http':
+            def _fetch_http(item):
+                details = self._fetch_detail_http(item['url'], politeness)
+                self._cache_details(item, details)
+                return details
+            yield self._within_budget(_fetch_http), size
+            return
+        
+        pool = None
+        if size > 1:
+            self.logger.info(f"使用驱动池并发提取 {count} 条详细信息（{size} 个实例）")
+            pool = DriverPool(self.create_driver, size=size, politeness=politeness,
+                              close_driver=self.quit_driver, logger=self.logger)
+            size = pool.start()
+            if size == 0:
+                self.logger.warning("驱动池启动失败，回退到逐条提取")
+                pool.close()
+                pool = None
+        
+        try:
+            if pool:
+                yield self._within_budget(lambda item: self._fetch_detail_pooled(pool, item['url'])), size
+            else:
+                def _fetch_main(item):
+                    if self._detail_circuit_open(item['url']):
+                        return {}
+                    self.logger.info(f"正在提取第 {item['rank']} 条详细信息...")
+                    with politeness.slot(item['url']):
+                        return self.extract_detailed_info(item['url'], check_cache=False)
+                yield self._within_budget(_fetch_main), 1
+        finally:
+            if pool:
+                pool.close()
+    
+    def _within_budget(self, fetch):
+        """启用刷新规划时，时间预算用完后不再发出新的详情请求（跳过的项返回空详情，不写入缓存）"""
+        if not self.refresh_planner:
+            return fetch
+        
+        def _fetch(item):
+            if not self.refresh_planner.allow_fetch():
+                return {}
+            return fetch(item)
+        return _fetch
+    
+    def _fetch_details(self, items: List[Dict]):
+        """抓取详细信息（原地更新）
+        
+        crawler.detail_engine 为 async 时使用异步引擎；否则HTTP后端用线程并发请求问题页，
+        Selenium后端在 detail_pool.size 大于1时使用驱动池，否则在主驱动中逐条抓取
+        """
+        if self.crawler_config.get('detail_engine', 'pool') == 'async' and self._extract_details_async(items):
+            return
+        
+        with self._detail_fetcher(len(items)) as (fetch, workers):
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for item, details in zip(items, executor.map(fetch, items)):
+                    item.update(details)
+    
+    def _build_hot_item(self, rank: int, title: str, url: str, heat_value: Optional[str],
+                        excerpt: Optional[str] = None) -> Dict:
+        """按_parse_hot_item_enhanced的字段结构构造热榜项（标题中附带的摘要拆到excerpt）"""
+        title, title_excerpt = split_title(title)
+        item = {
+            'rank': rank,
+            'crawl_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'date': datetime.now().strftime('%Y-%m-%d'),
+            'title': title,
+            'url': url,
+            'question_hash': self._generate_question_hash(title, url),
+            'heat_value': heat_value
+        }
+        if excerpt or title_excerpt:
+            item['excerpt'] = excerpt or title_excerpt
+        return item
+    
+    def _parse_hot_item_enhanced(self, element, rank: int) -> Optional[Dict]:
+        """解析热榜项（增强版，详细信息由_process_items统一补全）"""
         item = {
             'rank': rank,
             'crawl_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -369,7 +1183,9 @@ class EnhancedZhihuCrawler:
         try:
             # 提取标题和链接
             title_elem = element.find_element(By.CSS_SELECTOR, "h2, [class*='title'], a")
-            item['title'] = title_elem.text.strip()
+            item['title'], excerpt = split_title(title_elem.text)
+            if excerpt:
+                item['excerpt'] = excerpt
             
             link_elem = element.find_element(By.CSS_SELECTOR, "a[href]")
             item['url'] = link_elem.get_attribute('href')
@@ -384,12 +1200,6 @@ class EnhancedZhihuCrawler:
                 item['heat_value'] = heat_elem.text.strip()
             except:
                 item['heat_value'] = None
-            
-            # 提取详细信息
-            if extract_details and item.get('url'):
-                details = self.extract_detailed_info(item['url'])
-                item.update(details)
-                time.sleep(1)  # 避免请求过快
                 
         except Exception as e:
             self.logger.error(f"解析热榜项失败: {e}")
@@ -397,76 +1207,269 @@ class EnhancedZhihuCrawler:
             
         return item if 'title' in item else None
     
-    def save_data(self, data: List[Dict], filename_prefix: str = "zhihu_hot"):
-        """保存数据"""
+    def save_data(self, data: List[Dict], filename_prefix: str = "zhihu_hot", crawl_id: Optional[str] = None):
+        """保存数据（crawl_id 用于SQLite记录和原始文件名，未指定时取当前时间；补存中断运行时传入该运行的crawl_id）"""
         if not data:
             self.logger.warning("没有数据可保存")
             return None
         
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        start = time.perf_counter()
         
-        # 保存原始数据
-        raw_filename = f"{filename_prefix}_{timestamp}.json"
-        raw_filepath = os.path.join(self.data_dir, "raw", raw_filename)
+        # 摘要单独保存；热度和计数统一转换为整数（可选保留原始热度文本）
+        self.excerpt_store.put_many(data)
+        normalize_items(data, keep_raw_text=self.keep_heat_text)
         
-        with open(raw_filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        crawl_id = crawl_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_size = self._output_size()
+        
+        if self.sqlite_store:
+            # 一个事务写入本次爬取的全部记录
+            self.sqlite_store.insert(data, crawl_id=crawl_id)
+        
+        if self.sqlite_store and not self.keep_raw_files:
+            raw_filepath = self.sqlite_store.db_file
+        elif self.snapshot_mode:
+            # 快照模式：只写观测和新问题
+            raw_filepath = self.observation_store.write(data, crawl_id=crawl_id)
+        elif self.raw_writer:
+            # 追加到当天的NDJSON分段
+            raw_filepath = self.raw_writer.write(data)
+        else:
+            # 保存原始数据
+            raw_filepath, f = self._open_raw_file(f"{filename_prefix}_{crawl_id}")
+            with f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
         
         # 保存去重哈希
         self._save_question_hashes()
         
-        # 更新爬取历史
-        self._update_crawl_history(len(data), raw_filepath)
+        # 记录本次运行的输出
+        self.run_stats.update(items=len(data), filepath=raw_filepath,
+                              bytes_written=max(0, self._output_size(raw_filepath) - output_size))
         
+        self.metrics.observe('save', time.perf_counter() - start)
         self.logger.info(f"数据已保存到: {raw_filepath}")
         return raw_filepath
     
-    def _update_crawl_history(self, count: int, filepath: str):
-        """更新爬取历史记录"""
-        history = []
-        if os.path.exists(self.history_file):
+    def _open_raw_file(self, name: str):
+        """以独占方式新建原始数据文件，同名文件已存在（同一秒内多次保存）时加序号，不覆盖已有数据"""
+        raw_dir = os.path.join(self.data_dir, "raw")
+        index = 0
+        while True:
+            raw_filepath = os.path.join(raw_dir, f"{name}_{index}.json" if index else f"{name}.json")
             try:
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    history = json.load(f)
-            except:
-                pass
-        
-        history.append({
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'count': count,
-            'filepath': filepath
-        })
-        
-        # 只保留最近100条记录
-        history = history[-100:]
+                return raw_filepath, open(raw_filepath, 'x', encoding='utf-8')
+            except FileExistsError:
+                index += 1
+    
+    def _output_size(self, filepath: Optional[str] = None) -> int:
+        """本次保存会写入的文件的当前总字节数（用于统计写入量）"""
+        paths = {filepath} if filepath else set()
+        if self.sqlite_store:
+            paths.update([self.sqlite_store.db_file, f"{self.sqlite_store.db_file}-wal"])
+        if self.observation_store:
+            paths.add(self.observation_store.question_file)
+        if self.raw_writer:
+            paths.add(self.raw_writer.segment_path())
+        return sum(os.path.getsize(path) for path in paths if os.path.isfile(path))
+    
+    def _begin_run(self):
+        """重置本次运行的统计"""
+        self._run_start = time.perf_counter()
+        self.metrics.reset()
+        self.run_stats = {
+            'started_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'backend': self.backend,
+            'items': 0,
+            'details_requested': 0,
+            'details_cached': 0,
+            'details_fetched': 0,
+            'bytes_written': 0,
+            'bytes_downloaded': 0,
+            'filepath': None,
+            'failures': Counter(),
+        }
+        self._run_hashes = set()
+        self.retry_policy.reset_stats()
+    
+    def _record_crawl_error(self, error: Exception):
+        """爬取过程的异常按类别计数（导航失败已由重试策略计数）"""
+        if not isinstance(error, NavigationError):
+            self._record_failure(f"crawl:{classify_error(error) or type(error).__name__}")
+    
+    def _record_element_failure(self, error: Exception):
+        """元素查找失败按类别计数（缺失的可选字段不视为导航失败）"""
+        self._record_failure(f"element:{classify_error(error) or type(error).__name__}")
+    
+    def _record_failure(self, reason: str):
+        """按失败类别计数（可能在抓取线程中调用）"""
+        with self._run_lock:
+            self.run_stats['failures'][reason] += 1
+    
+    def _finish_run(self, filepath: Optional[str]):
+        """把本次运行追加到运行日志"""
+        entry = dict(self.run_stats)
+        entry['duration'] = round(time.perf_counter() - self._run_start, 3)
+        entry['failures'] = dict(entry['failures'])
+        resilience = self.retry_policy.summary()
+        entry['retries'] = resilience['retries']
+        entry['circuit_trips'] = resilience['circuit_trips']
+        entry['status'] = 'ok' if filepath else ('failed' if entry['failures'] else 'empty')
+        self._export_metrics(entry)
+        entry['phase_seconds'] = {phase: stats['sum'] for phase, stats in self.metrics.summary()['phases'].items()}
+        try:
+            self.run_log.append(entry)
+        except OSError as e:
+            self.logger.warning(f"写入运行日志失败: {e}")
+    
+    def _export_metrics(self, entry: Dict):
+        """把本次运行的统计计入指标并导出Prometheus textfile和JSON摘要"""
+        self.metrics.observe('run', entry['duration'])
+        for key in ('items', 'details_requested', 'details_cached', 'details_fetched', 'bytes_written',
+                    'bytes_downloaded'):
+            self.metrics.inc(key.replace('_', ':', 1) if key != 'items' else 'items:new', entry.get(key, 0))
+        self.metrics.inc('retries', entry['retries'])
+        self.metrics.inc('circuit_trips', entry['circuit_trips'])
+        for reason, count in entry['failures'].items():
+            self.metrics.inc(f"failures:{reason}", count)
+        
+        phases = self.metrics.summary()['phases']
+        self.logger.info("阶段耗时: " + "，".join(
+            f"{phase} {stats['sum']:.2f} 秒" + (f"（{stats['count']} 次，p95 {stats['p95']:.2f} 秒）" if stats['count'] > 1 else "")
+            for phase, stats in phases.items()))
+        
+        if not self.metrics_exporter:
+            return
+        try:
+            self.metrics_exporter.export(self.metrics, entry['crawl_id'], {
+                'backend': entry.get('backend'),
+                'status': entry['status'],
+                'duration': entry['duration'],
+                'items': entry.get('items', 0),
+            })
+        except OSError as e:
+            self.logger.warning(f"导出爬取指标失败: {e}")
+    
+    def run_single_crawl(self, extract_details: bool = True, headless: bool = False,
+                         backend: Optional[str] = None, session=None, resume: bool = False) -> Optional[str]:
+        """执行单次爬取
+        
+        backend: "selenium"（默认）或 "http"，未指定时取配置 crawler.backend
+        session: 可选的BrowserSessionManager，提供时复用其已登录的驱动且运行结束后不关闭
+        resume: 继续最近一次中断的运行，只补抓未完成的详情（没有可恢复的运行时执行完整爬取）
+        """
+        if backend:
+            self.backend = backend
+        resumable = self._recover_runs(resume)
+        self._begin_run()
+        self._resuming = resumable is not None
+        if resumable:
+            self.checkpoint = resumable
+            extract_details = resumable.state.get('extract_details', extract_details)
+            self.run_stats['resumed_from'] = resumable.crawl_id
+        else:
+            self.checkpoint = CrawlCheckpoint(self.data_dir)
+            if not self.checkpoint.lock():
+                # 其他进程在同一秒开始了运行
+                self.checkpoint = CrawlCheckpoint(self.data_dir, f"{self.checkpoint.crawl_id}_{os.getpid()}")
+                self.checkpoint.lock()
+            self._save_checkpoint('list', backend=self.backend, extract_details=extract_details)
+        self.run_stats['crawl_id'] = self.checkpoint.crawl_id
+        filepath = None
+        try:
+            if self.backend == 'http':
+                filepath = self._run_single_crawl_http(extract_details)
+            else:
+                filepath = self._run_single_crawl_selenium(extract_details, headless, session)
+        finally:
+            self._close_checkpoint(saved=filepath is not None)
+            self._finish_run(filepath)
+        return filepath
+    
+    def _close_checkpoint(self, saved: bool):
+        """数据已保存时删除本次运行的检查点和流水日志，否则保留用于恢复"""
+        journal_count = 0
+        if self.journal is not None:
+            journal_count = self.journal.count
+            self.journal.close()
+            self.journal = None
+        if self.checkpoint is not None:
+            if saved or not (self.checkpoint.state.get('items') or journal_count):
+                self.checkpoint.discard()
+            else:
+                self.logger.warning(f"本次运行未能保存（crawl_id={self.checkpoint.crawl_id}，阶段 {self.checkpoint.phase}），"
+                                    f"可使用 crawl --resume 继续；下次普通爬取时会补存已完成的部分")
+                self.checkpoint.unlock()
+            self.checkpoint = None
+        self._resuming = False
+    
+    def _recover_runs(self, resume: bool = False) -> Optional[CrawlCheckpoint]:
+        """处理之前中断的运行
+        
+        resume为True时返回最近一次列表阶段已完成的运行用于恢复；其余运行直接补存已有的热榜项。
+        其他进程仍在进行中的运行（检查点锁被持有）跳过；返回的运行已加锁
+        """
+        checkpoints = [checkpoint for checkpoint in pending_checkpoints(self.data_dir) if checkpoint.lock()]
+        resumable = None
+        if resume:
+            candidates = [checkpoint for checkpoint in checkpoints if checkpoint.state.get('items')]
+            if candidates:
+                resumable = candidates[-1]
+            else:
+                self.logger.warning("没有可恢复的中断运行，执行完整爬取")
         
-        with open(self.history_file, 'w', encoding='utf-8') as f:
-            json.dump(history, f, ensure_ascii=False, indent=2)
+        for checkpoint in checkpoints:
+            if checkpoint is resumable:
+                continue
+            try:
+                items = checkpoint.merged_items()
+            except OSError as e:
+                self.logger.warning(f"读取中断运行 {checkpoint.crawl_id} 失败: {e}")
+                checkpoint.unlock()
+                continue
+            if items:
+                self.logger.info(f"补存中断运行 {checkpoint.crawl_id} 的 {len(items)} 条热榜项")
+                for item in items:
+                    self.question_hashes.add(item['question_hash'])
+                if not self.save_data(items, crawl_id=checkpoint.crawl_id):
+                    checkpoint.unlock()
+                    continue
+            checkpoint.discard()
+        return resumable
     
-    def run_single_crawl(self, extract_details: bool = True, headless: bool = False) -> Optional[str]:
-        """执行单次爬取"""
+    def _run_single_crawl_selenium(self, extract_details: bool, headless: bool, session=None) -> Optional[str]:
+        """使用Selenium后端执行单次爬取"""
         self.headless = headless
+        self.readiness.reset()
+        if self.crawl_profile:
+            self.crawl_profile.reset()
+        session_acquired = False
+        session_ok = False
         
         try:
-            self.setup_driver()
-            
-            # 加载Cookie并检查登录状态
-            if self.load_cookies():
-                self.driver.refresh()
-                time.sleep(3)
-                
-                if not self.check_login_status():
-                    self.logger.error("登录状态检查失败，请重新登录")
-                    return None
+            if session is not None:
+                # 复用长驻会话（Cookie已加载）
+                self.driver = session.acquire()
+                session_acquired = True
             else:
-                self.logger.error("无法加载Cookie，请先手动登录")
+                self.setup_driver()
+                if not self._is_leased(self.driver) and not self.load_cookies():
+                    self.logger.error("无法加载Cookie，请先手动登录")
+                    self._record_failure('cookie')
+                    return None
+            
+            # 检查登录状态（check_login_status会直接打开热榜页，无需再刷新主页）
+            if not self.check_login_status():
+                self.logger.error("登录状态检查失败，请重新登录")
+                self._record_failure('login')
                 return None
             
-            # 执行爬取
-            hot_items = self.crawl_hot_list(extract_details)
+            # 执行爬取（恢复时只补抓未完成的详情）
+            hot_items = self._resume_items() if self._resuming else self.crawl_hot_list(extract_details)
+            session_ok = True
             
             if hot_items:
-                filepath = self.save_data(hot_items)
+                filepath = self.save_data(hot_items, crawl_id=self.checkpoint.crawl_id)
                 return filepath
             else:
                 self.logger.warning("未能爬取到数据")
@@ -474,10 +1477,65 @@ class EnhancedZhihuCrawler:
                 
         except Exception as e:
             self.logger.error(f"爬取过程出错: {e}")
+            self._record_crawl_error(e)
+            return None
+        finally:
+            self._log_readiness_summary()
+            self._log_profile_summary()
+            if session_acquired:
+                session.release(ok=session_ok)
+                self.driver = None
+            elif self.driver:
+                self.quit_driver(self.driver, healthy=session_ok)
+                self.driver = None
+    
+    def _log_profile_summary(self):
+        """输出精简配置本次运行的流量统计"""
+        if not self.crawl_profile:
+            return
+        if self.driver:
+            self.crawl_profile.collect(self.driver)
+        stats = self.crawl_profile.summary()
+        self.run_stats['bytes_downloaded'] += stats['bytes_transferred']
+        self.logger.info(
+            f"精简配置流量统计: 请求 {stats['requests']} 个，传输 {stats['bytes_transferred'] / 1024:.1f} KB，"
+            f"拦截 {stats['blocked_requests']} 个 {stats['blocked_by_type']}，"
+            f"估算节省 {stats['estimated_bytes_saved'] / 1024:.1f} KB"
+        )
+    
+    def _run_single_crawl_http(self, extract_details: bool) -> Optional[str]:
+        """使用HTTP后端执行单次爬取（不启动浏览器）"""
+        try:
+            with self.metrics.phase('cookie_load'):
+                cookies_loaded = self.setup_http_fetcher()
+            if not cookies_loaded:
+                self.logger.error("无法加载Cookie，请先手动登录")
+                self._record_failure('cookie')
+                return None
+            
+            hot_items = self._resume_items() if self._resuming else self.crawl_hot_list_http(extract_details)
+            
+            if hot_items:
+                return self.save_data(hot_items, crawl_id=self.checkpoint.crawl_id)
+            self.logger.warning("未能爬取到数据")
+            return None
+        
+        except Exception as e:
+            self.logger.error(f"爬取过程出错: {e}")
+            self._record_crawl_error(e)
             return None
         finally:
-            if self.driver:
-                self.driver.quit()
+            if self.http_fetcher:
+                self.run_stats['bytes_downloaded'] += self.http_fetcher.bytes_received
+                self.http_fetcher.close()
+    
+    def _log_readiness_summary(self):
+        """输出本次运行各就绪条件的实际等待耗时"""
+        for condition, stats in self.readiness.summary().items():
+            self.logger.info(
+                f"就绪等待 '{condition}': {stats['count']} 次，共 {stats['total_seconds']:.2f} 秒，"
+                f"最长 {stats['max_seconds']:.2f} 秒，超时 {stats['timeouts']} 次"
+            )
 
 
 class HotListAnalyzer:
@@ -493,29 +1551,29 @@ class HotListAnalyzer:
         for directory in [self.analysis_dir, self.reports_dir]:
             os.makedirs(directory, exist_ok=True)
     
-    def load_all_data(self) -> pd.DataFrame:
-        """加载所有历史数据"""
-        all_data = []
+    def load_all_data(self, start_date: Optional[datetime] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """加载历史数据
         
-        if not os.path.exists(self.raw_dir):
-            return pd.DataFrame()
+        已建立SQLite库或Parquet历史存储时只读取start_date之后的数据和指定的列，否则读取全部原始文件
+        """
+        df = load_history(self.data_dir, start_date=start_date, columns=columns)
+        if df is not None:
+            return df
         
-        for filename in os.listdir(self.raw_dir):
-            if filename.endswith('.json') and 'zhihu_hot' in filename:
-                filepath = os.path.join(self.raw_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        all_data.extend(data)
-                except Exception as e:
-                    print(f"加载文件失败 {filename}: {e}")
+        all_data = list(iter_raw_records(self.raw_dir,
+                                         on_error=lambda filename, e: print(f"加载文件失败 {filename}: {e}")))
+        
+        # 快照模式的观测记录（关联问题维度表）
+        all_data.extend(ObservationStore(self.data_dir).load_records())
         
         if not all_data:
             return pd.DataFrame()
         
         df = pd.DataFrame(all_data)
         
-        # 数据类型转换
+        # 数据类型转换（旧数据中的热度/计数文本转换为数值，去掉标题附带的摘要）
+        normalize_frame(df)
+        strip_excerpts(df)
         if 'crawl_time' in df.columns:
             df['crawl_time'] = pd.to_datetime(df['crawl_time'])
         if 'date' in df.columns:
@@ -525,13 +1583,14 @@ class HotListAnalyzer:
     
     def analyze_hot_trends(self, days: int = 7) -> Dict:
         """分析热度趋势"""
-        df = self.load_all_data()
+        cutoff_date = datetime.now() - timedelta(days=days)
+        df = self.load_all_data(start_date=cutoff_date, columns=[
+            'crawl_time', 'date', 'question_hash', 'rank', 'question_tags', 'answer_count'])
         
         if df.empty:
             return {"error": "没有可分析的数据"}
         
         # 过滤最近N天的数据
-        cutoff_date = datetime.now() - timedelta(days=days)
         if 'crawl_time' in df.columns:
             recent_df = df[df['crawl_time'] >= cutoff_date]
         else:
@@ -589,14 +1648,14 @@ class HotListAnalyzer:
 
     def generate_trend_charts(self, days: int = 7):
         """生成6个独立的分析图表"""
-        df = self.load_all_data()
+        cutoff_date = datetime.now() - timedelta(days=days)
+        df = self.load_all_data(start_date=cutoff_date)
         
         if df.empty:
             print("❌ 没有数据可用于生成图表")
             return None
         
         # 过滤数据
-        cutoff_date = datetime.now() - timedelta(days=days)
         if 'crawl_time' in df.columns:
             recent_df = df[df['crawl_time'] >= cutoff_date]
         else:
@@ -1036,8 +2095,9 @@ class HotListAnalyzer:
 class ScheduledCrawler:
     """定时任务调度器"""
     
-    def __init__(self, data_dir: str = "data"):
-        self.crawler = EnhancedZhihuCrawler(data_dir)
+    def __init__(self, data_dir: str = "data", config: Optional[Dict] = None):
+        self.config = config or {}
+        self.crawler = EnhancedZhihuCrawler(data_dir, self.config)
         self.analyzer = HotListAnalyzer(data_dir)
         self.scheduler = BlockingScheduler()
         
@@ -1047,13 +2107,26 @@ class ScheduledCrawler:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
         self.logger = logging.getLogger(__name__)
+        
+        # 长驻浏览器会话（任务之间复用已登录的驱动）
+        session_config = (self.config.get('scheduler', {}) or {}).get('browser_session', {}) or {}
+        self.browser_session = None
+        if session_config.get('enabled', True):
+            self.browser_session = BrowserSessionManager(
+                lambda: self.crawler.create_driver(headless=True),
+                close_driver=self.crawler.quit_driver,
+                max_runs=session_config.get('max_runs', 20),
+                max_memory_mb=session_config.get('max_memory_mb', 1500),
+                logger=self.logger
+            )
     
     def scheduled_crawl_job(self, extract_details: bool = True):
         """定时爬取任务"""
         self.logger.info("开始执行定时爬取任务")
         
         try:
-            filepath = self.crawler.run_single_crawl(extract_details=extract_details, headless=True)
+            filepath = self.crawler.run_single_crawl(extract_details=extract_details, headless=True,
+                                                     session=self.browser_session)
             if filepath:
                 self.logger.info(f"定时爬取完成，数据已保存到: {filepath}")
                 
@@ -1069,6 +2142,13 @@ class ScheduledCrawler:
         except Exception as e:
             self.logger.error(f"定时任务执行失败: {e}")
     
+    def scheduled_compaction_job(self):
+        """定时压缩任务：把新增原始数据折叠进Parquet历史存储"""
+        try:
+            ParquetHistoryStore(self.crawler.data_dir, self.logger).compact()
+        except Exception as e:
+            self.logger.error(f"历史数据压缩失败: {e}")
+    
     def scheduled_analysis_job(self, days: int = 7):
         """定时分析任务"""
         self.logger.info("开始执行定时分析任务")
@@ -1131,6 +2211,17 @@ class ScheduledCrawler:
             misfire_grace_time=3600
         )
         
+        # 每天把新增原始数据压缩进Parquet历史存储
+        parquet_config = (self.config.get('storage', {}) or {}).get('parquet', {}) or {}
+        if parquet_config.get('enabled', False):
+            self.scheduler.add_job(
+                func=self.scheduled_compaction_job,
+                trigger=CronTrigger(hour=parquet_config.get('compact_hour', 1), minute=0, second=0),
+                id='history_compaction',
+                name='每日历史数据压缩',
+                misfire_grace_time=3600
+            )
+        
         self.logger.info("分析任务已添加")
     
     def start_scheduler(self):
@@ -1148,6 +2239,11 @@ class ScheduledCrawler:
         except KeyboardInterrupt:
             self.logger.info("接收到中断信号，正在关闭调度器...")
             self.scheduler.shutdown()
+        finally:
+            if self.browser_session:
+                self.browser_session.close()
+            if self.crawler.raw_writer:
+                self.crawler.raw_writer.close()
     
     def run_manual_analysis(self, days: int = 7):
         """手动运行分析"""
@@ -1247,4 +2343,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()